@@ -3,7 +3,7 @@ import http
 import json
 from collections.abc import Sequence
 from functools import partial
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Final
 
 import aiohttp
 import yarl
@@ -12,14 +12,21 @@ from fastapi import HTTPException, status
 from unidecode import unidecode
 
 from adapters.services.igdb_types import Game
-from config import IGDB_CLIENT_ID
+from config import IGDB_CLIENT_ID, IGDB_MULTIQUERY_ENABLED
 from logger.logger import log
 from utils import get_version
-from utils.context import ctx_aiohttp_session
+from utils.cache import cached_response
+from utils.context import ctx_aiohttp_session, set_context_var
+from utils.rate_limit import RATE_LIMITERS, get_retry_after
 
 if TYPE_CHECKING:
     from handler.metadata.igdb_handler import TwitchAuth
 
+# Seconds to wait for the queries of concurrent lookups before sending a batch
+MULTIQUERY_BATCH_WINDOW: Final = 0.05
+# Queries allowed by IGDB in a single multiquery request
+MULTIQUERY_MAX_QUERIES: Final = 10
+
 
 class IGDBInvalidCredentialsException(Exception):
     """Exception raised when IGDB credentials are invalid."""
@@ -48,6 +55,19 @@ async def auth_middleware(
     return await handler(req)
 
 
+class MultiqueryBatch:
+    """Queries waiting to be sent together in a multiquery request"""
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, aiohttp_session: aiohttp.ClientSession
+    ) -> None:
+        self.loop = loop
+        self.aiohttp_session = aiohttp_session
+        self.queries: list[tuple[str, str, asyncio.Future[list]]] = []
+        self.request_timeout = 0
+        self.flush_handle: asyncio.TimerHandle | None = None
+
+
 class IGDBService:
     """Service to interact with the IGDB API.
 
@@ -62,7 +82,10 @@ class IGDBService:
         self.url = yarl.URL(base_url or "https://api.igdb.com/v4")
         self.twitch_auth = twitch_auth
         self.auth_middleware = partial(auth_middleware, twitch_auth=self.twitch_auth)
+        self._batch: MultiqueryBatch | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
 
+    @cached_response("igdb")
     async def _request(
         self,
         url: str,
@@ -72,8 +95,6 @@ class IGDBService:
         limit: int | None = None,
         request_timeout: int = 120,
     ) -> list:
-        aiohttp_session = ctx_aiohttp_session.get()
-
         content = ""
         if search_term:
             content += f'search "{unidecode(search_term)}"; '
@@ -85,6 +106,102 @@ class IGDBService:
             content += f"limit {limit}; "
         content = content.strip()
 
+        endpoint = url.removeprefix(f"{self.url}/")
+        if IGDB_MULTIQUERY_ENABLED and endpoint != url:
+            return await self._batched_request(endpoint, content, request_timeout)
+        return await self._post(url, content, request_timeout)
+
+    async def _batched_request(
+        self, endpoint: str, content: str, request_timeout: int
+    ) -> list:
+        """Queue a query to be sent with the ones of concurrent lookups
+
+        Queries are collected for a short window, or until a multiquery is
+        full, and then sent together in a single request.
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._batch
+        # Batches can't be shared by the event loops of different jobs
+        if batch is None or batch.loop is not loop:
+            batch = self._batch = MultiqueryBatch(loop, ctx_aiohttp_session.get())
+            batch.flush_handle = loop.call_later(
+                MULTIQUERY_BATCH_WINDOW, self._flush_batch, batch
+            )
+
+        future: asyncio.Future[list] = loop.create_future()
+        batch.queries.append((endpoint, content, future))
+        batch.request_timeout = max(batch.request_timeout, request_timeout)
+        if len(batch.queries) >= MULTIQUERY_MAX_QUERIES:
+            if batch.flush_handle:
+                batch.flush_handle.cancel()
+            self._flush_batch(batch)
+
+        return await future
+
+    def _flush_batch(self, batch: MultiqueryBatch) -> None:
+        if self._batch is batch:
+            self._batch = None
+        task = batch.loop.create_task(self._send_batch(batch))
+        # Keep a reference to the task until it's done
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: MultiqueryBatch) -> None:
+        """Send the queries of a batch and fan the results out to their callers
+
+        The batch is sent with the HTTP session of the context that started it,
+        which is the one of the app or job running the event loop, so it stays
+        open while the callers are waiting.
+        """
+        futures = [future for _, _, future in batch.queries]
+        try:
+            async with set_context_var(ctx_aiohttp_session, batch.aiohttp_session):
+                results = await self._post_batch(batch)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result in zip(futures, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+    async def _post_batch(self, batch: MultiqueryBatch) -> list[list]:
+        """Post the queries of a batch, returning the results of each query"""
+        if len(batch.queries) == 1:
+            endpoint, content, _ = batch.queries[0]
+            return [
+                await self._post(
+                    str(self.url.joinpath(endpoint)),
+                    content,
+                    batch.request_timeout,
+                )
+            ]
+
+        content = "\n".join(
+            f'query {endpoint} "{index}" {{ {query} }};'
+            for index, (endpoint, query, _) in enumerate(batch.queries)
+        )
+        response = await self._post(
+            str(self.url.joinpath("multiquery")),
+            content,
+            batch.request_timeout,
+        )
+        results_by_name = {
+            result.get("name"): result.get("result", []) for result in response
+        }
+        return [
+            results_by_name.get(str(index), []) for index in range(len(batch.queries))
+        ]
+
+    async def _post(self, url: str, content: str, request_timeout: int) -> list:
+        aiohttp_session = ctx_aiohttp_session.get()
+
         log.debug(
             "API request: URL=%s, Content=%s, Timeout=%s",
             url,
@@ -93,6 +210,7 @@ class IGDBService:
         )
 
         try:
+            await RATE_LIMITERS["igdb"].acquire()
             res = await aiohttp_session.post(
                 url,
                 data=content,
@@ -123,8 +241,8 @@ class IGDBService:
                 log.info("Twitch token invalid: fetching a new one...")
                 await self.twitch_auth._update_twitch_token()
             elif exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Hold back the requests of all processes as long as asked
+                await RATE_LIMITERS["igdb"].penalize(get_retry_after(exc.headers))
             else:
                 # Log the error and return an empty list if the request fails with a different code
                 log.error(exc)
@@ -141,6 +259,7 @@ class IGDBService:
                 content,
                 request_timeout,
             )
+            await RATE_LIMITERS["igdb"].acquire()
             res = await aiohttp_session.post(
                 url,
                 data=content,
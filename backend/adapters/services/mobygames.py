@@ -1,4 +1,3 @@
-import asyncio
 import http
 import json
 from collections.abc import Collection
@@ -13,7 +12,9 @@ from adapters.services.mobygames_types import MobyGame, MobyGameBrief, MobyOutpu
 from config import MOBYGAMES_API_KEY
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import RATE_LIMITERS, get_retry_after
 
 
 async def auth_middleware(
@@ -36,6 +37,7 @@ class MobyGamesService:
     ) -> None:
         self.url = yarl.URL(base_url or "https://api.mobygames.com/v1")
 
+    @cached_response("moby")
     async def _request(self, url: str, request_timeout: int = 120) -> dict:
         aiohttp_session = ctx_aiohttp_session.get()
         log.debug(
@@ -45,6 +47,7 @@ class MobyGamesService:
         )
 
         try:
+            await RATE_LIMITERS["moby"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
@@ -68,8 +71,8 @@ class MobyGamesService:
                 log.error(exc)
                 return {}
             elif exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Hold back the requests of all processes as long as asked
+                await RATE_LIMITERS["moby"].penalize(get_retry_after(exc.headers))
             else:
                 # Log the error and return an empty dict if the request fails with a different code
                 log.error(exc)
@@ -85,6 +88,7 @@ class MobyGamesService:
                 url,
                 request_timeout,
             )
+            await RATE_LIMITERS["moby"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
@@ -1,10 +1,14 @@
 import asyncio
 import re
+import time
+import weakref
 
+from config import SCAN_RAHASHER_TIMEOUT, SCAN_RAHASHER_WORKERS
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from logger.formatter import LIGHTMAGENTA
 from logger.formatter import highlight as hl
 from logger.logger import log
+from utils.pipeline import StageStats
 
 RAHASHER_VALID_HASH_REGEX = re.compile(r"[0-9a-f]{32}")
 
@@ -73,10 +77,55 @@ PLATFORM_SLUG_TO_RETROACHIEVEMENTS_ID: dict[UPS, int] = {
 class RAHasherError(Exception): ...
 
 
+# RAHasher processes running at the same time, for each event loop
+_rahasher_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def _get_rahasher_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _rahasher_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _rahasher_semaphores[loop] = asyncio.Semaphore(
+            SCAN_RAHASHER_WORKERS
+        )
+    return semaphore
+
+
 class RAHasherService:
-    """Service to calculate RetroAchievements hashes using RAHasher."""
+    """Service to calculate RetroAchievements hashes using RAHasher.
+
+    At most `SCAN_RAHASHER_WORKERS` RAHasher processes run at the same time,
+    and processes running for longer than `timeout` seconds are killed.
+    """
+
+    def __init__(self, timeout: float = SCAN_RAHASHER_TIMEOUT) -> None:
+        self.timeout = timeout
 
-    async def calculate_hash(self, platform_id: int, file_path: str) -> str:
+    async def calculate_hash(
+        self, platform_id: int, file_path: str, stats: StageStats | None = None
+    ) -> str:
+        """Calculate the RetroAchievements hash of a file
+
+        Args:
+            platform_id: RetroAchievements ID of the platform
+            file_path: Path of the file, or glob of the files of a multi-part ROM
+            stats: Stats to record the RAHasher run in, not counting the time
+                spent waiting for another run to finish
+        """
+        async with _get_rahasher_semaphore():
+            start = time.monotonic()
+            if stats and stats.started_at is None:
+                stats.started_at = start
+            try:
+                return await self._run(platform_id, file_path)
+            finally:
+                if stats:
+                    stats.processed += 1
+                    stats.busy_seconds += time.monotonic() - start
+
+    async def _run(self, platform_id: int, file_path: str) -> str:
         from handler.metadata.ra_handler import RA_ID_TO_SLUG
 
         log.debug(
@@ -95,7 +144,20 @@ class RAHasherService:
             log.error("RAHasher executable not found in PATH")
             return ""
 
-        return_code = await proc.wait()
+        try:
+            return_code = await asyncio.wait_for(proc.wait(), timeout=self.timeout)
+        except TimeoutError:
+            proc.kill()
+            await proc.wait()
+            log.error(
+                f"RAHasher timed out after {self.timeout}s for file {file_path} (platform ID: {platform_id})"
+            )
+            return ""
+        except asyncio.CancelledError:
+            # Don't leave RAHasher running when the scan is stopped
+            proc.kill()
+            raise
+
         if return_code != 1:
             if proc.stderr is not None:
                 stderr = (await proc.stderr.read()).decode("utf-8")
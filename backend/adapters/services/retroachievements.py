@@ -1,4 +1,3 @@
-import asyncio
 import http
 import json
 from collections.abc import AsyncIterator
@@ -20,6 +19,7 @@ from config import RETROACHIEVEMENTS_API_KEY
 from logger.logger import log
 from utils import get_version
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import RATE_LIMITERS, get_retry_after
 
 
 async def auth_middleware(
@@ -53,6 +53,7 @@ class RetroAchievementsService:
             request_timeout,
         )
         try:
+            await RATE_LIMITERS["ra"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
@@ -74,8 +75,8 @@ class RetroAchievementsService:
             ) from exc
         except aiohttp.ClientResponseError as err:
             if err.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Hold back the requests of all processes as long as asked
+                await RATE_LIMITERS["ra"].penalize(get_retry_after(err.headers))
             else:
                 # Log the error and return an empty dict if the request fails with a different code
                 log.error(err)
@@ -90,6 +91,7 @@ class RetroAchievementsService:
                 url,
                 request_timeout,
             )
+            await RATE_LIMITERS["ra"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
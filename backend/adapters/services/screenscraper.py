@@ -1,4 +1,3 @@
-import asyncio
 import base64
 import http
 import json
@@ -13,7 +12,9 @@ from adapters.services.screenscraper_types import SSGame
 from config import SCREENSCRAPER_PASSWORD, SCREENSCRAPER_USER
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import RATE_LIMITERS, get_retry_after
 
 SS_DEV_ID: Final = base64.b64decode("enVyZGkxNQ==").decode()
 SS_DEV_PASSWORD: Final = base64.b64decode("eFRKd29PRmpPUUc=").decode()
@@ -49,6 +50,7 @@ class ScreenScraperService:
     ) -> None:
         self.url = yarl.URL(base_url or "https://api.screenscraper.fr/api2")
 
+    @cached_response("ss")
     async def _request(self, url: str, request_timeout: int = 120) -> dict:
         aiohttp_session = ctx_aiohttp_session.get()
         log.debug(
@@ -57,6 +59,7 @@ class ScreenScraperService:
             request_timeout,
         )
         try:
+            await RATE_LIMITERS["ss"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
@@ -85,8 +88,8 @@ class ScreenScraperService:
             ) from exc
         except aiohttp.ClientResponseError as err:
             if err.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Hold back the requests of all processes as long as asked
+                await RATE_LIMITERS["ss"].penalize(get_retry_after(err.headers))
             else:
                 # Log the error and return an empty dict if the request fails with a different code
                 log.error(err)
@@ -101,6 +104,7 @@ class ScreenScraperService:
                 url,
                 request_timeout,
             )
+            await RATE_LIMITERS["ss"].acquire()
             res = await aiohttp_session.get(
                 url,
                 headers={"user-agent": f"RomM/{get_version()}"},
@@ -23,6 +23,7 @@ from config import STEAMGRIDDB_API_KEY
 from exceptions.endpoint_exceptions import SGDBInvalidAPIKeyException
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_aiohttp_session
 
 
@@ -46,6 +47,7 @@ class SteamGridDBService:
     ) -> None:
         self.url = yarl.URL(base_url or "https://steamgriddb.com/api/v2")
 
+    @cached_response("sgdb")
     async def _request(self, url: str, request_timeout: int = 120) -> dict:
         aiohttp_session = ctx_aiohttp_session.get()
         log.debug(
@@ -4,7 +4,7 @@ from typing import Final, overload
 import yarl
 from dotenv import load_dotenv
 
-from utils.database import safe_int, safe_str_to_bool
+from utils.database import safe_float, safe_int, safe_str_to_bool
 
 load_dotenv()
 
@@ -46,6 +46,7 @@ LIBRARY_BASE_PATH: Final[str] = f"{ROMM_BASE_PATH}/library"
 RESOURCES_BASE_PATH: Final[str] = f"{ROMM_BASE_PATH}/resources"
 ASSETS_BASE_PATH: Final[str] = f"{ROMM_BASE_PATH}/assets"
 FRONTEND_RESOURCES_PATH: Final[str] = "/assets/romm/resources"
+DATS_BASE_PATH: Final[str] = f"{ROMM_BASE_PATH}/dats"
 
 # SEVEN ZIP
 SEVEN_ZIP_TIMEOUT: Final[int] = safe_int(_get_env("SEVEN_ZIP_TIMEOUT"), 60)
@@ -90,6 +91,10 @@ REDIS_URL: Final[str] = str(
 # IGDB
 IGDB_CLIENT_ID: Final[str | None] = _get_env("IGDB_CLIENT_ID")
 IGDB_CLIENT_SECRET: Final[str | None] = _get_env("IGDB_CLIENT_SECRET")
+# Send the queries of concurrent lookups together through /multiquery
+IGDB_MULTIQUERY_ENABLED: Final[bool] = safe_str_to_bool(
+    _get_env("IGDB_MULTIQUERY_ENABLED", "true")
+)
 
 # MOBYGAMES
 MOBYGAMES_API_KEY: Final[str | None] = _get_env("MOBYGAMES_API_KEY")
@@ -107,6 +112,31 @@ REFRESH_RETROACHIEVEMENTS_CACHE_DAYS: Final[int] = safe_int(
     _get_env("REFRESH_RETROACHIEVEMENTS_CACHE_DAYS"), 30
 )
 
+# METADATA CACHE
+# Responses of metadata providers are cached in Redis, except when testing
+METADATA_CACHE_ENABLED: Final[bool] = safe_str_to_bool(
+    _get_env("METADATA_CACHE_ENABLED", "false" if IS_PYTEST_RUN else "true")
+)
+
+# METADATA RATE LIMITS
+# Requests to metadata providers are rate limited in Redis, except when testing
+METADATA_RATE_LIMIT_ENABLED: Final[bool] = safe_str_to_bool(
+    _get_env("METADATA_RATE_LIMIT_ENABLED", "false" if IS_PYTEST_RUN else "true")
+)
+# Requests per second, shared by all processes, or 0 for no limit
+IGDB_REQUESTS_PER_SECOND: Final[float] = safe_float(
+    _get_env("IGDB_REQUESTS_PER_SECOND"), 4
+)
+MOBYGAMES_REQUESTS_PER_SECOND: Final[float] = safe_float(
+    _get_env("MOBYGAMES_REQUESTS_PER_SECOND"), 1
+)
+SCREENSCRAPER_REQUESTS_PER_SECOND: Final[float] = safe_float(
+    _get_env("SCREENSCRAPER_REQUESTS_PER_SECOND"), 2
+)
+RETROACHIEVEMENTS_REQUESTS_PER_SECOND: Final[float] = safe_float(
+    _get_env("RETROACHIEVEMENTS_REQUESTS_PER_SECOND"), 5
+)
+
 # LAUNCHBOX
 LAUNCHBOX_API_ENABLED: Final[bool] = safe_str_to_bool(_get_env("LAUNCHBOX_API_ENABLED"))
 
@@ -174,6 +204,29 @@ OIDC_USERNAME_ATTRIBUTE: Final[str] = _get_env(
 # SCANS
 SCAN_TIMEOUT: Final[int] = safe_int(_get_env("SCAN_TIMEOUT"), 60 * 60 * 4)  # 4 hours
 SCAN_WORKERS: Final[int] = max(1, safe_int(_get_env("SCAN_WORKERS"), 1))
+SCAN_HASH_WORKERS: Final[int] = max(
+    1, safe_int(_get_env("SCAN_HASH_WORKERS"), os.cpu_count() or 1)
+)
+SCAN_ARTWORK_WORKERS: Final[int] = max(
+    1, safe_int(_get_env("SCAN_ARTWORK_WORKERS"), SCAN_WORKERS)
+)
+SCAN_HASH_CHUNK_SIZE: Final[int] = max(
+    1024 * 64, safe_int(_get_env("SCAN_HASH_CHUNK_SIZE"), 1024 * 1024)
+)
+SCAN_ZIP_CRC_ONLY: Final[bool] = safe_str_to_bool(_get_env("SCAN_ZIP_CRC_ONLY"))
+SCAN_DB_BATCH_SIZE: Final[int] = max(1, safe_int(_get_env("SCAN_DB_BATCH_SIZE"), 50))
+SCAN_DB_BATCH_INTERVAL_MS: Final[int] = max(
+    0, safe_int(_get_env("SCAN_DB_BATCH_INTERVAL_MS"), 500)
+)
+SCAN_PROGRESS_INTERVAL_MS: Final[int] = max(
+    0, safe_int(_get_env("SCAN_PROGRESS_INTERVAL_MS"), 250)
+)
+SCAN_RAHASHER_WORKERS: Final[int] = max(
+    1, safe_int(_get_env("SCAN_RAHASHER_WORKERS"), (os.cpu_count() or 2) // 2)
+)
+SCAN_RAHASHER_TIMEOUT: Final[int] = max(
+    1, safe_int(_get_env("SCAN_RAHASHER_TIMEOUT"), 60 * 10)
+)  # 10 minutes
 
 # TASKS
 TASK_TIMEOUT: Final[int] = safe_int(_get_env("TASK_TIMEOUT"), 60 * 5)  # 5 minutes
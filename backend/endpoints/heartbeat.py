@@ -45,6 +45,7 @@ from handler.metadata import (
 from handler.scan_handler import MetadataSource
 from logger.logger import log
 from utils import get_version
+from utils.cache import skip_response_cache
 from utils.platforms import get_supported_platforms
 from utils.router import APIRouter
 
@@ -139,31 +140,33 @@ async def metadata_heartbeat(source: str) -> bool:
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Invalid metadata source") from e
 
-    match metadata_source:
-        case MetadataSource.IGDB:
-            return await meta_igdb_handler.heartbeat()
-        case MetadataSource.MOBY:
-            return await meta_moby_handler.heartbeat()
-        case MetadataSource.SS:
-            return await meta_ss_handler.heartbeat()
-        case MetadataSource.RA:
-            return await meta_ra_handler.heartbeat()
-        case MetadataSource.LAUNCHBOX:
-            return await meta_launchbox_handler.heartbeat()
-        case MetadataSource.HASHEOUS:
-            return await meta_hasheous_handler.heartbeat()
-        case MetadataSource.TGDB:
-            return await meta_tgdb_handler.heartbeat()
-        case MetadataSource.SGDB:
-            return await meta_sgdb_handler.heartbeat()
-        case MetadataSource.FLASHPOINT:
-            return await meta_flashpoint_handler.heartbeat()
-        case MetadataSource.HLTB:
-            return await meta_hltb_handler.heartbeat()
-        case MetadataSource.GAMELIST:
-            return await meta_gamelist_handler.heartbeat()
-        case _:
-            return False
+    # Health checks always reach the provider, instead of the response cache
+    with skip_response_cache():
+        match metadata_source:
+            case MetadataSource.IGDB:
+                return await meta_igdb_handler.heartbeat()
+            case MetadataSource.MOBY:
+                return await meta_moby_handler.heartbeat()
+            case MetadataSource.SS:
+                return await meta_ss_handler.heartbeat()
+            case MetadataSource.RA:
+                return await meta_ra_handler.heartbeat()
+            case MetadataSource.LAUNCHBOX:
+                return await meta_launchbox_handler.heartbeat()
+            case MetadataSource.HASHEOUS:
+                return await meta_hasheous_handler.heartbeat()
+            case MetadataSource.TGDB:
+                return await meta_tgdb_handler.heartbeat()
+            case MetadataSource.SGDB:
+                return await meta_sgdb_handler.heartbeat()
+            case MetadataSource.FLASHPOINT:
+                return await meta_flashpoint_handler.heartbeat()
+            case MetadataSource.HLTB:
+                return await meta_hltb_handler.heartbeat()
+            case MetadataSource.GAMELIST:
+                return await meta_gamelist_handler.heartbeat()
+            case _:
+                return False
 
 
 @protected_route(
@@ -10,7 +10,7 @@ from exceptions.endpoint_exceptions import PlatformNotFoundInDatabaseException
 from exceptions.fs_exceptions import PlatformAlreadyExistsException
 from handler.auth.constants import Scope
 from handler.database import db_platform_handler
-from handler.filesystem import fs_platform_handler
+from handler.filesystem import fs_platform_handler, fs_rom_handler
 from handler.scan_handler import scan_platform
 from logger.formatter import BLUE
 from logger.formatter import highlight as hl
@@ -130,3 +130,4 @@ async def delete_platform(
         f"Deleting {hl(platform.name, color=BLUE)} [{hl(platform.fs_slug)}] from database"
     )
     db_platform_handler.delete_platform(id)
+    await fs_rom_handler.clear_roms_manifest(platform.fs_slug)
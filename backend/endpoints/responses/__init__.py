@@ -5,6 +5,12 @@ from rq_scheduler.scheduler import JobStatus
 from tasks.tasks import TaskType
 
 
+class ScanStageStats(TypedDict):
+    processed: int
+    busy_seconds: float
+    items_per_second: float
+
+
 class ScanStats(TypedDict):
     total_platforms: int
     total_roms: int
@@ -16,6 +22,7 @@ class ScanStats(TypedDict):
     identified_roms: int
     scanned_firmware: int
     new_firmware: int
+    stages: dict[str, ScanStageStats]
 
 
 class ScanTaskMeta(TypedDict):
@@ -28,3 +28,7 @@ class SearchRomSchema(BaseModel):
 class SearchCoverSchema(BaseModel):
     name: str
     resources: list[SGDBResource]
+
+
+class PurgeMetadataCacheResponse(BaseModel):
+    purged: int
@@ -1408,6 +1408,8 @@ async def delete_roms(
                 f"Deleting {hl(str(rom.name or 'ROM'), color=BLUE)} [{hl(rom.fs_name)}] from database"
             )
             db_rom_handler.delete_rom(id)
+            # Let the next quick scan add it back if it's still in the filesystem
+            await fs_rom_handler.clear_roms_manifest(rom.platform_fs_slug)
 
             try:
                 await fs_resource_handler.remove_directory(rom.fs_resources_path)
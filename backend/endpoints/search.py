@@ -3,7 +3,11 @@ import asyncio
 from fastapi import HTTPException, Request, status
 
 from decorators.auth import protected_route
-from endpoints.responses.search import SearchCoverSchema, SearchRomSchema
+from endpoints.responses.search import (
+    PurgeMetadataCacheResponse,
+    SearchCoverSchema,
+    SearchRomSchema,
+)
 from exceptions.endpoint_exceptions import SGDBInvalidAPIKeyException
 from handler.auth.constants import Scope
 from handler.database import db_rom_handler
@@ -30,6 +34,7 @@ from logger.formatter import BLUE, CYAN
 from logger.formatter import highlight as hl
 from logger.logger import log
 from utils import emoji
+from utils.cache import METADATA_CACHE_TTLS, purge_response_cache
 from utils.router import APIRouter
 
 router = APIRouter(
@@ -237,3 +242,22 @@ async def search_cover(
         ) from err
 
     return [SearchCoverSchema.model_validate(cover) for cover in covers]
+
+
+@protected_route(router.delete, "/cache", [Scope.TASKS_RUN])
+async def purge_metadata_cache(
+    request: Request,
+    provider: str | None = None,
+) -> PurgeMetadataCacheResponse:
+    """Purge the cached responses of a metadata provider, or of all of them"""
+
+    if provider is not None and provider not in METADATA_CACHE_TTLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid metadata provider: {provider}",
+        )
+
+    purged = await purge_response_cache(provider)
+    log.info(f"Purged {purged} cached responses of {provider or 'all providers'}")
+
+    return PurgeMetadataCacheResponse(purged=purged)
@@ -1,16 +1,34 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import json
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Collection, Iterable, Iterator
+from dataclasses import dataclass, field
 from itertools import batched
-from typing import Any, Final
+from typing import Any, Final, TypeVar
 
 import pydash
 import socketio  # type: ignore
-from rq import Worker
-from rq.job import Job
-
-from config import DEV_MODE, REDIS_URL, SCAN_TIMEOUT, SCAN_WORKERS, TASK_RESULT_TTL
+from redis.exceptions import RedisError
+from rq import Worker, get_current_job
+from rq.job import Job, JobStatus
+from rq.worker import WorkerStatus
+
+from config import (
+    DEV_MODE,
+    REDIS_URL,
+    RESCAN_ON_FILESYSTEM_CHANGE_DELAY,
+    SCAN_ARTWORK_WORKERS,
+    SCAN_HASH_WORKERS,
+    SCAN_PROGRESS_INTERVAL_MS,
+    SCAN_TIMEOUT,
+    SCAN_WORKERS,
+    SCAN_ZIP_CRC_ONLY,
+    TASK_RESULT_TTL,
+)
 from config.config_manager import config_manager as cm
 from endpoints.responses import TaskType
 from endpoints.responses.platform import PlatformSchema
@@ -23,6 +41,7 @@ from exceptions.fs_exceptions import (
 )
 from exceptions.socket_exceptions import ScanStoppedException
 from handler.database import db_firmware_handler, db_platform_handler, db_rom_handler
+from handler.database.batch_writer import RomsBatchWriter
 from handler.filesystem import (
     fs_firmware_handler,
     fs_platform_handler,
@@ -32,7 +51,14 @@ from handler.filesystem import (
 from handler.filesystem.roms_handler import FSRom
 from handler.metadata import meta_gamelist_handler
 from handler.metadata.ss_handler import get_preferred_media_types
-from handler.redis_handler import get_job_func_name, high_prio_queue, redis_client
+from handler.redis_handler import (
+    async_cache,
+    get_job_func_name,
+    high_prio_queue,
+    low_prio_queue,
+    redis_client,
+    sync_cache,
+)
 from handler.scan_handler import (
     MetadataSource,
     ScanType,
@@ -50,8 +76,50 @@ from models.rom import Rom, RomFile
 from tasks.tasks import update_job_meta
 from utils import emoji
 from utils.context import initialize_context
+from utils.pipeline import PipelineStage, StageStats, run_pipeline
 
 STOP_SCAN_FLAG: Final = "scan:stop"
+# How often (in seconds) running scans check if the stop flag was set
+STOP_SCAN_REFRESH_INTERVAL: Final = 0.5
+SCAN_SHARDS_KEY_PREFIX: Final = "romm:scan_shards"
+
+# ROMs changed in the filesystem, as "<fs_slug>/<fs_name>", queued by the watcher
+CHANGED_ROMS_KEY: Final = "romm:watcher:changed_roms"
+# Set while a scan of the changed ROMs is scheduled, so bursts of changes share it
+CHANGED_ROMS_SCAN_KEY: Final = "romm:watcher:changed_roms_scan"
+
+# Progress of each scan started by a user, to resume it if it's interrupted
+SCAN_CHECKPOINT_KEY_PREFIX: Final = "romm:scan_checkpoint"
+# ID of the checkpoint of the latest scan started by a user, the one resumed
+SCAN_CHECKPOINT_LATEST_KEY: Final = "romm:scan_checkpoint:latest"
+SCAN_CHECKPOINT_TTL: Final = 60 * 60 * 24 * 7  # 7 days
+# Minimum time (in seconds) between checkpoints of the ROMs scanned in a platform
+SCAN_CHECKPOINT_INTERVAL: Final = 5.0
+
+# How often (in seconds) a sharded scan checks if its shards are done
+SHARD_POLL_INTERVAL: Final = 2.0
+
+# Statuses of shard jobs that are no longer running or waiting to run
+SHARD_DONE_STATUSES: Final = {
+    None,
+    JobStatus.FINISHED,
+    JobStatus.FAILED,
+    JobStatus.STOPPED,
+    JobStatus.CANCELED,
+}
+
+SCAN_STATS_COUNTERS: Final = (
+    "total_platforms",
+    "total_roms",
+    "scanned_platforms",
+    "new_platforms",
+    "identified_platforms",
+    "scanned_roms",
+    "new_roms",
+    "identified_roms",
+    "scanned_firmware",
+    "new_firmware",
+)
 
 
 @dataclass
@@ -66,19 +134,43 @@ class ScanStats:
     identified_roms: int = 0
     scanned_firmware: int = 0
     new_firmware: int = 0
+    # Throughput of each stage of the ROM scan pipeline
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    # Redis hash with the counters of a scan sharded across workers
+    shared_key: str | None = None
 
     def __post_init__(self):
         # Lock for thread-safe updates
         self._lock = asyncio.Lock()
+        # Changes not published yet, sent at most every `SCAN_PROGRESS_INTERVAL_MS`
+        self._pending_increments: dict[str, int] = {}
+        self._pending_roms: dict[int, dict[str, Any]] = {}
+        self._has_pending_changes = False
+        self._published_at = 0.0
 
     async def update(self, socket_manager: socketio.AsyncRedisManager, **kwargs):
         async with self._lock:
+            shared_key = self.shared_key
+            if shared_key:
+                # Pending increments are pushed first, so they aren't overwritten
+                await self._increment_shared(shared_key, self._pending_increments)
+                self._pending_increments = {}
+
             for key, value in kwargs.items():
                 if hasattr(self, key):
                     setattr(self, key, value)
+                    self._pending_increments.pop(key, None)
 
-            update_job_meta({"scan_stats": self.to_dict()})
-            await socket_manager.emit("scan:update_stats", self.to_dict())
+            if shared_key:
+                updated_counters: dict[str | bytes, int] = {
+                    key: value
+                    for key, value in kwargs.items()
+                    if key in SCAN_STATS_COUNTERS
+                }
+                if updated_counters:
+                    await async_cache.hset(shared_key, mapping=updated_counters)
+
+            await self._publish(socket_manager)
 
     async def increment(self, socket_manager: socketio.AsyncRedisManager, **kwargs):
         async with self._lock:
@@ -86,9 +178,76 @@ class ScanStats:
                 if hasattr(self, key):
                     current_value = getattr(self, key)
                     setattr(self, key, current_value + value)
+                    self._pending_increments[key] = (
+                        self._pending_increments.get(key, 0) + value
+                    )
+
+            self._has_pending_changes = True
+            await self._publish_throttled(socket_manager)
 
-            update_job_meta({"scan_stats": self.to_dict()})
-            await socket_manager.emit("scan:update_stats", self.to_dict())
+    async def add_scanned_rom(
+        self, socket_manager: socketio.AsyncRedisManager, rom: dict[str, Any]
+    ):
+        """Queue a scanned ROM to be sent to the clients with the next stats"""
+        async with self._lock:
+            # Only the latest state of each ROM is sent
+            self._pending_roms[rom["id"]] = rom
+            self._has_pending_changes = True
+            await self._publish_throttled(socket_manager)
+
+    async def flush(self, socket_manager: socketio.AsyncRedisManager):
+        """Publish the changes held back by the throttling, if any"""
+        async with self._lock:
+            if self._has_pending_changes:
+                await self._publish(socket_manager)
+
+    async def refresh(self, socket_manager: socketio.AsyncRedisManager):
+        """Publish the latest counters of all the shards of the scan"""
+        async with self._lock:
+            await self._publish(socket_manager)
+
+    async def _publish_throttled(self, socket_manager: socketio.AsyncRedisManager):
+        elapsed_ms = (time.monotonic() - self._published_at) * 1000
+        if elapsed_ms >= SCAN_PROGRESS_INTERVAL_MS:
+            await self._publish(socket_manager)
+
+    async def _publish(self, socket_manager: socketio.AsyncRedisManager):
+        if self.shared_key:
+            await self._increment_shared(self.shared_key, self._pending_increments)
+
+        scanned_roms = list(self._pending_roms.values())
+        self._pending_increments = {}
+        self._pending_roms = {}
+        self._has_pending_changes = False
+        self._published_at = time.monotonic()
+
+        update_job_meta({"scan_stats": self.to_dict()})
+        if scanned_roms:
+            await socket_manager.emit("scan:scanning_roms", scanned_roms)
+        await socket_manager.emit("scan:update_stats", self.to_dict())
+
+    async def share(self, shared_key: str) -> None:
+        """Share the counters with other workers scanning the same library"""
+        self.shared_key = shared_key
+        async with async_cache.pipeline(transaction=False) as pipe:
+            await pipe.hset(
+                shared_key,
+                mapping={key: getattr(self, key) for key in SCAN_STATS_COUNTERS},
+            )
+            await pipe.expire(shared_key, SCAN_TIMEOUT)
+            await pipe.execute()
+
+    async def _increment_shared(
+        self, shared_key: str, increments: dict[str, int]
+    ) -> None:
+        # Incrementing every counter returns the totals of all the shards
+        async with async_cache.pipeline(transaction=False) as pipe:
+            for key in SCAN_STATS_COUNTERS:
+                await pipe.hincrby(shared_key, key, increments.get(key, 0))
+            totals = await pipe.execute()
+
+        for key, total in zip(SCAN_STATS_COUNTERS, totals, strict=True):
+            setattr(self, key, int(total))
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -102,8 +261,201 @@ class ScanStats:
             "identified_roms": self.identified_roms,
             "scanned_firmware": self.scanned_firmware,
             "new_firmware": self.new_firmware,
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+    def get_stage_stats(self, name: str) -> StageStats:
+        """Get the stats of a pipeline stage, shared by the scans of all platforms"""
+        return self.stages.setdefault(name, StageStats())
+
+
+class ScanCheckpoint:
+    """Progress of a scan, saved to Redis so an interrupted scan can be resumed
+
+    The checkpoint holds the options of the scan, its counters, the platforms
+    that were fully scanned, and for the others the last ROM (in fs_name order)
+    up to which all ROMs were scanned, along with the ROMs before it that failed
+    and are retried on resume. Only scans started by users have one, under
+    their own ID, which the workers of a sharded scan share.
+    """
+
+    def __init__(self, checkpoint_id: str) -> None:
+        self.checkpoint_id = checkpoint_id
+        self._key = f"{SCAN_CHECKPOINT_KEY_PREFIX}:{checkpoint_id}"
+        self._fields: dict[str, str] = {}
+        self._saved_at: dict[str, float] = {}
+
+    @staticmethod
+    def get_latest() -> tuple[str, dict[str, Any]] | None:
+        """Get the ID and options of the latest scan with a checkpoint, if any"""
+        checkpoint_id = sync_cache.get(SCAN_CHECKPOINT_LATEST_KEY)
+        if not checkpoint_id:
+            return None
+
+        checkpoint_id = os.fsdecode(checkpoint_id)
+        options = sync_cache.hget(
+            f"{SCAN_CHECKPOINT_KEY_PREFIX}:{checkpoint_id}", "options"
+        )
+        return (checkpoint_id, json.loads(options)) if options else None
+
+    def start(self, options: dict[str, Any], scan_stats: ScanStats) -> None:
+        """Start checkpointing a new scan, which becomes the one to resume"""
+        with sync_cache.pipeline() as pipe:
+            pipe.delete(self._key)
+            pipe.hset(
+                self._key,
+                mapping={
+                    "options": json.dumps(options),
+                    "stats": json.dumps(self._get_counters(scan_stats)),
+                },
+            )
+            pipe.expire(self._key, SCAN_CHECKPOINT_TTL)
+            pipe.set(
+                SCAN_CHECKPOINT_LATEST_KEY, self.checkpoint_id, ex=SCAN_CHECKPOINT_TTL
+            )
+            pipe.execute()
+
+    def load(self) -> None:
+        """Load the progress of the scan to resume"""
+        self._fields = {
+            os.fsdecode(key): os.fsdecode(value)
+            for key, value in sync_cache.hgetall(self._key).items()
         }
 
+    def restore_stats(self, scan_stats: ScanStats) -> None:
+        for key, value in json.loads(self._fields.get("stats", "{}")).items():
+            setattr(scan_stats, key, value)
+
+    def is_platform_done(self, fs_slug: str) -> bool:
+        return f"done:{fs_slug}" in self._fields
+
+    def get_last_rom(self, fs_slug: str) -> str | None:
+        """Get the ROM up to which the ROMs of the platform were scanned, if any"""
+        return self._fields.get(f"last_rom:{fs_slug}")
+
+    def get_failed_roms(self, fs_slug: str) -> set[str]:
+        """Get the ROMs of the platform that failed before the last checkpointed one"""
+        return set(json.loads(self._fields.get(f"failed:{fs_slug}", "[]")))
+
+    def save_rom_progress(
+        self,
+        fs_slug: str,
+        fs_name: str,
+        failed_fs_names: Collection[str],
+        scan_stats: ScanStats,
+        force: bool = False,
+    ) -> None:
+        """Save that all the ROMs of the platform up to `fs_name` were scanned
+
+        The ROMs in `failed_fs_names` weren't, and are scanned again on resume.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and now - self._saved_at.get(fs_slug, 0) < SCAN_CHECKPOINT_INTERVAL
+        ):
+            return
+
+        self._saved_at[fs_slug] = now
+        self._save(
+            {
+                f"last_rom:{fs_slug}": fs_name,
+                f"failed:{fs_slug}": json.dumps(sorted(failed_fs_names)),
+            },
+            scan_stats,
+        )
+
+    def save_platform_done(self, fs_slug: str, scan_stats: ScanStats) -> None:
+        self._save({f"done:{fs_slug}": "1"}, scan_stats)
+
+    def clear(self) -> None:
+        sync_cache.delete(self._key)
+
+    def _save(self, fields: dict[str | bytes, str], scan_stats: ScanStats) -> None:
+        with sync_cache.pipeline() as pipe:
+            pipe.hset(
+                self._key,
+                mapping={
+                    **fields,
+                    "stats": json.dumps(self._get_counters(scan_stats)),
+                },
+            )
+            pipe.expire(self._key, SCAN_CHECKPOINT_TTL)
+            pipe.execute()
+
+    @staticmethod
+    def _get_counters(scan_stats: ScanStats) -> dict[str, int]:
+        return {key: getattr(scan_stats, key) for key in SCAN_STATS_COUNTERS}
+
+
+T = TypeVar("T")
+
+
+class ScanStopToken:
+    """Whether the scan was asked to stop, refreshed from Redis in the background
+
+    Checking the token doesn't hit Redis, so it can be done for every ROM,
+    and `run` cancels work in progress (hashing, HTTP requests) on a stop.
+    """
+
+    def __init__(self, refresh_interval: float = STOP_SCAN_REFRESH_INTERVAL) -> None:
+        self.refresh_interval = refresh_interval
+        self._stopped = asyncio.Event()
+        self._watch_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start refreshing the token from the stop flag"""
+        self._watch_task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._watch_task:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+
+    def is_stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def raise_if_stopped(self) -> None:
+        if self._stopped.is_set():
+            raise ScanStoppedException()
+
+    async def run(self, work: Awaitable[T]) -> T:
+        """Run the work, cancelling it as soon as the scan is stopped
+
+        Raises:
+            ScanStoppedException: If the scan was stopped before the work finished
+        """
+        self.raise_if_stopped()
+        work_task = asyncio.ensure_future(work)
+        stop_task = asyncio.create_task(self._stopped.wait())
+        try:
+            await asyncio.wait(
+                {work_task, stop_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            work_task.cancel()
+            raise
+        finally:
+            stop_task.cancel()
+
+        if not work_task.done():
+            work_task.cancel()
+            await asyncio.gather(work_task, return_exceptions=True)
+            raise ScanStoppedException()
+
+        return work_task.result()
+
+    async def _watch(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if await async_cache.exists(STOP_SCAN_FLAG):
+                    self._stopped.set()
+                    return
+            except RedisError as e:
+                log.warning(f"Failed to check the scan stop flag: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
 
 def _get_socket_manager() -> socketio.AsyncRedisManager:
     """Connect to external socketio server"""
@@ -113,9 +465,10 @@ def _get_socket_manager() -> socketio.AsyncRedisManager:
 async def _identify_firmware(
     platform: Platform,
     fs_fw: str,
+    stop_token: ScanStopToken,
 ) -> int:
-    # Break early if the flag is set
-    if redis_client.get(STOP_SCAN_FLAG):
+    # Break early if the scan was stopped
+    if stop_token.is_stopped():
         return 0
 
     firmware = db_firmware_handler.get_firmware_by_filename(platform.id, fs_fw)
@@ -219,26 +572,45 @@ def _should_get_rom_files(
     )
 
 
+@dataclass
+class RomScan:
+    """State of a ROM as it moves through the stages of the scan pipeline"""
+
+    fs_rom: FSRom
+    rom: Rom | None
+    newly_added: bool = False
+    should_update_files: bool = False
+    # Whether only the CRC of some of the ROM files was read, so they still
+    # need to be fully hashed
+    crc_only: bool = False
+    scanned_rom: Rom | None = None
+
+
 # There's an order of operations here that is important:
 # 1. Read the list of roms from the filesystem
 # 2. Check if ROM should be scanned based on the scan type
 # 3. Create a new ROM entry if it doesn't exist
 # 4. Build the ROM files and calculate the hashes
-# 4. Scan the ROM and update its metadata
-async def _identify_rom(
+# 5. Scan the ROM and update its metadata
+# 6. Store the ROM artwork
+#
+# Steps 2 to 4, 5 and 6 are separate pipeline stages, so the hashing of a ROM
+# overlaps the metadata lookups and artwork downloads of the previous ones.
+async def _hash_rom(
     platform: Platform,
-    fs_rom: FSRom,
-    rom: Rom | None,
+    rom_scan: RomScan,
     scan_type: ScanType,
     roms_ids: list[int],
     metadata_sources: list[str],
-    socket_manager: socketio.AsyncRedisManager,
-    scan_stats: ScanStats,
-    calculate_hashes: bool = True,
-) -> None:
-    # Break early if the flag is set
-    if redis_client.get(STOP_SCAN_FLAG):
-        return
+    roms_writer: RomsBatchWriter,
+    stop_token: ScanStopToken,
+    ra_hasher_stats: StageStats | None = None,
+) -> RomScan | None:
+    fs_rom = rom_scan.fs_rom
+    rom = rom_scan.rom
+
+    # Stop the pipeline if the scan was stopped, leaving this ROM unscanned
+    stop_token.raise_if_stopped()
 
     if not _should_scan_rom(
         scan_type=scan_type,
@@ -248,20 +620,20 @@ async def _identify_rom(
     ):
         if rom:
             # Just to update the filesystem data
-            db_rom_handler.update_rom(
+            roms_writer.update_rom(
                 rom.id, {"fs_name": fs_rom["fs_name"], "missing_from_fs": False}
             )
 
-        return
+        return None
 
     # Update properties that don't require metadata
     parsed_tags = fs_rom_handler.parse_tags(fs_rom["fs_name"])
     roms_path = fs_rom_handler.get_roms_fs_structure(platform.fs_slug)
 
-    # Create the entry early so we have the ID
-    newly_added: bool = rom is None
+    # Create the entry early so we have the ID, which is why it isn't batched
+    rom_scan.newly_added = rom is None
     if not rom:
-        rom = db_rom_handler.add_rom(
+        rom = rom_scan.rom = db_rom_handler.add_rom(
             Rom(
                 fs_name=fs_rom["fs_name"],
                 fs_path=roms_path,
@@ -286,21 +658,27 @@ async def _identify_rom(
         )
 
     # Build rom files object before scanning
-    should_update_files = _should_get_rom_files(
+    rom_scan.should_update_files = _should_get_rom_files(
         scan_type=scan_type,
         rom=rom,
-        newly_added=newly_added,
+        newly_added=rom_scan.newly_added,
         roms_ids=roms_ids,
     )
-    if should_update_files:
+    if rom_scan.should_update_files:
         # Get hash calculation setting from config
         calculate_hashes = not cm.get_config().SKIP_HASH_CALCULATION
         if calculate_hashes:
             log.debug(f"Calculating file hashes for {rom.fs_name}...")
 
         parsed_rom_files = await fs_rom_handler.get_rom_files(
-            rom, calculate_hashes=calculate_hashes
+            rom,
+            calculate_hashes=calculate_hashes,
+            should_stop=stop_token.is_stopped,
+            ra_hasher_stats=ra_hasher_stats,
+            # Hashes scans fill in the MD5 and SHA1 skipped by CRC-only scans
+            crc_only=SCAN_ZIP_CRC_ONLY and scan_type != ScanType.HASHES,
         )
+        rom_scan.crc_only = parsed_rom_files.crc_only
         fs_rom.update(
             {
                 "files": parsed_rom_files.rom_files,
@@ -311,6 +689,22 @@ async def _identify_rom(
             }
         )
 
+    return rom_scan
+
+
+async def _fetch_rom_metadata(
+    platform: Platform,
+    rom_scan: RomScan,
+    scan_type: ScanType,
+    metadata_sources: list[str],
+    socket_manager: socketio.AsyncRedisManager,
+    scan_stats: ScanStats,
+    roms_writer: RomsBatchWriter,
+) -> RomScan | None:
+    fs_rom = rom_scan.fs_rom
+    rom = rom_scan.rom
+    assert rom is not None  # Created by the hashing stage
+
     log.debug(f"Scanning {rom.fs_name}...")
     scanned_rom = await scan_rom(
         scan_type=scan_type,
@@ -318,32 +712,29 @@ async def _identify_rom(
         rom=rom,
         fs_rom=fs_rom,
         metadata_sources=metadata_sources,
-        newly_added=newly_added,
+        newly_added=rom_scan.newly_added,
         socket_manager=socket_manager,
     )
 
     await scan_stats.increment(
         socket_manager=socket_manager,
         scanned_roms=1,
-        new_roms=1 if newly_added else 0,
+        new_roms=1 if rom_scan.newly_added else 0,
         identified_roms=1 if scanned_rom.is_identified else 0,
     )
 
-    _added_rom = db_rom_handler.add_rom(scanned_rom)
+    _added_rom = rom_scan.scanned_rom = db_rom_handler.add_rom(scanned_rom)
 
     if _added_rom.is_identified:
-        await socket_manager.emit(
-            "scan:scanning_rom",
+        await scan_stats.add_scanned_rom(
+            socket_manager,
             SimpleRomSchema.from_orm_with_factory(_added_rom).model_dump(
                 exclude={"created_at", "updated_at", "rom_user"}
             ),
         )
 
-    if should_update_files:
-        # Delete the existing rom files in the DB
-        db_rom_handler.purge_rom_files(_added_rom.id)
-
-        # Create each file entry for the rom
+    if rom_scan.should_update_files:
+        # Replace the existing rom files in the DB with the new ones
         new_rom_files = [
             RomFile(
                 rom_id=_added_rom.id,
@@ -359,12 +750,24 @@ async def _identify_rom(
             )
             for file in fs_rom["files"]
         ]
-        for new_rom_file in new_rom_files:
-            db_rom_handler.add_rom_file(new_rom_file)
+        roms_writer.replace_rom_files(_added_rom.id, new_rom_files)
 
     # Short circuit if the scan type is hashes
     if scan_type == ScanType.HASHES:
-        return
+        return None
+
+    return rom_scan
+
+
+async def _store_rom_artwork(
+    rom_scan: RomScan,
+    socket_manager: socketio.AsyncRedisManager,
+    scan_stats: ScanStats,
+    roms_writer: RomsBatchWriter,
+) -> None:
+    rom = rom_scan.rom
+    _added_rom = rom_scan.scanned_rom
+    assert rom is not None and _added_rom is not None  # Set by the previous stages
 
     path_cover_s, path_cover_l = await fs_resource_handler.get_cover(
         entity=_added_rom,
@@ -393,7 +796,7 @@ async def _identify_rom(
     _added_rom.path_manual = path_manual
 
     # Update the scanned rom with the cover and screenshots paths and update database
-    db_rom_handler.update_rom(
+    roms_writer.update_rom(
         _added_rom.id,
         {
             "path_cover_s": path_cover_s,
@@ -437,14 +840,171 @@ async def _identify_rom(
             if badge_url and badge_path:
                 await fs_resource_handler.store_ra_badge(badge_url, badge_path)
 
-    await socket_manager.emit(
-        "scan:scanning_rom",
+    await scan_stats.add_scanned_rom(
+        socket_manager,
         SimpleRomSchema.from_orm_with_factory(_added_rom).model_dump(
             exclude={"created_at", "updated_at", "rom_user"}
         ),
     )
 
 
+async def _scan_roms(
+    platform: Platform,
+    fs_roms: list[FSRom],
+    scan_type: ScanType,
+    roms_ids: list[int],
+    metadata_sources: list[str],
+    socket_manager: socketio.AsyncRedisManager,
+    scan_stats: ScanStats,
+    stop_token: ScanStopToken,
+    crc_only_platform_ids: set[int] | None = None,
+    checkpoint: ScanCheckpoint | None = None,
+) -> set[str]:
+    """Run the roms of a platform through the scan pipeline
+
+    Returns:
+        set[str]: Names of the roms that failed to scan
+    """
+    # ROMs to retry on the next scan
+    unscanned_fs_names: set[str] = set()
+
+    # ROMs finish out of order, so the checkpoint is the last ROM all the
+    # previous ones finished before
+    fs_rom_indexes = {fs_rom["fs_name"]: index for index, fs_rom in enumerate(fs_roms)}
+    done_indexes: set[int] = set()
+    next_index = 0
+
+    # ROMs before the checkpoint that failed, and must be retried on resume
+    resumed_fs_name = checkpoint.get_last_rom(platform.fs_slug) if checkpoint else None
+    failed_fs_names = (
+        checkpoint.get_failed_roms(platform.fs_slug) if checkpoint else set()
+    )
+
+    def save_checkpoint(force: bool = False) -> None:
+        if checkpoint and next_index > 0:
+            last_fs_name = fs_roms[next_index - 1]["fs_name"]
+            # The retried ROMs of a resumed scan come before its checkpoint
+            if resumed_fs_name is not None:
+                last_fs_name = max(last_fs_name, resumed_fs_name)
+
+            checkpoint.save_rom_progress(
+                platform.fs_slug,
+                last_fs_name,
+                failed_fs_names,
+                scan_stats,
+                force=force,
+            )
+
+    def on_rom_done(rom_scan: RomScan) -> None:
+        nonlocal next_index
+        fs_name = rom_scan.fs_rom["fs_name"]
+        if fs_name not in unscanned_fs_names:
+            failed_fs_names.discard(fs_name)
+
+        done_indexes.add(fs_rom_indexes[fs_name])
+        while next_index in done_indexes:
+            done_indexes.remove(next_index)
+            next_index += 1
+        save_checkpoint()
+
+    # File lists and path updates are written in batches, not once per ROM
+    roms_writer = RomsBatchWriter(db_rom_handler)
+
+    async def discover_roms() -> AsyncIterator[RomScan]:
+        for fs_roms_batch in batched(fs_roms, 200, strict=False):
+            roms_by_fs_name = db_rom_handler.get_roms_by_fs_name(
+                platform_id=platform.id,
+                fs_names={fs_rom["fs_name"] for fs_rom in fs_roms_batch},
+            )
+            for fs_rom in fs_roms_batch:
+                yield RomScan(fs_rom=fs_rom, rom=roms_by_fs_name.get(fs_rom["fs_name"]))
+
+    async def hash_rom(rom_scan: RomScan) -> RomScan | None:
+        hashed_rom_scan = await _hash_rom(
+            platform=platform,
+            rom_scan=rom_scan,
+            scan_type=scan_type,
+            roms_ids=roms_ids,
+            metadata_sources=metadata_sources,
+            roms_writer=roms_writer,
+            stop_token=stop_token,
+            ra_hasher_stats=scan_stats.get_stage_stats(f"rahasher:{platform.slug}"),
+        )
+        if (
+            hashed_rom_scan
+            and hashed_rom_scan.crc_only
+            and crc_only_platform_ids is not None
+        ):
+            crc_only_platform_ids.add(platform.id)
+
+        return hashed_rom_scan
+
+    async def fetch_rom_metadata(rom_scan: RomScan) -> RomScan | None:
+        return await _fetch_rom_metadata(
+            platform=platform,
+            rom_scan=rom_scan,
+            scan_type=scan_type,
+            metadata_sources=metadata_sources,
+            socket_manager=socket_manager,
+            scan_stats=scan_stats,
+            roms_writer=roms_writer,
+        )
+
+    async def store_rom_artwork(rom_scan: RomScan) -> None:
+        await _store_rom_artwork(
+            rom_scan=rom_scan,
+            socket_manager=socket_manager,
+            scan_stats=scan_stats,
+            roms_writer=roms_writer,
+        )
+
+    def log_rom_error(rom_scan: RomScan, error: Exception) -> None:
+        unscanned_fs_names.add(rom_scan.fs_rom["fs_name"])
+        failed_fs_names.add(rom_scan.fs_rom["fs_name"])
+        log.error(f"Error scanning ROM {rom_scan.fs_rom['fs_name']}: {error}")
+
+    # Disk, CPU and network bound steps of different ROMs run at the same time
+    flush_task = asyncio.create_task(roms_writer.flush_periodically())
+    try:
+        # A stop cancels the ROMs in progress, instead of waiting for them
+        await stop_token.run(
+            run_pipeline(
+                discover_roms(),
+                [
+                    PipelineStage(
+                        name="hash",
+                        fn=hash_rom,
+                        workers=SCAN_HASH_WORKERS,
+                        stats=scan_stats.get_stage_stats("hash"),
+                    ),
+                    PipelineStage(
+                        name="identify",
+                        fn=fetch_rom_metadata,
+                        workers=SCAN_WORKERS,
+                        stats=scan_stats.get_stage_stats("identify"),
+                    ),
+                    PipelineStage(
+                        name="artwork",
+                        fn=store_rom_artwork,
+                        workers=SCAN_ARTWORK_WORKERS,
+                        stats=scan_stats.get_stage_stats("artwork"),
+                    ),
+                ],
+                on_error=log_rom_error,
+                fatal_exceptions=(ScanStoppedException,),
+                on_done=on_rom_done,
+            )
+        )
+    finally:
+        # Keep the results of the ROMs scanned before a stop or error
+        flush_task.cancel()
+        roms_writer.flush()
+        await scan_stats.flush(socket_manager)
+        save_checkpoint(force=True)
+
+    return unscanned_fs_names
+
+
 async def _identify_platform(
     platform_slug: str,
     scan_type: ScanType,
@@ -453,11 +1013,13 @@ async def _identify_platform(
     metadata_sources: list[str],
     socket_manager: socketio.AsyncRedisManager,
     scan_stats: ScanStats,
+    stop_token: ScanStopToken,
     calculate_hashes: bool = True,
+    crc_only_platform_ids: set[int] | None = None,
+    checkpoint: ScanCheckpoint | None = None,
 ) -> ScanStats:
     # Stop the scan if the flag is set
-    if redis_client.get(STOP_SCAN_FLAG):
-        raise ScanStoppedException()
+    stop_token.raise_if_stopped()
 
     platform = db_platform_handler.get_platform_by_fs_slug(platform_slug)
     if platform and scan_type == ScanType.NEW_PLATFORMS:
@@ -505,6 +1067,7 @@ async def _identify_platform(
         new_firmware += await _identify_firmware(
             platform=platform,
             fs_fw=fs_fw,
+            stop_token=stop_token,
         )
 
     # This reduces the number of socket emissions
@@ -514,13 +1077,19 @@ async def _identify_platform(
         new_firmware=new_firmware,
     )
 
-    # Scanning roms
+    # Scanning roms, quick scans only look at the roms added since the last
+    # scan of the platform
+    skip_known_roms = scan_type == ScanType.QUICK and not roms_ids
     try:
-        fs_roms = await fs_rom_handler.get_roms(platform)
+        fs_roms_listing = await fs_rom_handler.get_roms_listing(
+            platform, use_manifest=skip_known_roms
+        )
     except RomsNotFoundException as e:
         log.error(e)
         return scan_stats
 
+    fs_roms = fs_roms_listing.roms
+
     if len(fs_roms) == 0:
         log.warning(
             f"{hl(emoji.EMOJI_WARNING, color=LIGHTYELLOW)} No roms found, verify that the folder structure is correct"
@@ -528,43 +1097,45 @@ async def _identify_platform(
     else:
         log.info(f"{hl(str(len(fs_roms)))} roms found in the file system")
 
-    # Create semaphore to limit concurrent ROM scanning
-    scan_semaphore = asyncio.Semaphore(SCAN_WORKERS)
-
-    async def scan_rom_with_semaphore(fs_rom: FSRom, rom: Rom | None) -> None:
-        """Scan a single ROM with semaphore limiting"""
-        async with scan_semaphore:
-            await _identify_rom(
-                platform=platform,
-                fs_rom=fs_rom,
-                rom=rom,
-                scan_type=scan_type,
-                roms_ids=roms_ids,
-                metadata_sources=metadata_sources,
-                socket_manager=socket_manager,
-                scan_stats=scan_stats,
-                calculate_hashes=calculate_hashes,
-            )
-
-    for fs_roms_batch in batched(fs_roms, 200, strict=False):
-        roms_by_fs_name = db_rom_handler.get_roms_by_fs_name(
-            platform_id=platform.id,
-            fs_names={fs_rom["fs_name"] for fs_rom in fs_roms_batch},
+    fs_roms_to_scan = fs_roms
+    known_fs_names = fs_roms_listing.known_fs_names
+    if skip_known_roms and known_fs_names:
+        # Roms removed from the database since (e.g. by a restore) are new again
+        known_fs_names = known_fs_names & db_rom_handler.get_rom_fs_names(platform.id)
+        fs_roms_to_scan = [
+            fs_rom for fs_rom in fs_roms if fs_rom["fs_name"] not in known_fs_names
+        ]
+        log.info(
+            f"{hl(str(len(fs_roms) - len(fs_roms_to_scan)))} roms unchanged since the last scan"
         )
 
-        # Process ROMs concurrently within the batch
-        scan_tasks = [
-            scan_rom_with_semaphore(
-                fs_rom=fs_rom, rom=roms_by_fs_name.get(fs_rom["fs_name"])
-            )
-            for fs_rom in fs_roms_batch
+    # A resumed scan continues after the last checkpoint of the platform, and
+    # retries the ROMs that failed before it
+    last_scanned_fs_name = (
+        checkpoint.get_last_rom(platform.fs_slug) if checkpoint else None
+    )
+    if checkpoint and last_scanned_fs_name is not None:
+        failed_fs_names = checkpoint.get_failed_roms(platform.fs_slug)
+        fs_roms_to_scan = [
+            fs_rom
+            for fs_rom in fs_roms_to_scan
+            if fs_rom["fs_name"] > last_scanned_fs_name
+            or fs_rom["fs_name"] in failed_fs_names
         ]
+        log.info(f"Resuming the scan after {hl(last_scanned_fs_name)}")
 
-        # Wait for all ROMs in the batch to complete
-        batched_results = await asyncio.gather(*scan_tasks, return_exceptions=True)
-        for result, fs_rom in zip(batched_results, fs_roms_batch, strict=False):
-            if isinstance(result, Exception):
-                log.error(f"Error scanning ROM {fs_rom['fs_name']}: {result}")
+    unscanned_fs_names = await _scan_roms(
+        platform=platform,
+        fs_roms=fs_roms_to_scan,
+        scan_type=scan_type,
+        roms_ids=roms_ids,
+        metadata_sources=metadata_sources,
+        socket_manager=socket_manager,
+        scan_stats=scan_stats,
+        stop_token=stop_token,
+        crc_only_platform_ids=crc_only_platform_ids,
+        checkpoint=checkpoint,
+    )
 
     missing_roms = db_rom_handler.mark_missing_roms(
         platform.id, [rom["fs_name"] for rom in fs_roms]
@@ -574,6 +1145,10 @@ async def _identify_platform(
         for r in missing_roms:
             log.warning(f" - {r.fs_name}")
 
+    await fs_rom_handler.save_roms_manifest(
+        platform, fs_roms_listing, unscanned_fs_names
+    )
+
     missing_firmware = db_firmware_handler.mark_missing_firmware(
         platform.id, [fw for fw in fs_firmware]
     )
@@ -582,6 +1157,9 @@ async def _identify_platform(
         for f in missing_firmware:
             log.warning(f" - {f}")
 
+    if checkpoint:
+        checkpoint.save_platform_done(platform.fs_slug, scan_stats)
+
     return scan_stats
 
 
@@ -591,6 +1169,8 @@ async def scan_platforms(
     metadata_sources: list[str],
     scan_type: ScanType = ScanType.QUICK,
     roms_ids: list[int] | None = None,
+    checkpoint_id: str | None = None,
+    resume: bool = False,
 ) -> ScanStats:
     """Scan all the listed platforms and fetch metadata from different sources
 
@@ -599,6 +1179,10 @@ async def scan_platforms(
         metadata_sources (list[str]): List of metadata sources to be used
         scan_type (ScanType): Type of scan to be performed.
         roms_ids (list[int], optional): List of selected roms to be scanned.
+        checkpoint_id (str, optional): ID of the checkpoint to save the progress
+            to, only given to scans started by users so they can be resumed.
+        resume (bool, optional): Whether to continue from the checkpoint, which
+            must have been started with the same options.
     """
 
     # Get hash calculation setting from config
@@ -609,6 +1193,23 @@ async def scan_platforms(
 
     socket_manager = _get_socket_manager()
     scan_stats = ScanStats()
+    # Platforms with ROMs identified by their ZIP CRC only, see `SCAN_ZIP_CRC_ONLY`
+    crc_only_platform_ids: set[int] = set()
+
+    checkpoint = ScanCheckpoint(checkpoint_id) if checkpoint_id else None
+    if checkpoint and resume:
+        checkpoint.load()
+        checkpoint.restore_stats(scan_stats)
+    elif checkpoint:
+        checkpoint.start(
+            {
+                "platform_ids": platform_ids,
+                "metadata_sources": metadata_sources,
+                "scan_type": scan_type.value,
+                "roms_ids": roms_ids,
+            },
+            scan_stats,
+        )
 
     try:
         fs_platforms: list[str] = await fs_platform_handler.get_platforms()
@@ -637,16 +1238,26 @@ async def scan_platforms(
 
     async def stop_scan():
         log.info(f"{emoji.EMOJI_STOP_SIGN} Scan stopped manually")
+        await scan_stats.flush(socket_manager)
         await socket_manager.emit("scan:done", scan_stats.to_dict())
         redis_client.delete(STOP_SCAN_FLAG)
 
+    stop_token = ScanStopToken()
+    stop_token.start()
+
+    current_job = get_current_job()
+    shard_jobs: list[Job] = []
     try:
         platform_list = [
             platform.fs_slug
             for s in platform_ids
             if (platform := db_platform_handler.get_platform(s)) is not None
         ] or fs_platforms
-        platform_list = sorted(platform_list)
+        platform_list = sorted(
+            slug
+            for slug in platform_list
+            if not (checkpoint and checkpoint.is_platform_done(slug))
+        )
 
         if len(platform_list) == 0:
             log.warning(
@@ -658,7 +1269,158 @@ async def scan_platforms(
                 f"Found {hl(str(len(platform_list)))} platforms in the file system"
             )
 
-        for platform_slug in platform_list:
+        # Idle workers help with the scan, taking platforms from a shared queue
+        shard_jobs = await _enqueue_scan_shards(
+            scan_id=current_job.id if current_job else None,
+            platform_list=platform_list,
+            fs_platforms=fs_platforms,
+            metadata_sources=metadata_sources,
+            scan_type=scan_type,
+            roms_ids=roms_ids,
+            scan_stats=scan_stats,
+            checkpoint_id=checkpoint_id,
+        )
+        platforms_key = (
+            f"{SCAN_SHARDS_KEY_PREFIX}:{current_job.id}:platforms"
+            if current_job and shard_jobs
+            else None
+        )
+
+        try:
+            for platform_slug in _next_platforms(platform_list, platforms_key):
+                scan_stats = await _identify_platform(
+                    platform_slug=platform_slug,
+                    scan_type=scan_type,
+                    fs_platforms=fs_platforms,
+                    roms_ids=roms_ids,
+                    metadata_sources=metadata_sources,
+                    socket_manager=socket_manager,
+                    scan_stats=scan_stats,
+                    stop_token=stop_token,
+                    calculate_hashes=calculate_hashes,
+                    crc_only_platform_ids=crc_only_platform_ids,
+                    checkpoint=checkpoint,
+                )
+        finally:
+            if platforms_key:
+                # Don't let the shards start on new platforms if the scan failed
+                sync_cache.delete(platforms_key)
+
+        if current_job and shard_jobs:
+            unfinished_platforms = await _wait_for_scan_shards(
+                current_job.id,
+                shard_jobs,
+                socket_manager,
+                scan_stats,
+                crc_only_platform_ids,
+            )
+            # Shards stop on their own, so the flag is only checked once all are done
+            if stop_token.is_stopped():
+                await stop_scan()
+                return scan_stats
+
+            # Platforms of failed shards are scanned again, resuming from the checkpoint
+            if checkpoint:
+                checkpoint.load()
+            for platform_slug in unfinished_platforms:
+                log.warning(
+                    f"Scanning {hl(platform_slug)} again after its shard failed"
+                )
+                scan_stats = await _identify_platform(
+                    platform_slug=platform_slug,
+                    scan_type=scan_type,
+                    fs_platforms=fs_platforms,
+                    roms_ids=roms_ids,
+                    metadata_sources=metadata_sources,
+                    socket_manager=socket_manager,
+                    scan_stats=scan_stats,
+                    stop_token=stop_token,
+                    calculate_hashes=calculate_hashes,
+                    crc_only_platform_ids=crc_only_platform_ids,
+                    checkpoint=checkpoint,
+                )
+
+        missed_platforms = db_platform_handler.mark_missing_platforms(fs_platforms)
+        if len(missed_platforms) > 0:
+            log.warning(f"{hl('Missing')} platforms from filesystem:")
+            for p in missed_platforms:
+                log.warning(f" - {p.slug} ({p.fs_slug})")
+
+        log.info(f"{emoji.EMOJI_CHECK_MARK} Scan completed")
+        if checkpoint:
+            checkpoint.clear()
+        await scan_stats.flush(socket_manager)
+        await socket_manager.emit("scan:done", scan_stats.to_dict())
+
+        if crc_only_platform_ids:
+            _enqueue_hashes_scan(sorted(crc_only_platform_ids))
+    except ScanStoppedException:
+        if current_job and shard_jobs:
+            await _wait_for_scan_shards(
+                current_job.id,
+                shard_jobs,
+                socket_manager,
+                scan_stats,
+                crc_only_platform_ids,
+            )
+        await stop_scan()
+    except Exception as e:
+        log.error(f"Error in scan_platform: {e}")
+        # Catch all exceptions and emit error to the client
+        await socket_manager.emit("scan:done_ko", str(e))
+        # Re-raise the exception to be caught by the error handler
+        raise e
+    finally:
+        await stop_token.close()
+        if current_job and shard_jobs:
+            _clear_scan_shards(current_job.id)
+        # Release the hashing worker processes until the next scan
+        fs_rom_handler.hashing_engine.shutdown()
+
+    return scan_stats
+
+
+@initialize_context()
+async def scan_platforms_shard(
+    scan_id: str,
+    fs_platforms: list[str],
+    metadata_sources: list[str],
+    scan_type: ScanType,
+    roms_ids: list[int],
+    checkpoint_id: str | None = None,
+) -> dict[str, Any]:
+    """Help a running scan, scanning platforms from its shared queue until it's empty
+
+    Args:
+        scan_id (str): ID of the job of the scan being helped
+        fs_platforms (list[str]): List of platforms in the filesystem
+        metadata_sources (list[str]): List of metadata sources to be used
+        scan_type (ScanType): Type of scan to be performed.
+        roms_ids (list[int]): List of selected roms to be scanned.
+        checkpoint_id (str, optional): ID of the checkpoint of the scan, if any
+    """
+    calculate_hashes = not cm.get_config().SKIP_HASH_CALCULATION
+    socket_manager = _get_socket_manager()
+    scan_stats = ScanStats(shared_key=f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:stats")
+    crc_only_platform_ids: set[int] = set()
+    checkpoint = ScanCheckpoint(checkpoint_id) if checkpoint_id else None
+    if checkpoint:
+        checkpoint.load()
+    stop_token = ScanStopToken()
+    stop_token.start()
+    current_job = get_current_job()
+    # Platform being scanned, for the coordinator to retry it if the shard dies
+    scanning_key = f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:scanning"
+
+    try:
+        for platform_slug in _next_platforms(
+            [], f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:platforms"
+        ):
+            if current_job:
+                with sync_cache.pipeline() as pipe:
+                    pipe.hset(scanning_key, current_job.id, platform_slug)
+                    pipe.expire(scanning_key, SCAN_TIMEOUT)
+                    pipe.execute()
             scan_stats = await _identify_platform(
                 platform_slug=platform_slug,
                 scan_type=scan_type,
@@ -667,25 +1429,335 @@ async def scan_platforms(
                 metadata_sources=metadata_sources,
                 socket_manager=socket_manager,
                 scan_stats=scan_stats,
+                stop_token=stop_token,
                 calculate_hashes=calculate_hashes,
+                crc_only_platform_ids=crc_only_platform_ids,
+                checkpoint=checkpoint,
             )
+            if current_job:
+                sync_cache.hdel(scanning_key, current_job.id)
+    except ScanStoppedException:
+        log.info(f"{emoji.EMOJI_STOP_SIGN} Scan shard stopped")
+        if current_job:
+            sync_cache.hdel(scanning_key, current_job.id)
+    finally:
+        await stop_token.close()
+        # The coordinator reads the shared counters once the shards are done
+        await scan_stats.flush(socket_manager)
+        fs_rom_handler.hashing_engine.shutdown()
+
+    return {
+        "stages": {
+            name: [stats.processed, stats.busy_seconds]
+            for name, stats in scan_stats.stages.items()
+        },
+        "crc_only_platform_ids": sorted(crc_only_platform_ids),
+    }
 
-        missed_platforms = db_platform_handler.mark_missing_platforms(fs_platforms)
-        if len(missed_platforms) > 0:
-            log.warning(f"{hl('Missing')} platforms from filesystem:")
-            for p in missed_platforms:
-                log.warning(f" - {p.slug} ({p.fs_slug})")
 
-        log.info(f"{emoji.EMOJI_CHECK_MARK} Scan completed")
+def _next_platforms(
+    platform_list: list[str], platforms_key: str | None
+) -> Iterator[str]:
+    """Iterate the platforms to scan, from the shared queue if the scan is sharded"""
+    if not platforms_key:
+        yield from platform_list
+        return
+
+    while platform_slug := sync_cache.lpop(platforms_key):
+        yield platform_slug
+
+
+async def _enqueue_scan_shards(
+    scan_id: str | None,
+    platform_list: list[str],
+    fs_platforms: list[str],
+    metadata_sources: list[str],
+    scan_type: ScanType,
+    roms_ids: list[int],
+    scan_stats: ScanStats,
+    checkpoint_id: str | None = None,
+) -> list[Job]:
+    """Queue a shard of the scan job for each idle RQ worker of the scan queue
+
+    Only scans running as RQ jobs are sharded, and only if there are idle
+    workers and more than one platform to scan.
+    """
+    if not scan_id:
+        return []
+
+    # Busy workers (including this one) wouldn't start a shard until they're done
+    idle_workers = [
+        worker
+        for worker in Worker.all(connection=redis_client, queue=high_prio_queue)
+        if worker.get_state() == WorkerStatus.IDLE
+    ]
+    shard_count = min(len(platform_list) - 1, len(idle_workers))
+    if shard_count <= 0:
+        return []
+
+    shards_key = f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}"
+    sync_cache.rpush(f"{shards_key}:platforms", *platform_list)
+    sync_cache.expire(f"{shards_key}:platforms", SCAN_TIMEOUT)
+    await scan_stats.share(f"{shards_key}:stats")
+
+    log.info(f"Sharding the scan across {hl(str(shard_count + 1))} workers")
+    return [
+        high_prio_queue.enqueue(
+            scan_platforms_shard,
+            scan_id=scan_id,
+            fs_platforms=fs_platforms,
+            metadata_sources=metadata_sources,
+            scan_type=scan_type,
+            roms_ids=roms_ids,
+            checkpoint_id=checkpoint_id,
+            job_timeout=SCAN_TIMEOUT,
+            result_ttl=TASK_RESULT_TTL,
+            meta={
+                "task_name": f"{scan_type.value.capitalize()} Scan (shard {i + 1})",
+                "task_type": TaskType.SCAN,
+            },
+        )
+        for i in range(shard_count)
+    ]
+
+
+async def _wait_for_scan_shards(
+    scan_id: str,
+    shard_jobs: list[Job],
+    socket_manager: socketio.AsyncRedisManager,
+    scan_stats: ScanStats,
+    crc_only_platform_ids: set[int],
+) -> list[str]:
+    """Wait for the shards to finish, publishing the combined stats meanwhile
+
+    Called once the queue of platforms is empty, so shards that haven't
+    started yet are cancelled.
+
+    Returns:
+        list[str]: Platforms left unfinished by shards that failed or were killed
+    """
+    pending_jobs = list(shard_jobs)
+    while pending_jobs:
+        for job in pending_jobs:
+            if job.get_status() == JobStatus.QUEUED:
+                job.cancel()
+        pending_jobs = [
+            job for job in pending_jobs if job.get_status() not in SHARD_DONE_STATUSES
+        ]
+        if pending_jobs:
+            await asyncio.sleep(SHARD_POLL_INTERVAL)
+        await scan_stats.refresh(socket_manager)
+
+    unfinished_platforms: list[str] = []
+    scanning_key = f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:scanning"
+    for job in shard_jobs:
+        result = job.return_value()
+        if result:
+            for name, (processed, busy_seconds) in result["stages"].items():
+                stage_stats = scan_stats.get_stage_stats(name)
+                stage_stats.processed += processed
+                stage_stats.busy_seconds += busy_seconds
+            crc_only_platform_ids.update(result["crc_only_platform_ids"])
+
+        if platform_slug := sync_cache.hget(scanning_key, job.id):
+            platform_slug = os.fsdecode(platform_slug)
+            log.error(
+                f"Scan shard {job.id} failed while scanning {hl(platform_slug)}: {job.exc_info}"
+            )
+            unfinished_platforms.append(platform_slug)
+        elif not result and job.get_status() != JobStatus.CANCELED:
+            log.error(f"Scan shard {job.id} failed: {job.exc_info}")
+
+    return unfinished_platforms
+
+
+def _clear_scan_shards(scan_id: str) -> None:
+    sync_cache.delete(
+        f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:platforms",
+        f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:scanning",
+        f"{SCAN_SHARDS_KEY_PREFIX}:{scan_id}:stats",
+    )
+
+
+def _enqueue_hashes_scan(platform_ids: list[int]) -> Job:
+    """Queue a low priority hashes scan, to fully hash ROMs identified by their CRC only"""
+    log.info(
+        f"Queueing a hashes scan for {hl(str(len(platform_ids)))} platforms with CRC-only ROMs"
+    )
+    return low_prio_queue.enqueue(
+        scan_platforms,
+        platform_ids=platform_ids,
+        metadata_sources=[],
+        scan_type=ScanType.HASHES,
+        job_timeout=SCAN_TIMEOUT,
+        result_ttl=TASK_RESULT_TTL,
+        meta={
+            "task_name": f"{ScanType.HASHES.value.capitalize()} Scan",
+            "task_type": TaskType.SCAN,
+        },
+    )
+
+
+def queue_changed_roms(changed_roms: Iterable[tuple[str, str]]) -> bool:
+    """Queue roms changed in the filesystem, to be scanned by `scan_changed_roms`
+
+    Args:
+        changed_roms (Iterable[tuple[str, str]]): Platform fs_slug and fs_name of each rom
+
+    Returns:
+        bool: Whether a scan of the changed roms has to be scheduled
+    """
+    members = [f"{fs_slug}/{fs_name}" for fs_slug, fs_name in changed_roms]
+    if not members:
+        return False
+
+    # Expire if the scheduled scan is lost, so later changes schedule a new one
+    ttl = RESCAN_ON_FILESYSTEM_CHANGE_DELAY * 60 + SCAN_TIMEOUT
+    with sync_cache.pipeline() as pipe:
+        pipe.sadd(CHANGED_ROMS_KEY, *members)
+        pipe.expire(CHANGED_ROMS_KEY, ttl)
+        pipe.set(CHANGED_ROMS_SCAN_KEY, 1, nx=True, ex=ttl)
+        *_, is_first_change = pipe.execute()
+
+    return bool(is_first_change)
+
+
+def _pop_changed_roms() -> dict[str, set[str]]:
+    """Take the roms queued by `queue_changed_roms`, grouped by platform fs_slug"""
+    with sync_cache.pipeline() as pipe:
+        pipe.smembers(CHANGED_ROMS_KEY)
+        pipe.delete(CHANGED_ROMS_KEY)
+        members, _ = pipe.execute()
+
+    changed_roms: dict[str, set[str]] = {}
+    for member in members:
+        fs_slug, _, fs_name = os.fsdecode(member).partition("/")
+        changed_roms.setdefault(fs_slug, set()).add(fs_name)
+
+    return changed_roms
+
+
+async def _scan_changed_platform_roms(
+    fs_slug: str,
+    fs_names: set[str],
+    metadata_sources: list[str],
+    socket_manager: socketio.AsyncRedisManager,
+    scan_stats: ScanStats,
+    stop_token: ScanStopToken,
+) -> None:
+    platform = db_platform_handler.get_platform_by_fs_slug(fs_slug)
+    if not platform:
+        log.warning(f"Platform {hl(fs_slug)} not found, skipping its changed roms")
+        return
+
+    fs_roms = await fs_rom_handler.get_roms_by_fs_names(platform, fs_names)
+    fs_rom_names = {fs_rom["fs_name"] for fs_rom in fs_roms}
+    roms_by_fs_name = db_rom_handler.get_roms_by_fs_name(
+        platform_id=platform.id, fs_names=fs_names
+    )
+
+    removed_roms = [
+        rom for fs_name, rom in roms_by_fs_name.items() if fs_name not in fs_rom_names
+    ]
+    renamed_roms = await fs_rom_handler.find_renamed_roms(
+        platform,
+        removed_roms,
+        [fs_rom for fs_rom in fs_roms if fs_rom["fs_name"] not in roms_by_fs_name],
+    )
+    for fs_name, rom in renamed_roms.items():
+        log.info(f"Rom {hl(rom.fs_name)} renamed to {hl(fs_name)}")
+        db_rom_handler.update_rom(
+            rom.id,
+            {
+                "fs_name": fs_name,
+                "fs_name_no_tags": fs_rom_handler.get_file_name_with_no_tags(fs_name),
+                "fs_name_no_ext": fs_rom_handler.get_file_name_with_no_extension(
+                    fs_name
+                ),
+                "fs_extension": fs_rom_handler.parse_file_extension(fs_name),
+            },
+        )
+
+    renamed_rom_ids = {rom.id for rom in renamed_roms.values()}
+    missing_roms = [rom for rom in removed_roms if rom.id not in renamed_rom_ids]
+    if missing_roms:
+        log.warning(f"{hl('Missing')} roms from filesystem:")
+        for rom in missing_roms:
+            log.warning(f" - {rom.fs_name}")
+        db_rom_handler.bulk_update_roms(
+            [{"id": rom.id, "missing_from_fs": True} for rom in missing_roms]
+        )
+
+    # Renamed roms and roms with added or removed files are rescanned, new roms added
+    await _scan_roms(
+        platform=platform,
+        fs_roms=fs_roms,
+        scan_type=ScanType.QUICK,
+        roms_ids=[
+            rom.id
+            for fs_name, rom in roms_by_fs_name.items()
+            if fs_name in fs_rom_names
+        ]
+        + list(renamed_rom_ids),
+        metadata_sources=metadata_sources,
+        socket_manager=socket_manager,
+        scan_stats=scan_stats,
+        stop_token=stop_token,
+    )
+
+
+@initialize_context()
+async def scan_changed_roms(metadata_sources: list[str]) -> ScanStats:
+    """Scan the roms changed in the filesystem since the watcher scheduled this job
+
+    Only the changed roms are checked: new roms are added, or matched with the
+    removed rom they were renamed from, removed roms are marked as missing, and
+    roms with added or removed files are rescanned.
+
+    Args:
+        metadata_sources (list[str]): List of metadata sources to be used
+    """
+    # Changes from now on schedule a new scan
+    sync_cache.delete(CHANGED_ROMS_SCAN_KEY)
+    changed_roms = _pop_changed_roms()
+
+    socket_manager = _get_socket_manager()
+    scan_stats = ScanStats()
+    await scan_stats.update(
+        socket_manager=socket_manager,
+        total_platforms=len(changed_roms),
+        total_roms=sum(len(fs_names) for fs_names in changed_roms.values()),
+    )
+
+    stop_token = ScanStopToken()
+    stop_token.start()
+    try:
+        for fs_slug, fs_names in sorted(changed_roms.items()):
+            await _scan_changed_platform_roms(
+                fs_slug=fs_slug,
+                fs_names=fs_names,
+                metadata_sources=metadata_sources,
+                socket_manager=socket_manager,
+                scan_stats=scan_stats,
+                stop_token=stop_token,
+            )
+
+        await scan_stats.flush(socket_manager)
         await socket_manager.emit("scan:done", scan_stats.to_dict())
     except ScanStoppedException:
-        await stop_scan()
+        log.info(f"{emoji.EMOJI_STOP_SIGN} Scan stopped manually")
+        await scan_stats.flush(socket_manager)
+        await socket_manager.emit("scan:done", scan_stats.to_dict())
+        redis_client.delete(STOP_SCAN_FLAG)
     except Exception as e:
-        log.error(f"Error in scan_platform: {e}")
+        log.error(f"Error in scan_changed_roms: {e}")
         # Catch all exceptions and emit error to the client
         await socket_manager.emit("scan:done_ko", str(e))
         # Re-raise the exception to be caught by the error handler
         raise e
+    finally:
+        await stop_token.close()
+        fs_rom_handler.hashing_engine.shutdown()
 
     return scan_stats
 
@@ -705,12 +1777,29 @@ async def scan_handler(_sid: str, options: dict[str, Any]):
     roms_ids = options.get("roms_ids", [])
     metadata_sources = options.get("apis", [])
 
+    # Resumed scans continue with the checkpoint and options of the interrupted scan
+    checkpoint_id = uuid.uuid4().hex
+    resume = bool(options.get("resume", False))
+    if resume:
+        latest_checkpoint = ScanCheckpoint.get_latest()
+        if latest_checkpoint:
+            checkpoint_id, scan_options = latest_checkpoint
+            platform_ids = scan_options["platform_ids"]
+            scan_type = ScanType(scan_options["scan_type"])
+            roms_ids = scan_options["roms_ids"] or []
+            metadata_sources = scan_options["metadata_sources"]
+        else:
+            log.info("No interrupted scan to resume, starting a new scan")
+            resume = False
+
     if DEV_MODE:
         return await scan_platforms(
             platform_ids=platform_ids,
             metadata_sources=metadata_sources,
             scan_type=scan_type,
             roms_ids=roms_ids,
+            checkpoint_id=checkpoint_id,
+            resume=resume,
         )
 
     return high_prio_queue.enqueue(
@@ -719,6 +1808,8 @@ async def scan_handler(_sid: str, options: dict[str, Any]):
         metadata_sources=metadata_sources,
         scan_type=scan_type,
         roms_ids=roms_ids,
+        checkpoint_id=checkpoint_id,
+        resume=resume,
         job_timeout=SCAN_TIMEOUT,  # Timeout (default of 4 hours)
         result_ttl=TASK_RESULT_TTL,
         meta={
@@ -1,5 +1,10 @@
+from fastapi import Request
+
+from decorators.auth import protected_route
 from endpoints.responses.stats import StatsReturn
+from handler.auth.constants import Scope
 from handler.database import db_stats_handler
+from utils.rate_limit import RATE_LIMITERS, RateLimitStats
 from utils.router import APIRouter
 
 router = APIRouter(
@@ -24,3 +29,18 @@ def stats() -> StatsReturn:
         "SCREENSHOTS": db_stats_handler.get_screenshots_count(),
         "TOTAL_FILESIZE_BYTES": db_stats_handler.get_total_filesize(),
     }
+
+
+@protected_route(router.get, "/rate-limits", [Scope.TASKS_RUN])
+async def rate_limit_stats(request: Request) -> dict[str, RateLimitStats]:
+    """Endpoint to return the requests sent to each metadata provider, and how
+    long they waited for the rate limits
+
+    Returns:
+        dict: Rate limit stats by provider
+    """
+
+    return {
+        provider: await rate_limiter.get_stats()
+        for provider, rate_limiter in RATE_LIMITERS.items()
+    }
@@ -33,6 +33,7 @@ from handler.redis_handler import (
     redis_client,
 )
 from tasks.manual.cleanup_orphaned_resources import cleanup_orphaned_resources_task
+from tasks.manual.import_dat_files import import_dat_files_task
 from tasks.scheduled.convert_images_to_webp import convert_images_to_webp_task
 from tasks.scheduled.scan_library import scan_library_task
 from tasks.scheduled.update_launchbox_metadata import update_launchbox_metadata_task
@@ -98,6 +99,13 @@ manual_tasks: list[ManualTask] = [
             "task": cleanup_orphaned_resources_task,
         }
     ),
+    ManualTask(
+        {
+            "name": "import_dat_files",
+            "type": TaskType.UPDATE,
+            "task": import_dat_files_task,
+        }
+    ),
 ]
 
 
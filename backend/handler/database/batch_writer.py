@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Any
+
+from config import SCAN_DB_BATCH_INTERVAL_MS, SCAN_DB_BATCH_SIZE
+from models.rom import RomFile
+
+from .roms_handler import DBRomsHandler
+
+
+class RomsBatchWriter:
+    """Accumulate ROM updates and file replacements, and write them in batches
+
+    Writes are flushed once `batch_size` ROMs are pending, or when the oldest
+    pending write is older than `interval_ms`, which `flush_periodically`
+    enforces when no other write comes in. Updates to the same ROM are merged
+    together, and a newer file list replaces the pending one.
+
+    New ROMs and the metadata of scanned ROMs are still written one by one with
+    `add_rom`: the later scan stages need the ID and the reloaded relationships
+    of the ROM right away, which a deferred write can't provide.
+    """
+
+    def __init__(
+        self,
+        db_rom_handler: DBRomsHandler,
+        batch_size: int = SCAN_DB_BATCH_SIZE,
+        interval_ms: int = SCAN_DB_BATCH_INTERVAL_MS,
+    ) -> None:
+        self.db_rom_handler = db_rom_handler
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self._rom_updates: dict[int, dict[str, Any]] = {}
+        self._rom_files: dict[int, list[RomFile]] = {}
+        self._pending_since: float | None = None
+
+    @property
+    def pending_roms(self) -> int:
+        return len(self._rom_updates.keys() | self._rom_files.keys())
+
+    def update_rom(self, rom_id: int, data: dict[str, Any]) -> None:
+        self._rom_updates.setdefault(rom_id, {"id": rom_id}).update(data)
+        self._on_write()
+
+    def replace_rom_files(self, rom_id: int, rom_files: list[RomFile]) -> None:
+        self._rom_files[rom_id] = rom_files
+        self._on_write()
+
+    def flush_if_due(self) -> None:
+        """Write the pending updates if the oldest one is older than `interval_ms`"""
+        if (
+            self._pending_since is not None
+            and (time.monotonic() - self._pending_since) * 1000 >= self.interval_ms
+        ):
+            self.flush()
+
+    async def flush_periodically(self) -> None:
+        """Flush the pending writes as they come due, until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval_ms / 1000)
+            self.flush_if_due()
+
+    def _on_write(self) -> None:
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+
+        if self.pending_roms >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush(self) -> None:
+        """Write all the pending updates and file replacements"""
+        rom_updates, self._rom_updates = self._rom_updates, {}
+        rom_files, self._rom_files = self._rom_files, {}
+        self._pending_since = None
+
+        if rom_files:
+            self.db_rom_handler.replace_rom_files(rom_files)
+        if rom_updates:
+            self.db_rom_handler.bulk_update_roms(list(rom_updates.values()))
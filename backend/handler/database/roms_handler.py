@@ -13,6 +13,8 @@ from sqlalchemy import (
     delete,
     false,
     func,
+    insert,
+    inspect,
     literal,
     not_,
     or_,
@@ -856,6 +858,17 @@ class DBRomsHandler(DBBaseHandler):
         )
         return {rom.fs_name: rom for rom in roms}
 
+    @begin_session
+    def get_rom_fs_names(
+        self,
+        platform_id: int,
+        session: Session = None,  # type: ignore
+    ) -> set[str]:
+        """Retrieve the filesystem names of all the roms of a platform."""
+        return set(
+            session.scalars(select(Rom.fs_name).filter_by(platform_id=platform_id))
+        )
+
     @begin_session
     def update_rom(
         self,
@@ -1030,6 +1043,58 @@ class DBRomsHandler(DBBaseHandler):
         )
         return purged_rom_files
 
+    @begin_session
+    def bulk_update_roms(
+        self,
+        roms_data: Sequence[dict[str, Any]],
+        session: Session = None,  # type: ignore
+    ) -> None:
+        """Update several ROMs with executemany statements
+
+        Args:
+            roms_data: Values to update, each including the `id` of its ROM
+        """
+        # Statements are batched per set of updated columns
+        grouped_data: dict[frozenset[str], list[dict[str, Any]]] = {}
+        for data in roms_data:
+            grouped_data.setdefault(frozenset(data), []).append(data)
+
+        for rows in grouped_data.values():
+            session.execute(update(Rom), rows)
+
+    @begin_session
+    def replace_rom_files(
+        self,
+        rom_files_by_rom_id: dict[int, list[RomFile]],
+        session: Session = None,  # type: ignore
+    ) -> None:
+        """Replace the files of several ROMs in a single transaction
+
+        Args:
+            rom_files_by_rom_id: New files of each ROM, replacing the existing ones
+        """
+        if not rom_files_by_rom_id:
+            return
+
+        session.execute(
+            delete(RomFile)
+            .where(RomFile.rom_id.in_(rom_files_by_rom_id.keys()))
+            .execution_options(synchronize_session=False)
+        )
+        # A bulk insert runs as executemany batches, as the new IDs aren't needed
+        column_keys = {attr.key for attr in inspect(RomFile).column_attrs}
+        rows = [
+            {
+                key: value
+                for key, value in inspect(rom_file).dict.items()
+                if key in column_keys
+            }
+            for rom_files in rom_files_by_rom_id.values()
+            for rom_file in rom_files
+        ]
+        if rows:
+            session.execute(insert(RomFile), rows)
+
     # Note management methods
     @begin_session
     def get_rom_notes(
@@ -1,19 +1,18 @@
-import binascii
-import bz2
+import asyncio
 import fnmatch
-import hashlib
+import json
 import os
 import re
-import tarfile
-import zipfile
-import zlib
-from collections.abc import Callable, Iterator
+import struct
+import time
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from pathlib import Path
-from typing import IO, Any, Final, Literal, TypedDict, cast
+from typing import Any, Final, NotRequired, TypedDict
 
 import magic
-import zipfile_inflate64  # trunk-ignore(ruff/F401): Patches zipfile to support Enhanced Deflate
+from redis.exceptions import RedisError
+from sqlalchemy import inspect
 
 from config import LIBRARY_BASE_PATH
 from config.config_manager import config_manager as cm
@@ -21,12 +20,21 @@ from exceptions.fs_exceptions import (
     RomAlreadyExistsException,
     RomsNotFoundException,
 )
+from exceptions.socket_exceptions import ScanStoppedException
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
+from handler.redis_handler import async_cache
+from logger.logger import log
 from models.platform import Platform
 from models.rom import Rom, RomFile, RomFileCategory
-from utils.archive_7zip import process_file_7z
 from utils.filesystem import iter_files
-from utils.hashing import crc32_to_hex
+from utils.hashing import (
+    EMPTY_FILE_HASH,
+    FileHash,
+    HashingCancelledError,
+    HashingEngine,
+    calculate_rom_hashes,
+)
+from utils.pipeline import StageStats
 
 from .base_handler import (
     LANGUAGES_BY_SHORTCODE,
@@ -59,18 +67,6 @@ COMPRESSED_FILE_EXTENSIONS = frozenset(
     )
 )
 
-# CHD (Compressed Hunks of Data) v5 format constants
-# See: https://github.com/mamedev/mame/blob/master/src/lib/util/chd.h
-CHD_SIGNATURE: Final = b"MComprHD"
-CHD_SIGNATURE_LENGTH: Final = 8
-CHD_MIN_HEADER_LENGTH: Final = 16  # Minimum to read signature and version
-CHD_V5_HEADER_LENGTH: Final = 124  # Total v5 header size
-CHD_VERSION_OFFSET: Final = 12  # Bytes offset for version field
-CHD_VERSION_LENGTH: Final = 4  # Version is a uint32
-CHD_V5_SHA1_OFFSET: Final = 84  # Combined raw+meta SHA1 offset in v5
-CHD_V5_SHA1_LENGTH: Final = 20  # SHA1 is 20 bytes
-CHD_V5_VERSION: Final = 5  # CHD v5 identifier
-
 NON_HASHABLE_PLATFORMS = frozenset(
     (
         UPS.AMAZON_ALEXA,
@@ -102,7 +98,18 @@ NON_HASHABLE_PLATFORMS = frozenset(
     )
 )
 
-FILE_READ_CHUNK_SIZE = 1024 * 8
+
+# Hashes of the ROM files, reused by later scans if the files haven't changed
+ROM_HASHES_KEY_PREFIX: Final = "romm:rom_hashes"
+ROM_HASHES_CACHE_TTL: Final = 60 * 60 * 24 * 90  # 90 days
+
+# Listing of the ROMs of each platform, reused by quick scans while its
+# directory is unchanged
+ROMS_MANIFEST_KEY_PREFIX: Final = "romm:fs_roms_manifest"
+ROMS_MANIFEST_TTL: Final = 60 * 60 * 24 * 90  # 90 days
+# Directories and ROMs modified more recently than this (in seconds) aren't
+# cached, as coarse mtimes (e.g. NFS) could hide a change made in the same tick
+ROMS_MANIFEST_MIN_AGE: Final = 2
 
 
 class FSRom(TypedDict):
@@ -116,179 +123,152 @@ class FSRom(TypedDict):
     ra_hash: str
 
 
-class FileHash(TypedDict):
-    crc_hash: str
-    md5_hash: str
-    sha1_hash: str
+class FSRomsManifestEntry(TypedDict):
+    fs_name: str
+    flat: bool
+    nested: bool
+    # Total size and latest modification time of the files of the ROM
+    size: NotRequired[int]
+    mtime_ns: NotRequired[int]
 
 
-def is_compressed_file(file_path: str) -> bool:
-    mime = magic.Magic(mime=True)
-    file_type = mime.from_file(file_path)
+class FSRomsManifest(TypedDict):
+    dir_mtime_ns: int
+    # Exclusion settings the directory was listed with
+    exclusions: NotRequired[str]
+    roms: list[FSRomsManifestEntry]
+    # ROMs that failed to scan, considered new by the next scan
+    unscanned: list[str]
 
-    return file_type in COMPRESSED_MIME_TYPES or file_path.endswith(
-        tuple(COMPRESSED_FILE_EXTENSIONS)
+
+@dataclass(frozen=True)
+class FSRomsListing:
+    roms: list[FSRom]
+    # Modification time of the platform directory when it was listed
+    dir_mtime_ns: int
+    # Total size and latest modification time of each ROM when it was listed
+    fingerprints: dict[str, tuple[int, int]]
+    # Exclusion settings the directory was listed with
+    exclusions: str
+    # Unchanged ROMs scanned by the previous scan, or None if there's no manifest
+    known_fs_names: frozenset[str] | None
+
+
+def _get_exclusions() -> str:
+    config = cm.get_config()
+    return json.dumps(
+        [
+            config.EXCLUDED_SINGLE_EXT,
+            config.EXCLUDED_SINGLE_FILES,
+            config.EXCLUDED_MULTI_FILES,
+            config.EXCLUDED_MULTI_PARTS_EXT,
+            config.EXCLUDED_MULTI_PARTS_FILES,
+        ]
     )
 
 
-def read_basic_file(file_path: os.PathLike[str]) -> Iterator[bytes]:
-    with open(file_path, "rb") as f:
-        while chunk := f.read(FILE_READ_CHUNK_SIZE):
-            yield chunk
+def _get_rom_fingerprint(rom_path: Path, nested: bool) -> tuple[int, int] | None:
+    """Get the total size and latest modification time of the files of a ROM"""
+    try:
+        stat = os.stat(rom_path)
+        if not nested:
+            return stat.st_size, stat.st_mtime_ns
+
+        # Subdirectories are included, as their mtime changes on renames
+        size, mtime_ns = 0, stat.st_mtime_ns
+        for root, _, files in os.walk(rom_path):
+            mtime_ns = max(mtime_ns, os.stat(root).st_mtime_ns)
+            for file_name in files:
+                file_stat = os.stat(os.path.join(root, file_name))
+                size += file_stat.st_size
+                mtime_ns = max(mtime_ns, file_stat.st_mtime_ns)
+        return size, mtime_ns
+    except OSError:
+        return None
 
 
-def read_zip_file(file: str | os.PathLike[str] | IO[bytes]) -> Iterator[bytes]:
-    try:
-        with zipfile.ZipFile(file, "r") as z:
-            # Find the biggest file in the archive
-            largest_file = max(z.infolist(), key=lambda x: x.file_size)
-            with z.open(largest_file, "r") as f:
-                while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                    yield chunk
-    except zipfile.BadZipFile:
-        if isinstance(file, Path):
-            for chunk in read_basic_file(file):
-                yield chunk
-
-
-def read_tar_file(
-    file_path: Path, mode: Literal["r", "r:*", "r:", "r:gz", "r:bz2", "r:xz"] = "r"
-) -> Iterator[bytes]:
-    try:
-        with tarfile.open(file_path, mode) as f:
-            regular_files = [member for member in f.getmembers() if member.isfile()]
-
-            # Find the largest file among regular files only
-            largest_file = max(regular_files, key=lambda x: x.size)
-            with f.extractfile(largest_file) as ef:  # type: ignore
-                while chunk := ef.read(FILE_READ_CHUNK_SIZE):
-                    yield chunk
-    except tarfile.ReadError:
-        for chunk in read_basic_file(file_path):
-            yield chunk
-
-
-def read_gz_file(file_path: Path) -> Iterator[bytes]:
-    return read_tar_file(file_path, "r:gz")
-
-
-def process_7z_file(
-    file_path: Path,
-    fn_hash_update: Callable[[bytes | bytearray], None],
-) -> None:
-    processed = process_file_7z(
-        file_path=file_path,
-        fn_hash_update=fn_hash_update,
+def _get_roms_fingerprints(
+    roms_path: Path, roms: Iterable[FSRomsManifestEntry]
+) -> dict[str, tuple[int, int]]:
+    fingerprints: dict[str, tuple[int, int]] = {}
+    for rom in roms:
+        fingerprint = _get_rom_fingerprint(roms_path / rom["fs_name"], rom["nested"])
+        if fingerprint is not None:
+            fingerprints[rom["fs_name"]] = fingerprint
+    return fingerprints
+
+
+def _new_fs_rom(fs_name: str, nested: bool) -> FSRom:
+    return FSRom(
+        fs_name=fs_name,
+        flat=not nested,
+        nested=nested,
+        files=[],
+        crc_hash="",
+        md5_hash="",
+        sha1_hash="",
+        ra_hash="",
     )
-    if not processed:
-        for chunk in read_basic_file(file_path):
-            fn_hash_update(chunk)
-
 
-def read_bz2_file(file_path: Path) -> Iterator[bytes]:
-    try:
-        with bz2.BZ2File(file_path, "rb") as f:
-            while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                yield chunk
-    except EOFError:
-        for chunk in read_basic_file(file_path):
-            yield chunk
 
+def is_compressed_file(file_path: str) -> bool:
+    mime = magic.Magic(mime=True)
+    file_type = mime.from_file(file_path)
 
-def extract_chd_hash(file_path: Path) -> str | None:
-    """
-    Extract the embedded SHA1 hash from a CHD (Compressed Hunks of Data) v5 file header.
+    return file_type in COMPRESSED_MIME_TYPES or file_path.endswith(
+        tuple(COMPRESSED_FILE_EXTENSIONS)
+    )
 
-    Only CHD v5 files are supported, matching MAMERedump's database.
 
-    CHD v5 files store the combined raw+meta SHA1 hash in the header.
-    This hash is what ROM databases use for CHD identification, since it includes
-    metadata like CD track layouts which are essential for proper disc image
-    identification.
+class CachedFileHash(FileHash):
+    fingerprint: list[int]
 
-    For reference, check out "chd.h" in the MAME source tree.
 
-    ---------------------------------- Why? ----------------------------------
-    CHDMAN does not produce nor guarantee stable, byte-for-byte identical
-    outputs for a given disc image. (Including HD images.)
+class RomHashesCacheEntry(TypedDict):
+    files: dict[str, CachedFileHash]
+    combined_fingerprint: list[list[int]]
+    combined_hash: FileHash
+    ra_fingerprint: list[list[int]]
+    ra_hash: str
 
-    For this reason, the CHD format embeds the original source data hash in
-    its header, allowing different CHD files to be verified as equivalent
-    even when their compressed representations differ.
-    --------------------------------------------------------------------------
 
-    Args:
-        file_path: Path to the CHD file
+def _file_fingerprint(file_path: Path) -> list[int] | None:
+    """Identify the current version of a file, without reading its content.
 
-    Returns:
-        SHA1 hash as hex string, or None if file is not a valid CHD v5 file or parsing fails
+    Returns None if the file can't be accessed, so it's hashed as usual.
     """
     try:
-        with open(file_path, "rb") as f:
-            # Read the v5 header and extract the embedded SHA1
-            header = f.read(CHD_V5_HEADER_LENGTH)
-
-            # Check for "MComprHD" signature
-            if (
-                len(header) < CHD_MIN_HEADER_LENGTH
-                or header[:CHD_SIGNATURE_LENGTH] != CHD_SIGNATURE
-            ):
-                return None
-
-            # Extract and verify version (big-endian uint32)
-            version_end = CHD_VERSION_OFFSET + CHD_VERSION_LENGTH
-            version = int.from_bytes(header[CHD_VERSION_OFFSET:version_end], "big")
-
-            # Only support v5 CHD files
-            if version != CHD_V5_VERSION:
-                return None
-
-            # Extract combined raw+meta SHA1 from v5 header
-            sha1_end = CHD_V5_SHA1_OFFSET + CHD_V5_SHA1_LENGTH
-            if len(header) < sha1_end:
-                return None
-            sha1_bytes = header[CHD_V5_SHA1_OFFSET:sha1_end]
-            return sha1_bytes.hex()
-    except OSError:
+        stat = os.stat(file_path)
+    except OSError as e:
+        log.warning(f"Failed to stat {file_path}, skipping hashes cache: {e}")
         return None
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev]
 
 
-class CHDHashWrapper:
-    """
-    Wrapper class that mimics hashlib hash objects but returns a pre-computed hash.
-
-    This class provides a hashlib-compatible interface for pre-computed hashes
-    extracted from CHD v5 file headers. It implements the same methods and attributes
-    as hashlib hash objects (digest(), hexdigest(), update(), and name).
-    """
+def _file_cache_field(rom_path: tuple[Path, str, bool]) -> str:
+    return str(Path(rom_path[0], rom_path[1]))
 
-    def __init__(self, hash_hex: str, name: str):
-        self.hash_hex = hash_hex
-        self.name = name
-        # Store the digest as bytes
-        self._digest = bytes.fromhex(hash_hex)
 
-    def hexdigest(self) -> str:
-        """Return the hash as a hexadecimal string."""
-        return self.hash_hex
+def _rom_file_unchanged(rom_file: RomFile, fingerprint: list[int]) -> bool:
+    """Whether a file still has the size and modification time stored in the database
 
-    def digest(self) -> bytes:
-        """Return the hash as bytes."""
-        return self._digest
+    MariaDB stores `last_modified` in single precision, so times rounded the
+    same way also match.
+    """
+    if rom_file.file_size_bytes != fingerprint[0] or rom_file.last_modified is None:
+        return False
 
-    def update(self, data: bytes | bytearray) -> None:
-        """No-op update method for compatibility with hashlib interface."""
-        pass
+    mtime = fingerprint[1] / 1_000_000_000
+    return (
+        abs(rom_file.last_modified - mtime) < 1e-6
+        or rom_file.last_modified == struct.unpack("f", struct.pack("f", mtime))[0]
+    )
 
 
 def category_matches(category: str, path_parts: list[str]):
     return category in path_parts or f"{category}s" in path_parts
 
 
-DEFAULT_CRC_C = 0
-DEFAULT_MD5_H_DIGEST = hashlib.md5(usedforsecurity=False).digest()
-DEFAULT_SHA1_H_DIGEST = hashlib.sha1(usedforsecurity=False).digest()
-
 VERSION_TAG_REGEX = re.compile(r"^(?:version|ver|v)[\s_-]?(.*)", re.I)
 REGION_TAG_REGEX = re.compile(r"^reg[\s|-](.*)$", re.I)
 REVISION_TAG_REGEX = re.compile(r"^rev[\s|-](.*)$", re.I)
@@ -310,11 +290,14 @@ class ParsedRomFiles:
     md5_hash: str
     sha1_hash: str
     ra_hash: str
+    # Whether only the CRC of some files was read, see `SCAN_ZIP_CRC_ONLY`
+    crc_only: bool = False
 
 
 class FSRomsHandler(FSHandler):
     def __init__(self) -> None:
         super().__init__(base_path=LIBRARY_BASE_PATH)
+        self.hashing_engine = HashingEngine()
 
     def get_roms_fs_structure(self, fs_slug: str) -> str:
         cnfg = cm.get_config()
@@ -423,8 +406,26 @@ class FSRomsHandler(FSHandler):
         )
 
     async def get_rom_files(
-        self, rom: Rom, calculate_hashes: bool = True
+        self,
+        rom: Rom,
+        calculate_hashes: bool = True,
+        should_stop: Callable[[], bool] | None = None,
+        crc_only: bool = False,
+        ra_hasher_stats: StageStats | None = None,
     ) -> ParsedRomFiles:
+        """Build the files of a ROM, hashing them in the hashing worker processes
+
+        Args:
+            rom: ROM to get the files for
+            calculate_hashes: Whether to calculate the file hashes
+            should_stop: Callback checked while hashing, to cancel it when the scan is stopped
+            crc_only: Whether to only read the CRC of ZIP files from their header,
+                leaving their MD5 and SHA1 empty
+            ra_hasher_stats: Stats to record the RAHasher runs of the platform in
+
+        Raises:
+            ScanStoppedException: If hashing was cancelled because the scan was stopped
+        """
         from adapters.services.rahasher import RAHasherService
         from handler.metadata import meta_ra_handler
 
@@ -432,7 +433,6 @@ class FSRomsHandler(FSHandler):
             rom.platform.fs_slug
         )  # Relative path to roms
         abs_fs_path = self.validate_path(rel_roms_path)  # Absolute path to roms
-        rom_files: list[RomFile] = []
 
         # Skip hashing games for platforms that don't have a hash database or when hashes are disabled
         hashable_platform = (
@@ -442,21 +442,23 @@ class FSRomsHandler(FSHandler):
         excluded_file_names = cm.get_config().EXCLUDED_MULTI_PARTS_FILES
         excluded_file_exts = cm.get_config().EXCLUDED_MULTI_PARTS_EXT
 
-        rom_crc_c = 0
-        rom_md5_h = hashlib.md5(usedforsecurity=False) if calculate_hashes else None
-        rom_sha1_h = hashlib.sha1(usedforsecurity=False) if calculate_hashes else None
-        rom_ra_h = ""
+        async def calculate_ra_hash(file_path: str) -> str:
+            # Calculate the RA hash if the platform has a slug that matches a known RA slug
+            ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
+            if ra_platform and ra_platform["ra_id"]:
+                return await RAHasherService().calculate_hash(
+                    ra_platform["ra_id"], file_path, stats=ra_hasher_stats
+                )
+            return ""
+
+        # Files of the rom, as (path relative to the library, file name, is top-level)
+        rom_paths: list[tuple[Path, str, bool]] = []
+        ra_hash_path: str | None = None
 
         # Check if rom is a multi-part rom
         if os.path.isdir(f"{abs_fs_path}/{rom.fs_name}"):
-            # Calculate the RA hash if the platform has a slug that matches a known RA slug
             if calculate_hashes:
-                ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
-                if ra_platform and ra_platform["ra_id"]:
-                    rom_ra_h = await RAHasherService().calculate_hash(
-                        ra_platform["ra_id"],
-                        f"{abs_fs_path}/{rom.fs_name}/*",
-                    )
+                ra_hash_path = f"{abs_fs_path}/{rom.fs_name}/*"
 
             for f_path, file_name in iter_files(
                 f"{abs_fs_path}/{rom.fs_name}", recursive=True
@@ -474,129 +476,268 @@ class FSRomsHandler(FSHandler):
 
                 # Check if this is a top-level file (not in a subdirectory)
                 is_top_level = f_path.samefile(Path(abs_fs_path, rom.fs_name))
+                rom_paths.append(
+                    (f_path.relative_to(self.base_path), file_name, is_top_level)
+                )
+        else:
+            if hashable_platform:
+                ra_hash_path = f"{abs_fs_path}/{rom.fs_name}"
+
+            rom_paths.append((Path(rel_roms_path), rom.fs_name, True))
+
+        file_hashes = [EMPTY_FILE_HASH] * len(rom_paths)
+        rom_hash = EMPTY_FILE_HASH
+        # Files with only their CRC read, which must be fully hashed later on
+        crc_only_indexes: set[int] = set()
+
+        # Hashes of unchanged files are reused from the previous scan
+        use_hashes_cache = hashable_platform or bool(ra_hash_path)
+        cache_key = f"{ROM_HASHES_KEY_PREFIX}:{rel_roms_path}/{rom.fs_name}"
+        fingerprints = [
+            _file_fingerprint(Path(self.base_path, rom_path, file_name))
+            for rom_path, file_name, _ in rom_paths
+        ]
+        cached_entry = (
+            await self._get_cached_rom_hashes(cache_key) if use_hashes_cache else None
+        )
+        if use_hashes_cache and cached_entry is None:
+            # The files stored by the last scan seed the cache, e.g. after a Redis flush
+            cached_entry = self._get_db_rom_hashes(rom, rom_paths, fingerprints)
+        top_level_indexes = [i for i, p in enumerate(rom_paths) if p[2]]
+        nested_indexes = [i for i, p in enumerate(rom_paths) if not p[2]]
+        top_level_fingerprints = [fingerprints[i] for i in top_level_indexes]
+        # Hashes of files that couldn't be accessed are never cached
+        valid_fingerprints = [f for f in fingerprints if f is not None]
+        valid_top_level_fingerprints = [
+            f for f in top_level_fingerprints if f is not None
+        ]
 
-                if hashable_platform:
-                    try:
-                        if is_top_level:
-                            # Include this file in the main ROM hash calculation
-                            crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
-                                self._calculate_rom_hashes(
-                                    Path(f_path, file_name),
-                                    rom_crc_c,
-                                    rom_md5_h,
-                                    rom_sha1_h,
-                                )
-                            )
-                        else:
-                            # Calculate individual file hash only
-                            crc_c, _, md5_h, _, sha1_h, _ = self._calculate_rom_hashes(
-                                Path(f_path, file_name),
-                                0,
-                                hashlib.md5(usedforsecurity=False),
-                                hashlib.sha1(usedforsecurity=False),
-                            )
-                    except zlib.error:
-                        crc_c = 0
-                        md5_h = hashlib.md5(usedforsecurity=False)
-                        sha1_h = hashlib.sha1(usedforsecurity=False)
-
-                    file_hash = FileHash(
-                        crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
-                        md5_hash=(
-                            md5_h.hexdigest()
-                            if md5_h.digest() != DEFAULT_MD5_H_DIGEST
-                            else ""
-                        ),
-                        sha1_hash=(
-                            sha1_h.hexdigest()
-                            if sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                            else ""
-                        ),
+        # RAHasher runs as a subprocess, concurrently with the file hashing
+        ra_hash_task: asyncio.Task[str] | None = None
+        cached_ra_hash: str | None = None
+        if ra_hash_path:
+            if cached_entry and cached_entry["ra_fingerprint"] == fingerprints:
+                cached_ra_hash = cached_entry["ra_hash"]
+            else:
+                ra_hash_task = asyncio.create_task(calculate_ra_hash(ra_hash_path))
+
+        if hashable_platform:
+            # Top-level files are hashed together to get the main ROM hash, while
+            # files in subdirectories are hashed on their own, in parallel
+            jobs: list[list[int]] = []
+            if top_level_indexes:
+                cached_top_level_hashes = [
+                    self._get_cached_file_hash(
+                        cached_entry, rom_paths[i], fingerprints[i]
                     )
+                    for i in top_level_indexes
+                ]
+                if (
+                    cached_entry
+                    and cached_entry["combined_fingerprint"] == top_level_fingerprints
+                    and all(cached_top_level_hashes)
+                ):
+                    rom_hash = cached_entry["combined_hash"]
+                    for i, cached_file_hash in zip(
+                        top_level_indexes, cached_top_level_hashes, strict=True
+                    ):
+                        file_hashes[i] = cached_file_hash or EMPTY_FILE_HASH
                 else:
-                    file_hash = FileHash(
-                        crc_hash="",
-                        md5_hash="",
-                        sha1_hash="",
-                    )
+                    jobs.append(top_level_indexes)
 
-                rom_files.append(
-                    self._build_rom_file(
-                        rom=rom,
-                        rom_path=f_path.relative_to(self.base_path),
-                        file_name=file_name,
-                        file_hash=file_hash,
-                    )
+            for i in nested_indexes:
+                cached_file_hash = self._get_cached_file_hash(
+                    cached_entry, rom_paths[i], fingerprints[i]
                 )
-        elif hashable_platform:
+                if cached_file_hash is not None:
+                    file_hashes[i] = cached_file_hash
+                else:
+                    jobs.append([i])
+
             try:
-                crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
-                    self._calculate_rom_hashes(
-                        Path(abs_fs_path, rom.fs_name), rom_crc_c, rom_md5_h, rom_sha1_h
+                hashed_jobs = await asyncio.gather(
+                    *(
+                        self.hashing_engine.hash_files(
+                            [
+                                Path(self.base_path, rom_paths[i][0], rom_paths[i][1])
+                                for i in job
+                            ],
+                            should_stop=should_stop,
+                            crc_only=crc_only,
+                        )
+                        for job in jobs
                     )
                 )
-            except zlib.error:
-                crc_c = 0
-                md5_h = hashlib.md5(usedforsecurity=False)
-                sha1_h = hashlib.sha1(usedforsecurity=False)
-
-            # Calculate the RA hash if the platform has a slug that matches a known RA slug
-            if calculate_hashes:
-                ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
-                if ra_platform and ra_platform["ra_id"]:
-                    rom_ra_h = await RAHasherService().calculate_hash(
-                        ra_platform["ra_id"],
-                        f"{abs_fs_path}/{rom.fs_name}",
-                    )
-
-            file_hash = FileHash(
-                crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
-                md5_hash=(
-                    md5_h.hexdigest() if md5_h.digest() != DEFAULT_MD5_H_DIGEST else ""
+            except HashingCancelledError as e:
+                if ra_hash_task:
+                    ra_hash_task.cancel()
+                raise ScanStoppedException() from e
+
+            for job, hashed_files in zip(jobs, hashed_jobs, strict=True):
+                for i, file_hash in zip(job, hashed_files.file_hashes, strict=True):
+                    file_hashes[i] = file_hash
+                if job is top_level_indexes:
+                    rom_hash = hashed_files.combined_hash
+                if hashed_files.crc_only:
+                    crc_only_indexes.update(job)
+
+        rom_ra_h = await ra_hash_task if ra_hash_task else cached_ra_hash or ""
+
+        if use_hashes_cache:
+            await self._set_cached_rom_hashes(
+                cache_key,
+                RomHashesCacheEntry(
+                    files={
+                        _file_cache_field(rom_paths[i]): CachedFileHash(
+                            fingerprint=fingerprint, **file_hashes[i]
+                        )
+                        for i, fingerprint in enumerate(fingerprints)
+                        if hashable_platform
+                        and fingerprint is not None
+                        and i not in crc_only_indexes
+                    },
+                    combined_fingerprint=(
+                        valid_top_level_fingerprints
+                        if hashable_platform
+                        and len(valid_top_level_fingerprints)
+                        == len(top_level_fingerprints)
+                        and crc_only_indexes.isdisjoint(top_level_indexes)
+                        else []
+                    ),
+                    combined_hash=rom_hash,
+                    # Failed RAHasher runs are retried on the next scan
+                    ra_fingerprint=(
+                        valid_fingerprints
+                        if rom_ra_h and len(valid_fingerprints) == len(fingerprints)
+                        else []
+                    ),
+                    ra_hash=rom_ra_h,
                 ),
-                sha1_hash=(
-                    sha1_h.hexdigest()
-                    if sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                    else ""
-                ),
-            )
-            rom_files.append(
-                self._build_rom_file(
-                    rom=rom,
-                    rom_path=Path(rel_roms_path),
-                    file_name=rom.fs_name,
-                    file_hash=file_hash,
-                )
             )
-        else:
-            file_hash = FileHash(
-                crc_hash="",
-                md5_hash="",
-                sha1_hash="",
+
+        rom_files = [
+            self._build_rom_file(
+                rom=rom,
+                rom_path=rom_path,
+                file_name=file_name,
+                file_hash=file_hash,
             )
-            rom_files.append(
-                self._build_rom_file(
-                    rom=rom,
-                    rom_path=Path(rel_roms_path),
-                    file_name=rom.fs_name,
-                    file_hash=file_hash,
-                )
+            for (rom_path, file_name, _), file_hash in zip(
+                rom_paths, file_hashes, strict=True
             )
+        ]
 
         return ParsedRomFiles(
             rom_files=rom_files,
-            crc_hash=crc32_to_hex(rom_crc_c) if rom_crc_c != DEFAULT_CRC_C else "",
-            md5_hash=(
-                rom_md5_h.hexdigest()
-                if rom_md5_h and rom_md5_h.digest() != DEFAULT_MD5_H_DIGEST
-                else ""
+            crc_hash=rom_hash["crc_hash"],
+            md5_hash=rom_hash["md5_hash"],
+            sha1_hash=rom_hash["sha1_hash"],
+            ra_hash=rom_ra_h,
+            crc_only=bool(crc_only_indexes),
+        )
+
+    async def _get_cached_rom_hashes(self, key: str) -> RomHashesCacheEntry | None:
+        try:
+            cached_entry = await async_cache.get(key)
+            return json.loads(cached_entry) if cached_entry else None
+        except (json.JSONDecodeError, RedisError) as e:
+            log.warning(f"Failed to read cached hashes from {key}: {e}")
+            return None
+
+    async def _set_cached_rom_hashes(
+        self, key: str, entry: RomHashesCacheEntry
+    ) -> None:
+        try:
+            await async_cache.set(key, json.dumps(entry), ex=ROM_HASHES_CACHE_TTL)
+        except RedisError as e:
+            log.warning(f"Failed to cache hashes in {key}: {e}")
+
+    def _get_db_rom_hashes(
+        self,
+        rom: Rom,
+        rom_paths: list[tuple[Path, str, bool]],
+        fingerprints: list[list[int] | None],
+    ) -> RomHashesCacheEntry | None:
+        """Build a hashes cache entry from the files of the ROM in the database
+
+        Only the hashes of files with an unchanged size and modification time
+        are reused, and only if they were fully hashed.
+        """
+        # Files aren't loaded for ROMs fetched without their details
+        if "files" in inspect(rom).unloaded or not rom.files:
+            return None
+
+        rom_files = {
+            (rom_file.file_path, rom_file.file_name): rom_file for rom_file in rom.files
+        }
+        files: dict[str, CachedFileHash] = {}
+        for rom_path, fingerprint in zip(rom_paths, fingerprints, strict=True):
+            rom_file = rom_files.get((str(rom_path[0]), rom_path[1]))
+            if (
+                fingerprint is None
+                or rom_file is None
+                or not (rom_file.crc_hash and rom_file.md5_hash and rom_file.sha1_hash)
+                or not _rom_file_unchanged(rom_file, fingerprint)
+            ):
+                continue
+
+            files[_file_cache_field(rom_path)] = CachedFileHash(
+                fingerprint=fingerprint,
+                crc_hash=rom_file.crc_hash,
+                md5_hash=rom_file.md5_hash,
+                sha1_hash=rom_file.sha1_hash,
+            )
+
+        if not files:
+            return None
+
+        top_level_fingerprints = [
+            fingerprint
+            for rom_path, fingerprint in zip(rom_paths, fingerprints, strict=True)
+            if rom_path[2] and fingerprint is not None
+        ]
+        top_level_unchanged = all(
+            _file_cache_field(rom_path) in files
+            for rom_path in rom_paths
+            if rom_path[2]
+        )
+        return RomHashesCacheEntry(
+            files=files,
+            combined_fingerprint=(
+                top_level_fingerprints
+                if top_level_unchanged and rom.md5_hash and rom.sha1_hash
+                else []
             ),
-            sha1_hash=(
-                rom_sha1_h.hexdigest()
-                if rom_sha1_h and rom_sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                else ""
+            combined_hash=FileHash(
+                crc_hash=rom.crc_hash or "",
+                md5_hash=rom.md5_hash or "",
+                sha1_hash=rom.sha1_hash or "",
             ),
-            ra_hash=rom_ra_h,
+            ra_fingerprint=(
+                [fingerprint for fingerprint in fingerprints if fingerprint is not None]
+                if len(files) == len(rom_paths) and rom.ra_hash
+                else []
+            ),
+            ra_hash=rom.ra_hash or "",
+        )
+
+    def _get_cached_file_hash(
+        self,
+        cached_entry: RomHashesCacheEntry | None,
+        rom_path: tuple[Path, str, bool],
+        fingerprint: list[int] | None,
+    ) -> FileHash | None:
+        if not cached_entry or fingerprint is None:
+            return None
+
+        cached_file_hash = cached_entry["files"].get(_file_cache_field(rom_path))
+        if not cached_file_hash or cached_file_hash["fingerprint"] != fingerprint:
+            return None
+
+        return FileHash(
+            crc_hash=cached_file_hash["crc_hash"],
+            md5_hash=cached_file_hash["md5_hash"],
+            sha1_hash=cached_file_hash["sha1_hash"],
         )
 
     def _calculate_rom_hashes(
@@ -606,118 +747,255 @@ class FSRomsHandler(FSHandler):
         rom_md5_h: Any,
         rom_sha1_h: Any,
     ) -> tuple[int, int, Any, Any, Any, Any]:
-        extension = Path(file_path).suffix.lower()
-        mime = magic.Magic(mime=True)
-        try:
-            file_type = mime.from_file(file_path)
-
-            crc_c = 0
-            md5_h = hashlib.md5(usedforsecurity=False)
-            sha1_h = hashlib.sha1(usedforsecurity=False)
+        return calculate_rom_hashes(file_path, rom_crc_c, rom_md5_h, rom_sha1_h)
 
-            def update_hashes(chunk: bytes | bytearray):
-                md5_h.update(chunk)
-                rom_md5_h.update(chunk)
-
-                sha1_h.update(chunk)
-                rom_sha1_h.update(chunk)
-
-                nonlocal crc_c
-                crc_c = binascii.crc32(chunk, crc_c)
-                nonlocal rom_crc_c
-                rom_crc_c = binascii.crc32(chunk, rom_crc_c)
+    async def get_roms(self, platform: Platform) -> list[FSRom]:
+        """Gets all filesystem roms for a platform
 
-            if extension == ".zip" or file_type == "application/zip":
-                for chunk in read_zip_file(file_path):
-                    update_hashes(chunk)
+        Args:
+            platform: platform where roms belong
+        Returns:
+            list with all the filesystem roms for a platform
+        """
+        return (await self.get_roms_listing(platform)).roms
 
-            elif extension == ".tar" or file_type == "application/x-tar":
-                for chunk in read_tar_file(file_path):
-                    update_hashes(chunk)
+    async def get_roms_listing(
+        self, platform: Platform, use_manifest: bool = False
+    ) -> FSRomsListing:
+        """Gets all filesystem roms for a platform, and the ones known from the last scan
 
-            elif extension == ".gz" or file_type == "application/x-gzip":
-                for chunk in read_gz_file(file_path):
-                    update_hashes(chunk)
+        With `use_manifest`, the directory of the platform is only listed if it
+        was modified since the last scan, otherwise the roms are read from the
+        manifest of that scan. Roms are known if their files are the same as in
+        the manifest, which is ignored if the exclusion settings changed.
 
-            elif extension == ".7z" or file_type == "application/x-7z-compressed":
-                process_7z_file(
-                    file_path=file_path,
-                    fn_hash_update=update_hashes,
-                )
+        Args:
+            platform: platform where roms belong
+            use_manifest: whether to reuse the manifest of the last scan
+        Returns:
+            listing of the filesystem roms for a platform
+        """
+        rel_roms_path = self.get_roms_fs_structure(platform.fs_slug)
+        abs_roms_path = self.validate_path(rel_roms_path)
+        try:
+            dir_mtime_ns = os.stat(abs_roms_path).st_mtime_ns
+        except FileNotFoundError as e:
+            raise RomsNotFoundException(platform=platform.fs_slug) from e
 
-            elif extension == ".bz2" or file_type == "application/x-bzip2":
-                for chunk in read_bz2_file(file_path):
-                    update_hashes(chunk)
+        exclusions = _get_exclusions()
+        manifest = (
+            await self._get_roms_manifest(platform.fs_slug) if use_manifest else None
+        )
+        if manifest and manifest.get("exclusions") != exclusions:
+            manifest = None
 
-            elif extension == ".chd" or file_type == "application/x-mame-chd":
-                chd_hash = extract_chd_hash(file_path)
-                if chd_hash:
-                    sha1_h = cast(Any, CHDHashWrapper(chd_hash, name="sha1"))
-                    rom_sha1_h = cast(Any, CHDHashWrapper(chd_hash, name="sha1"))
-                else:
-                    # Not a valid v5 CHD, treat as basic file
-                    # This ensures CRC32 and MD5 are still calculated for non-v5 CHDs
-                    for chunk in read_basic_file(file_path):
-                        update_hashes(chunk)
+        if manifest and manifest["dir_mtime_ns"] == dir_mtime_ns:
+            fs_roms: list[FSRomsManifestEntry] = manifest["roms"]
+        else:
+            try:
+                fs_single_roms = await self.list_files(path=rel_roms_path)
+                fs_multi_roms = await self.list_directories(path=rel_roms_path)
+            except FileNotFoundError as e:
+                raise RomsNotFoundException(platform=platform.fs_slug) from e
+
+            fs_roms = [
+                FSRomsManifestEntry(fs_name=rom, flat=True, nested=False)
+                for rom in self.exclude_single_files(fs_single_roms)
+            ] + [
+                FSRomsManifestEntry(fs_name=rom, flat=False, nested=True)
+                for rom in self.exclude_multi_roms(fs_multi_roms)
+            ]
+
+        fingerprints = await asyncio.to_thread(
+            _get_roms_fingerprints, abs_roms_path, fs_roms
+        )
 
-            else:
-                for chunk in read_basic_file(file_path):
-                    update_hashes(chunk)
-
-            return crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h
-        except (FileNotFoundError, PermissionError):
-            return (
-                0,
-                rom_crc_c,
-                hashlib.md5(usedforsecurity=False),
-                rom_md5_h,
-                hashlib.sha1(usedforsecurity=False),
-                rom_sha1_h,
+        known_fs_names = None
+        if manifest:
+            unscanned_fs_names = set(manifest["unscanned"])
+            known_fs_names = frozenset(
+                rom["fs_name"]
+                for rom in manifest["roms"]
+                if rom["fs_name"] not in unscanned_fs_names
+                and fingerprints.get(rom["fs_name"])
+                == (rom.get("size"), rom.get("mtime_ns"))
             )
 
-    async def get_roms(self, platform: Platform) -> list[FSRom]:
-        """Gets all filesystem roms for a platform
+        return FSRomsListing(
+            roms=sorted(
+                [_new_fs_rom(rom["fs_name"], nested=rom["nested"]) for rom in fs_roms],
+                key=lambda rom: rom["fs_name"],
+            ),
+            dir_mtime_ns=dir_mtime_ns,
+            fingerprints=fingerprints,
+            exclusions=exclusions,
+            known_fs_names=known_fs_names,
+        )
+
+    async def get_roms_by_fs_names(
+        self, platform: Platform, fs_names: Iterable[str]
+    ) -> list[FSRom]:
+        """Gets the listed filesystem roms of a platform, without listing its directory
 
         Args:
             platform: platform where roms belong
+            fs_names: names of the roms to look for
         Returns:
-            list with all the filesystem roms for a platform
+            list with the roms that exist in the filesystem and aren't excluded
         """
-        try:
-            rel_roms_path = self.get_roms_fs_structure(
-                platform.fs_slug
-            )  # Relative path to roms
+        abs_roms_path = self.validate_path(self.get_roms_fs_structure(platform.fs_slug))
 
-            fs_single_roms = await self.list_files(path=rel_roms_path)
-            fs_multi_roms = await self.list_directories(path=rel_roms_path)
-        except FileNotFoundError as e:
-            raise RomsNotFoundException(platform=platform.fs_slug) from e
-
-        fs_roms: list[dict] = [
-            {"fs_name": rom, "flat": True, "nested": False}
-            for rom in self.exclude_single_files(fs_single_roms)
-        ] + [
-            {"fs_name": rom, "flat": False, "nested": True}
-            for rom in self.exclude_multi_roms(fs_multi_roms)
-        ]
+        single_roms: list[str] = []
+        multi_roms: list[str] = []
+        for fs_name in fs_names:
+            rom_path = abs_roms_path / fs_name
+            if rom_path.is_file():
+                single_roms.append(fs_name)
+            elif rom_path.is_dir():
+                multi_roms.append(fs_name)
 
         return sorted(
             [
-                FSRom(
-                    fs_name=rom["fs_name"],
-                    flat=rom["flat"],
-                    nested=rom["nested"],
-                    files=[],
-                    crc_hash="",
-                    md5_hash="",
-                    sha1_hash="",
-                    ra_hash="",
-                )
-                for rom in fs_roms
+                _new_fs_rom(fs_name, nested=False)
+                for fs_name in self.exclude_single_files(single_roms)
+            ]
+            + [
+                _new_fs_rom(fs_name, nested=True)
+                for fs_name in self.exclude_multi_roms(multi_roms)
             ],
             key=lambda rom: rom["fs_name"],
         )
 
+    async def find_renamed_roms(
+        self,
+        platform: Platform,
+        removed_roms: Sequence[Rom],
+        fs_roms: Sequence[FSRom],
+    ) -> dict[str, Rom]:
+        """Match roms removed from the filesystem with new roms holding the same files
+
+        A renamed file keeps its inode, so the inodes of the new roms are compared
+        with the fingerprints cached when the removed roms were last hashed.
+
+        Args:
+            platform: platform where roms belong
+            removed_roms: roms no longer found in the filesystem
+            fs_roms: roms found in the filesystem, but not in the database
+        Returns:
+            dict with the removed rom that each new rom name was renamed from
+        """
+        if not removed_roms or not fs_roms:
+            return {}
+
+        rel_roms_path = self.get_roms_fs_structure(platform.fs_slug)
+        abs_roms_path = self.validate_path(rel_roms_path)
+
+        removed_roms_inodes: list[tuple[Rom, set[tuple[int, int]]]] = []
+        for rom in removed_roms:
+            cached_entry = await self._get_cached_rom_hashes(
+                f"{ROM_HASHES_KEY_PREFIX}:{rel_roms_path}/{rom.fs_name}"
+            )
+            if cached_entry and cached_entry["files"]:
+                removed_roms_inodes.append(
+                    (
+                        rom,
+                        {
+                            (file["fingerprint"][2], file["fingerprint"][3])
+                            for file in cached_entry["files"].values()
+                        },
+                    )
+                )
+
+        renamed_roms: dict[str, Rom] = {}
+        for fs_rom in fs_roms:
+            if not removed_roms_inodes:
+                break
+
+            rom_path = abs_roms_path / fs_rom["fs_name"]
+            file_paths = (
+                [
+                    Path(root, file)
+                    for root, file in iter_files(str(rom_path), recursive=True)
+                ]
+                if fs_rom["nested"]
+                else [rom_path]
+            )
+            inodes = set()
+            for file_path in file_paths:
+                stat = os.stat(file_path)
+                inodes.add((stat.st_ino, stat.st_dev))
+
+            for index, (rom, rom_inodes) in enumerate(removed_roms_inodes):
+                # Excluded files aren't hashed, so they are missing from the cache
+                if rom_inodes <= inodes:
+                    renamed_roms[fs_rom["fs_name"]] = rom
+                    del removed_roms_inodes[index]
+                    break
+
+        return renamed_roms
+
+    async def save_roms_manifest(
+        self,
+        platform: Platform,
+        listing: FSRomsListing,
+        unscanned_fs_names: Iterable[str] = (),
+    ) -> None:
+        """Store the listing of a platform once its roms have been scanned
+
+        Args:
+            platform: platform where roms belong
+            listing: listing the scan started from
+            unscanned_fs_names: roms that failed to scan, to retry on the next scan
+        """
+        # A recent change could share the mtime of a later one, so don't reuse it
+        min_mtime_ns = time.time_ns() - ROMS_MANIFEST_MIN_AGE * 1_000_000_000
+        dir_mtime_ns = listing.dir_mtime_ns
+        if dir_mtime_ns > min_mtime_ns:
+            dir_mtime_ns = 0
+
+        manifest_roms: list[FSRomsManifestEntry] = []
+        for rom in listing.roms:
+            entry = FSRomsManifestEntry(
+                fs_name=rom["fs_name"], flat=rom["flat"], nested=rom["nested"]
+            )
+            # Roms that couldn't be read are never known to the next scan
+            fingerprint = listing.fingerprints.get(rom["fs_name"])
+            if fingerprint is not None:
+                entry["size"], entry["mtime_ns"] = fingerprint
+                if entry["mtime_ns"] > min_mtime_ns:
+                    entry["mtime_ns"] = 0
+            manifest_roms.append(entry)
+
+        manifest = FSRomsManifest(
+            dir_mtime_ns=dir_mtime_ns,
+            exclusions=listing.exclusions,
+            roms=manifest_roms,
+            unscanned=sorted(unscanned_fs_names),
+        )
+        try:
+            await async_cache.set(
+                f"{ROMS_MANIFEST_KEY_PREFIX}:{platform.fs_slug}",
+                json.dumps(manifest),
+                ex=ROMS_MANIFEST_TTL,
+            )
+        except RedisError as e:
+            log.warning(f"Failed to store the roms manifest of {platform.fs_slug}: {e}")
+
+    async def clear_roms_manifest(self, fs_slug: str) -> None:
+        """Forget the last scan of a platform, so the next quick scan checks every rom"""
+        try:
+            await async_cache.delete(f"{ROMS_MANIFEST_KEY_PREFIX}:{fs_slug}")
+        except RedisError as e:
+            log.warning(f"Failed to clear the roms manifest of {fs_slug}: {e}")
+
+    async def _get_roms_manifest(self, fs_slug: str) -> FSRomsManifest | None:
+        try:
+            manifest = await async_cache.get(f"{ROMS_MANIFEST_KEY_PREFIX}:{fs_slug}")
+            return json.loads(manifest) if manifest else None
+        except (json.JSONDecodeError, RedisError) as e:
+            log.warning(f"Failed to read the roms manifest of {fs_slug}: {e}")
+            return None
+
     async def rename_fs_rom(self, old_name: str, new_name: str, fs_path: str) -> None:
         if new_name != old_name:
             file_path = f"{fs_path}/{new_name}"
@@ -1,3 +1,4 @@
+from .dat_handler import DATHandler
 from .flashpoint_handler import FlashpointHandler
 from .gamelist_handler import GamelistHandler
 from .hasheous_handler import HasheousHandler
@@ -23,3 +24,4 @@ meta_tgdb_handler = TGDBHandler()
 meta_flashpoint_handler = FlashpointHandler()
 meta_gamelist_handler = GamelistHandler()
 meta_hltb_handler = HLTBHandler()
+meta_dat_handler = DATHandler()
@@ -1,24 +1,33 @@
 import abc
+import asyncio
+import copy
 import enum
+import functools
 import json
 import re
 import unicodedata
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Final, NotRequired, TypedDict
+from typing import (
+    Any,
+    Concatenate,
+    Final,
+    NotRequired,
+    ParamSpec,
+    TypedDict,
+    TypeVar,
+)
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
-from strsimpy.jaro_winkler import JaroWinkler
-
 from handler.redis_handler import async_cache
 from logger.logger import log
 from tasks.scheduled.update_switch_titledb import (
     SWITCH_PRODUCT_ID_KEY,
     SWITCH_TITLEDB_INDEX_KEY,
 )
-
-jarowinkler = JaroWinkler()
-
+from utils.fuzzy_match import extract_best_match
 
 METADATA_FIXTURES_DIR: Final = Path(__file__).parent / "fixtures"
 
@@ -109,6 +118,70 @@ def strip_sensitive_query_params(
     return urlunparse(parsed._replace(query=new_query))
 
 
+H = TypeVar("H", bound="MetadataHandler")
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class _InFlightLookup:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+# Lookups being sent, shared by the concurrent callers with the same arguments
+_in_flight_lookups: dict[tuple[str, str], _InFlightLookup] = {}
+
+
+def single_flight(
+    func: Callable[Concatenate[H, P], Coroutine[Any, Any, R]],
+) -> Callable[Concatenate[H, P], Coroutine[Any, Any, R]]:
+    """Share a lookup between the concurrent calls with the same arguments
+
+    Sibling ROMs often lead to the same search or ID lookup at the same time,
+    which is then only sent once. Calls are keyed by the method and its
+    arguments, and calls with arguments that can't be serialized to JSON (like
+    a ROM) are sent as is. Each caller gets its own deep copy of the result,
+    so changes to nested values don't leak into the results of the others.
+    The lookup is cancelled once all of its callers are.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: H, *args: P.args, **kwargs: P.kwargs) -> R:
+        try:
+            key = (func.__qualname__, json.dumps([args, kwargs], sort_keys=True))
+        except TypeError:
+            return await func(self, *args, **kwargs)
+
+        lookup = _in_flight_lookups.get(key)
+        # Tasks can't be awaited from the event loops of other jobs
+        if lookup is None or lookup.task.get_loop() is not asyncio.get_running_loop():
+            lookup = _InFlightLookup(asyncio.create_task(func(self, *args, **kwargs)))
+            _in_flight_lookups[key] = lookup
+
+            def forget(done: asyncio.Task) -> None:
+                if (shared := _in_flight_lookups.get(key)) and shared.task is done:
+                    del _in_flight_lookups[key]
+
+            lookup.task.add_done_callback(forget)
+
+        lookup.waiters += 1
+        try:
+            # Unlike awaiting the task, waiting for it doesn't cancel it along
+            # with this caller
+            await asyncio.wait([lookup.task])
+        finally:
+            lookup.waiters -= 1
+            if lookup.waiters == 0 and not lookup.task.done():
+                lookup.task.cancel()
+                if _in_flight_lookups.get(key) is lookup:
+                    del _in_flight_lookups[key]
+
+        return copy.deepcopy(lookup.task.result())
+
+    return wrapper
+
+
 class MetadataHandler(abc.ABC):
     SEARCH_TERM_SPLIT_PATTERN = re.compile(r"[\:\-\/]")
     SEARCH_TERM_NORMALIZER = re.compile(r"\s*[:-]\s+")
@@ -147,32 +220,25 @@ class MetadataHandler(abc.ABC):
         if not game_names:
             return None, 0.0
 
-        best_match = None
-        best_score = 0.0
         search_term_normalized = self.normalize_search_term(search_term)
-
+        game_names_normalized = []
         for game_name in game_names:
-            game_name_normalized = self.normalize_search_term(game_name)
-
+            name = game_name
             # If the game name is split, normalize the last term
-            if split_game_name and re.search(self.SEARCH_TERM_SPLIT_PATTERN, game_name):
-                game_name_normalized = self.normalize_search_term(
-                    re.split(self.SEARCH_TERM_SPLIT_PATTERN, game_name)[-1]
-                )
-
-            score = jarowinkler.similarity(search_term_normalized, game_name_normalized)
-            if score > best_score:
-                best_score = score
-                best_match = game_name
-
-                # Early exit for perfect match
-                if score == 1.0:
-                    break
-
-        if best_score >= min_similarity_score:
-            return best_match, best_score
+            if split_game_name and re.search(self.SEARCH_TERM_SPLIT_PATTERN, name):
+                name = re.split(self.SEARCH_TERM_SPLIT_PATTERN, name)[-1]
+            game_names_normalized.append(self.normalize_search_term(name))
+
+        # All candidates are scored in one pass, skipping those that can't match
+        best_index, best_score = extract_best_match(
+            search_term_normalized,
+            game_names_normalized,
+            score_cutoff=min_similarity_score,
+        )
+        if best_index is None:
+            return None, 0.0
 
-        return None, 0.0
+        return game_names[best_index], best_score
 
     async def _ps2_opl_format(self, match: re.Match[str], search_term: str) -> str:
         serial_code = match.group(1)
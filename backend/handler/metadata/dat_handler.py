@@ -0,0 +1,201 @@
+import json
+from collections.abc import Callable, Iterator
+from typing import IO, Final, Literal, NotRequired, TypedDict, cast
+
+from defusedxml import ElementTree as ET
+from redis.exceptions import RedisError
+
+from handler.redis_handler import async_cache
+from logger.logger import log
+from models.rom import RomFile
+
+from .hasheous_handler import HasheousMetadata
+
+DAT_INDEX_KEY_PREFIX: Final[str] = "romm:dat_index"
+
+DATHashType = Literal["sha1", "md5", "crc"]
+# Strongest hashes are checked first
+DAT_HASH_TYPES: Final[tuple[DATHashType, ...]] = ("sha1", "md5", "crc")
+
+# Verification flag of `hasheous_metadata` set by the DATs of each source,
+# matched against the name, description, category and homepage of the DAT header
+DAT_SOURCES: Final[dict[str, tuple[str, ...]]] = {
+    "nointro_match": ("no-intro", "nointro"),
+    "redump_match": ("redump",),
+    "tosec_match": ("tosec",),
+    "fbneo_match": ("fbneo", "finalburn neo"),
+    "mame_arcade_match": ("mame",),
+    "whdload_match": ("whdload",),
+    "puredos_match": ("puredos", "exodos"),
+}
+# DATs from other sources identify ROMs without verifying them
+DAT_OTHER_SOURCE: Final[str] = "other"
+
+
+class DATRom(TypedDict):
+    name: str
+    dat: str
+    regions: list[str]
+    size: NotRequired[int | None]
+    source: str
+
+
+class DATRomHashes(TypedDict):
+    size: int | None
+    crc: str
+    md5: str
+    sha1: str
+
+
+class DATGame(TypedDict):
+    name: str
+    roms: list[DATRomHashes]
+
+
+def get_dat_index_key(source: str, hash_type: DATHashType) -> str:
+    return f"{DAT_INDEX_KEY_PREFIX}:{source}:{hash_type}"
+
+
+def detect_dat_source(header: dict[str, str]) -> str:
+    """Get the source of a DAT file from its header, as a verification flag
+
+    Args:
+        header: Text of the elements of the DAT header, by tag
+    """
+    text = " ".join(
+        header.get(tag, "")
+        for tag in ("name", "description", "category", "homepage", "url")
+    ).lower()
+    for source, markers in DAT_SOURCES.items():
+        if any(marker in text for marker in markers):
+            return source
+    return DAT_OTHER_SOURCE
+
+
+def _parse_size(size: str | None) -> int | None:
+    try:
+        return int(size) if size else None
+    except ValueError:
+        return None
+
+
+def iter_dat_games(
+    file: IO[bytes], on_header: Callable[[dict[str, str]], None]
+) -> Iterator[DATGame]:
+    """Parse the games (or MAME machines) of a Logiqx XML DAT file, one at a time
+
+    Args:
+        file: DAT file, opened in binary mode
+        on_header: Called with the text of the header elements by tag, before
+            the first game
+    """
+    for _, elem in ET.iterparse(file, events=("end",)):
+        if elem.tag == "header":
+            on_header({child.tag: (child.text or "").strip() for child in elem})
+            elem.clear()
+        elif elem.tag in ("game", "machine"):
+            roms = [
+                DATRomHashes(
+                    size=_parse_size(rom.get("size")),
+                    crc=rom.get("crc", "").lower(),
+                    md5=rom.get("md5", "").lower(),
+                    sha1=rom.get("sha1", "").lower(),
+                )
+                for rom in elem.iter("rom")
+                if rom.get("status") != "nodump"
+            ]
+            name = elem.get("name", "")
+            if name and roms:
+                yield DATGame(name=name, roms=roms)
+            elem.clear()
+
+
+class DATHandler:
+    """Identify ROMs by their hashes, in the local index of imported DAT files
+
+    The index is filled by the DAT import task, from the No-Intro, Redump,
+    TOSEC and other Logiqx DAT files in the DATs folder, so lookups don't
+    need any network access.
+    """
+
+    async def lookup_rom(self, files: list[RomFile]) -> DATRom | None:
+        """Find the game of a ROM in the imported DATs
+
+        Files are checked from the largest to the smallest, and a CRC32 only
+        matches if the file size also matches.
+
+        Args:
+            files: Hashed files of the ROM
+        """
+        hashed_files = sorted(
+            (
+                file
+                for file in files
+                if file.file_size_bytes > 0
+                and (file.sha1_hash or file.md5_hash or file.crc_hash)
+            ),
+            key=lambda f: f.file_size_bytes,
+            reverse=True,
+        )
+        if not hashed_files:
+            return None
+
+        sources = [*DAT_SOURCES, DAT_OTHER_SOURCE]
+        lookups: list[tuple[RomFile, DATHashType]] = [
+            (file, hash_type)
+            for file in hashed_files
+            for hash_type in DAT_HASH_TYPES
+            if _get_file_hash(file, hash_type)
+        ]
+
+        try:
+            async with async_cache.pipeline(transaction=False) as pipe:
+                for file, hash_type in lookups:
+                    for source in sources:
+                        await pipe.hget(
+                            get_dat_index_key(source, hash_type),
+                            _get_file_hash(file, hash_type),
+                        )
+                results = await pipe.execute()
+        except RedisError as e:
+            log.warning(f"Failed to look up ROM hashes in the DAT index: {e}")
+            return None
+
+        for index, (file, hash_type) in enumerate(lookups):
+            for offset, source in enumerate(sources):
+                entry = results[index * len(sources) + offset]
+                if not entry:
+                    continue
+
+                dat_rom = cast(DATRom, {**json.loads(entry), "source": source})
+                size = dat_rom.get("size")
+                if hash_type == "crc" and size and size != file.file_size_bytes:
+                    continue
+                return dat_rom
+
+        return None
+
+    @staticmethod
+    def merge_verification(
+        hasheous_metadata: HasheousMetadata | dict[str, bool] | None, dat_rom: DATRom
+    ) -> dict[str, bool]:
+        """Add the verification flag of the DAT source to the Hasheous flags
+
+        Args:
+            hasheous_metadata: Current verification flags of the ROM
+            dat_rom: DAT match of the ROM
+        """
+        merged = {key: bool(value) for key, value in (hasheous_metadata or {}).items()}
+        if dat_rom["source"] in DAT_SOURCES:
+            merged[dat_rom["source"]] = True
+        return merged
+
+
+def _get_file_hash(file: RomFile, hash_type: DATHashType) -> str:
+    match hash_type:
+        case "sha1":
+            return (file.sha1_hash or "").lower()
+        case "md5":
+            return (file.md5_hash or "").lower()
+        case "crc":
+            return (file.crc_hash or "").lower()
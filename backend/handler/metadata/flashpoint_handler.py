@@ -10,10 +10,12 @@ from fastapi import HTTPException, status
 from config import FLASHPOINT_API_ENABLED
 from logger.logger import log
 from utils import get_version, is_valid_uuid
+from utils.cache import cached_response
 from utils.context import ctx_httpx_client
 
 from .base_handler import MetadataHandler
 from .base_handler import UniversalPlatformSlug as UPS
+from .base_handler import single_flight
 
 
 class FlashpointPlatform(TypedDict):
@@ -105,6 +107,7 @@ class FlashpointHandler(MetadataHandler):
     def is_enabled(cls) -> bool:
         return FLASHPOINT_API_ENABLED
 
+    @cached_response("flashpoint")
     async def _request(self, url: str, query: dict) -> dict:
         """
         Sends a request to Flashpoint API.
@@ -227,6 +230,7 @@ class FlashpointHandler(MetadataHandler):
             flashpoint_id=platform["id"],
         )
 
+    @single_flight
     async def get_rom(self, fs_name: str, platform_slug: str) -> FlashpointRom:
         """
         Get ROM information from Flashpoint.
@@ -330,6 +334,7 @@ class FlashpointHandler(MetadataHandler):
             for game in games
         ]
 
+    @single_flight
     async def get_rom_by_id(self, flashpoint_id: str) -> FlashpointRom:
         """
         Get ROM information by Flashpoint ID.
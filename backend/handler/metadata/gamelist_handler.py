@@ -1,5 +1,8 @@
+import asyncio
 import glob
+import json
 import os
+import time
 import uuid
 from pathlib import Path
 from typing import Final, NotRequired, TypedDict
@@ -7,10 +10,12 @@ from xml.etree.ElementTree import Element  # trunk-ignore(bandit/B405)
 
 import pydash
 from defusedxml import ElementTree as ET
+from redis.exceptions import RedisError
 
 from config.config_manager import MetadataMediaType
 from config.config_manager import config_manager as cm
 from handler.filesystem import fs_platform_handler, fs_resource_handler
+from handler.redis_handler import async_cache
 from logger.logger import log
 from models.platform import Platform
 from models.rom import Rom
@@ -19,6 +24,13 @@ from .base_handler import BaseRom, MetadataHandler
 
 # https://github.com/Aloshi/EmulationStation/blob/master/GAMELISTS.md#reference
 
+# Parsed gamelist.xml entries, reused by all processes while the file is unchanged
+GAMELIST_CACHE_KEY_PREFIX: Final = "romm:gamelist"
+GAMELIST_CACHE_TTL: Final = 60 * 60 * 24 * 90  # 90 days
+# Files modified more recently than this (in seconds) aren't shared, as
+# coarse mtimes (e.g. NFS) could hide a change made in the same tick
+GAMELIST_CACHE_MIN_AGE: Final = 2
+
 
 def get_preferred_media_types() -> list[MetadataMediaType]:
     """Get preferred media types from config"""
@@ -253,12 +265,17 @@ def populate_rom_specific_paths(
     return updated_metadata
 
 
+class GamelistCacheEntry(TypedDict):
+    fingerprint: list[str | int]
+    roms: dict[str, GamelistRom]
+
+
 class GamelistHandler(MetadataHandler):
     """Handler for ES-DE gamelist.xml metadata source"""
 
     def __init__(self):
         # Cache for storing parsed gamelist data by platform ID
-        self._gamelist_cache = {}
+        self._gamelist_cache: dict[int, GamelistCacheEntry] = {}
 
     async def populate_cache(self, platform: Platform):
         if not self.is_enabled():
@@ -270,7 +287,7 @@ class GamelistHandler(MetadataHandler):
             return
 
         # Parse the gamelist file
-        self._parse_gamelist_xml(gamelist_file_path, platform)
+        await self._get_gamelist_roms(gamelist_file_path, platform)
 
     def clear_cache(self):
         """Clear the gamelist cache"""
@@ -294,105 +311,192 @@ class GamelistHandler(MetadataHandler):
 
         return None
 
-    def _parse_gamelist_xml(
+    def _get_gamelist_fingerprint(
+        self, gamelist_path: Path, platform: Platform
+    ) -> tuple[list[str | int], int]:
+        """Identify the parsed state of a gamelist.xml file.
+
+        Entries also depend on the media folders searched by ROM name and the
+        preferred media types, so they are part of it. Returns the fingerprint
+        and the latest modification time it includes, in nanoseconds.
+        """
+        gamelist_stat = gamelist_path.stat()
+        fingerprint: list[str | int] = [
+            str(gamelist_path),
+            gamelist_stat.st_size,
+            gamelist_stat.st_mtime_ns,
+            *sorted(media_type.value for media_type in get_preferred_media_types()),
+        ]
+        mtime_ns = gamelist_stat.st_mtime_ns
+
+        platform_dir = fs_platform_handler.get_platform_fs_structure(platform.fs_slug)
+        for folder_name in ESDE_MEDIA_MAP.values():
+            media_dir = fs_platform_handler.validate_path(
+                os.path.join(platform_dir, folder_name)
+            )
+            try:
+                media_mtime_ns = media_dir.stat().st_mtime_ns
+            except OSError:
+                media_mtime_ns = 0
+            fingerprint.append(media_mtime_ns)
+            mtime_ns = max(mtime_ns, media_mtime_ns)
+
+        return fingerprint, mtime_ns
+
+    async def _get_gamelist_roms(
         self, gamelist_path: Path, platform: Platform
     ) -> dict[str, GamelistRom]:
-        """Parse a gamelist.xml file and return ROM data indexed by filename.
-        Results are cached by platform ID  to avoid re-parsing the same file multiple times.
+        """Get the ROM data of a gamelist.xml file, indexed by filename.
+
+        Parsed entries are cached in memory and in Redis, shared by all the
+        processes, and reused until the gamelist.xml file changes.
         """
+        try:
+            fingerprint, mtime_ns = await asyncio.to_thread(
+                self._get_gamelist_fingerprint, gamelist_path, platform
+            )
+        except OSError as e:
+            log.error(f"Error reading gamelist.xml at {gamelist_path}: {e}")
+            return {}
+
         # Check if we already have cached data for this platform
-        cache_key = platform.id
-        if cache_key in self._gamelist_cache:
+        cached_entry = self._gamelist_cache.get(platform.id)
+        if cached_entry and cached_entry["fingerprint"] == fingerprint:
             log.debug(f"Using cached gamelist data for platform {platform.id}")
-            return self._gamelist_cache[cache_key]
+            return cached_entry["roms"]
 
-        preferred_media_types = get_preferred_media_types()
-        roms_data: dict[str, GamelistRom] = {}
+        cache_key = f"{GAMELIST_CACHE_KEY_PREFIX}:{platform.id}"
+        cached_entry = await self._get_cached_gamelist(cache_key)
+        if cached_entry and cached_entry["fingerprint"] == fingerprint:
+            log.debug(f"Using stored gamelist data for platform {platform.id}")
+            self._gamelist_cache[platform.id] = cached_entry
+            return cached_entry["roms"]
 
         try:
-            tree = ET.parse(gamelist_path)
-            root = tree.getroot()
-            if root is None:
-                return roms_data
-
-            for game in root.findall("game"):
-                path_elem = game.find("path")
-                if path_elem is None or path_elem.text is None:
-                    continue
-
-                # Handle relative paths
-                rom_path = path_elem.text
-                if rom_path.startswith("./"):
-                    rom_path = rom_path[2:]
-
-                # Extract filename for matching
-                rom_filename = os.path.basename(rom_path)
-
-                # Extract metadata
-                name_elem = game.find("name")
-                desc_elem = game.find("desc")
-                lang_elem = game.find("lang")
-                region_elem = game.find("region")
-
-                name = (
-                    name_elem.text if name_elem is not None and name_elem.text else ""
-                )
-                summary = (
-                    desc_elem.text if desc_elem is not None and desc_elem.text else ""
-                )
-                regions = (
-                    pydash.compact([region_elem.text])
-                    if region_elem is not None
-                    else []
-                )
-                languages = (
-                    pydash.compact([lang_elem.text]) if lang_elem is not None else []
-                )
-
-                # Build ROM data
-                rom_metadata = extract_metadata_from_gamelist_rom(game, platform)
-                rom_data = GamelistRom(
-                    gamelist_id=str(uuid.uuid4()),
-                    name=name,
-                    summary=summary,
-                    regions=regions,
-                    languages=languages,
-                    gamelist_metadata=rom_metadata,
-                )
-
-                # Choose which cover style to use
-                cover_url = rom_metadata["box2d_url"] or rom_metadata["image_url"]
-                if cover_url:
-                    rom_data["url_cover"] = cover_url
-
-                # Grab the manual
-                manual_url = rom_metadata["manual_url"]
-                if manual_url and MetadataMediaType.MANUAL in preferred_media_types:
-                    rom_data["url_manual"] = manual_url
-
-                # Build list of screenshot URLs
-                url_screenshots = []
-                if (
-                    rom_metadata["screenshot_url"]
-                    and MetadataMediaType.SCREENSHOT in preferred_media_types
-                ):
-                    url_screenshots.append(rom_metadata["screenshot_url"])
-                if (
-                    rom_metadata["title_screen_url"]
-                    and MetadataMediaType.TITLE_SCREEN in preferred_media_types
-                ):
-                    url_screenshots.append(rom_metadata["title_screen_url"])
-                rom_data["url_screenshots"] = url_screenshots
-
-                # Store by filename for matching
-                roms_data[rom_filename] = rom_data
-
-            # Cache the parsed data for this platform
-            self._gamelist_cache[cache_key] = roms_data
+            roms_data = await asyncio.to_thread(
+                self._parse_gamelist_xml, gamelist_path, platform
+            )
         except ET.ParseError as e:
             log.warning(f"Failed to parse gamelist.xml at {gamelist_path}: {e}")
+            return {}
         except Exception as e:
             log.error(f"Error reading gamelist.xml at {gamelist_path}: {e}")
+            return {}
+
+        # Cache the parsed data for this platform
+        entry = GamelistCacheEntry(fingerprint=fingerprint, roms=roms_data)
+        self._gamelist_cache[platform.id] = entry
+
+        # A recent change could share the mtime of a later one, so don't share it
+        if time.time_ns() - mtime_ns >= GAMELIST_CACHE_MIN_AGE * 1_000_000_000:
+            await self._set_cached_gamelist(cache_key, entry)
+
+        return roms_data
+
+    async def _get_cached_gamelist(self, key: str) -> GamelistCacheEntry | None:
+        try:
+            cached_entry = await async_cache.get(key)
+            return json.loads(cached_entry) if cached_entry else None
+        except (json.JSONDecodeError, RedisError) as e:
+            log.warning(f"Failed to read cached gamelist from {key}: {e}")
+            return None
+
+    async def _set_cached_gamelist(self, key: str, entry: GamelistCacheEntry) -> None:
+        try:
+            await async_cache.set(
+                key,
+                json.dumps(entry, separators=(",", ":")),
+                ex=GAMELIST_CACHE_TTL,
+            )
+        except RedisError as e:
+            log.warning(f"Failed to cache gamelist in {key}: {e}")
+
+    def _parse_gamelist_xml(
+        self, gamelist_path: Path, platform: Platform
+    ) -> dict[str, GamelistRom]:
+        """Parse a gamelist.xml file and return ROM data indexed by filename.
+        Games are streamed with iterparse, so large files aren't loaded whole.
+        """
+        preferred_media_types = get_preferred_media_types()
+        roms_data: dict[str, GamelistRom] = {}
+
+        depth = 0
+        for event, game in ET.iterparse(gamelist_path, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+
+            depth -= 1
+            # Only games right under the root element are listed
+            if depth != 1 or game.tag != "game":
+                continue
+
+            path_elem = game.find("path")
+            if path_elem is None or path_elem.text is None:
+                game.clear()
+                continue
+
+            # Handle relative paths
+            rom_path = path_elem.text
+            if rom_path.startswith("./"):
+                rom_path = rom_path[2:]
+
+            # Extract filename for matching
+            rom_filename = os.path.basename(rom_path)
+
+            # Extract metadata
+            name_elem = game.find("name")
+            desc_elem = game.find("desc")
+            lang_elem = game.find("lang")
+            region_elem = game.find("region")
+
+            name = name_elem.text if name_elem is not None and name_elem.text else ""
+            summary = desc_elem.text if desc_elem is not None and desc_elem.text else ""
+            regions = (
+                pydash.compact([region_elem.text]) if region_elem is not None else []
+            )
+            languages = (
+                pydash.compact([lang_elem.text]) if lang_elem is not None else []
+            )
+
+            # Build ROM data
+            rom_metadata = extract_metadata_from_gamelist_rom(game, platform)
+            rom_data = GamelistRom(
+                gamelist_id=str(uuid.uuid4()),
+                name=name,
+                summary=summary,
+                regions=regions,
+                languages=languages,
+                gamelist_metadata=rom_metadata,
+            )
+
+            # Choose which cover style to use
+            cover_url = rom_metadata["box2d_url"] or rom_metadata["image_url"]
+            if cover_url:
+                rom_data["url_cover"] = cover_url
+
+            # Grab the manual
+            manual_url = rom_metadata["manual_url"]
+            if manual_url and MetadataMediaType.MANUAL in preferred_media_types:
+                rom_data["url_manual"] = manual_url
+
+            # Build list of screenshot URLs
+            url_screenshots = []
+            if (
+                rom_metadata["screenshot_url"]
+                and MetadataMediaType.SCREENSHOT in preferred_media_types
+            ):
+                url_screenshots.append(rom_metadata["screenshot_url"])
+            if (
+                rom_metadata["title_screen_url"]
+                and MetadataMediaType.TITLE_SCREEN in preferred_media_types
+            ):
+                url_screenshots.append(rom_metadata["title_screen_url"])
+            rom_data["url_screenshots"] = url_screenshots
+
+            # Store by filename for matching
+            roms_data[rom_filename] = rom_data
+            game.clear()
 
         return roms_data
 
@@ -407,7 +511,7 @@ class GamelistHandler(MetadataHandler):
             return GamelistRom(gamelist_id=None)
 
         # Parse the gamelist file
-        all_roms_data = self._parse_gamelist_xml(gamelist_file_path, platform)
+        all_roms_data = await self._get_gamelist_roms(gamelist_file_path, platform)
 
         # Try to find exact match first
         if fs_name in all_roms_data:
@@ -10,6 +10,7 @@ from config import DEV_MODE, HASHEOUS_API_ENABLED
 from logger.logger import log
 from models.rom import RomFile
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_httpx_client
 
 from .base_handler import BaseRom, MetadataHandler
@@ -145,6 +146,7 @@ class HasheousHandler(MetadataHandler):
 
         return bool(response)
 
+    @cached_response("hasheous")
     async def _request(
         self,
         url: str,
@@ -10,9 +10,10 @@ from config import HLTB_API_ENABLED
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_httpx_client
 
-from .base_handler import BaseRom, MetadataHandler
+from .base_handler import BaseRom, MetadataHandler, single_flight
 
 # Regex to detect HLTB ID tags in filenames like (hltb-12345)
 HLTB_TAG_REGEX = re.compile(r"\(hltb-(\d+)\)", re.IGNORECASE)
@@ -243,6 +244,7 @@ class HLTBHandler(MetadataHandler):
 
         return True
 
+    @cached_response("hltb")
     async def _request(self, url: str, payload: dict) -> dict:
         """
         Sends a POST request to HowLongToBeat API.
@@ -399,6 +401,7 @@ class HLTBHandler(MetadataHandler):
             hltb_slug=platform["slug"],
         )
 
+    @single_flight
     async def get_rom(self, fs_name: str, platform_slug: str) -> HLTBRom:
         """
         Get ROM information from HowLongToBeat.
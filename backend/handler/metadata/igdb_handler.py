@@ -27,6 +27,9 @@ from .base_handler import (
     MetadataHandler,
 )
 from .base_handler import UniversalPlatformSlug as UPS
+from .base_handler import (
+    single_flight,
+)
 
 PS1_IGDB_ID: Final = 7
 PS2_IGDB_ID: Final = 8
@@ -443,6 +446,7 @@ class IGDBHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
+    @single_flight
     async def _search_rom(
         self, search_term: str, platform_igdb_id: int, with_game_type: bool = False
     ) -> Game | None:
@@ -683,6 +687,7 @@ class IGDBHandler(MetadataHandler):
 
         return build_igdb_rom(self, rom, get_igdb_preferred_locale(), platform_igdb_id)
 
+    @single_flight
     async def get_rom_by_id(self, igdb_id: int) -> IGDBRom:
         if not self.is_enabled():
             return IGDBRom(igdb_id=None)
@@ -697,6 +702,7 @@ class IGDBHandler(MetadataHandler):
 
         return build_igdb_rom(self, roms[0], get_igdb_preferred_locale(), None)
 
+    @single_flight
     async def get_matched_rom_by_id(self, igdb_id: int) -> IGDBRom | None:
         if not self.is_enabled():
             return None
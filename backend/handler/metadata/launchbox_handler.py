@@ -1,5 +1,7 @@
+import heapq
 import json
 import re
+from collections import defaultdict
 from datetime import datetime
 from typing import Final, NotRequired, TypedDict
 
@@ -10,8 +12,15 @@ from handler.redis_handler import async_cache
 from logger.logger import log
 from utils.database import safe_str_to_bool
 
-from .base_handler import BaseRom, MetadataHandler
+from .base_handler import (
+    BaseRom,
+    MetadataHandler,
+)
 from .base_handler import UniversalPlatformSlug as UPS
+from .base_handler import (
+    _normalize_search_term,
+    single_flight,
+)
 
 LAUNCHBOX_PLATFORMS_KEY: Final[str] = "romm:launchbox_platforms"
 LAUNCHBOX_METADATA_DATABASE_ID_KEY: Final[str] = "romm:launchbox_metadata_database_id"
@@ -22,6 +31,12 @@ LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY: Final[str] = (
 LAUNCHBOX_METADATA_IMAGE_KEY: Final[str] = "romm:launchbox_metadata_image"
 LAUNCHBOX_MAME_KEY: Final[str] = "romm:launchbox_mame"
 LAUNCHBOX_FILES_KEY: Final[str] = "romm:launchbox_files"
+# Search index, built with the metadata: "platform:token" -> database IDs
+LAUNCHBOX_SEARCH_TOKENS_KEY: Final[str] = "romm:launchbox_search_tokens"
+# Names and alternate names of the games in the search index
+LAUNCHBOX_SEARCH_NAMES_KEY: Final[str] = "romm:launchbox_search_names"
+# Games from the search index compared with the search term
+LAUNCHBOX_SEARCH_CANDIDATES: Final = 20
 
 # Regex to detect LaunchBox ID tags in filenames like (launchbox-12345)
 LAUNCHBOX_TAG_REGEX = re.compile(r"\(launchbox-(\d+)\)", re.IGNORECASE)
@@ -60,6 +75,12 @@ class LaunchboxRom(BaseRom):
     launchbox_metadata: NotRequired[LaunchboxMetadata]
 
 
+def get_launchbox_search_tokens(name: str) -> set[str]:
+    """Split a game name into the tokens of the LaunchBox search index"""
+    # Skip the normalization cache, which is too small for the whole database
+    return set(_normalize_search_term.__wrapped__(name).split())
+
+
 def extract_video_id_from_youtube_url(url: str | None) -> str:
     """
     Extracts the video ID from a YouTube URL.
@@ -164,7 +185,7 @@ class LaunchboxHandler(MetadataHandler):
         )
 
         if not metadata_alternate_name_index_entry:
-            return None
+            return await self._search_rom_in_index(file_name, platform_name)
 
         metadata_alternate_name_index_entry = json.loads(
             metadata_alternate_name_index_entry
@@ -179,6 +200,60 @@ class LaunchboxHandler(MetadataHandler):
 
         return json.loads(metadata_database_index_entry)
 
+    async def _search_rom_in_index(
+        self, search_term: str, platform_name: str
+    ) -> dict | None:
+        """Find the closest game name of the platform in the local search index
+
+        Games sharing tokens with the search term are ranked, rarer tokens
+        counting more, and the best ones are compared with find_best_match.
+        """
+        tokens = get_launchbox_search_tokens(search_term)
+        if not tokens:
+            return None
+
+        postings = await async_cache.hmget(
+            LAUNCHBOX_SEARCH_TOKENS_KEY,
+            [f"{platform_name}:{token}" for token in tokens],
+        )
+        scores: dict[str, float] = defaultdict(float)
+        for posting in postings:
+            if not posting:
+                continue
+            database_ids = posting.split()
+            for database_id in database_ids:
+                scores[database_id] += 1 / len(database_ids)
+        if not scores:
+            return None
+
+        candidates = heapq.nlargest(
+            LAUNCHBOX_SEARCH_CANDIDATES, scores, key=scores.__getitem__
+        )
+        candidate_names = await async_cache.hmget(
+            LAUNCHBOX_SEARCH_NAMES_KEY, candidates
+        )
+        database_ids_by_name: dict[str, str] = {}
+        for database_id, names in zip(candidates, candidate_names, strict=True):
+            for name in json.loads(names or "[]"):
+                database_ids_by_name.setdefault(name, database_id)
+
+        best_match, best_score = self.find_best_match(
+            search_term, list(database_ids_by_name)
+        )
+        if not best_match:
+            return None
+
+        log.debug(
+            f"Found match for '{search_term}' -> '{best_match}' (score: {best_score:.3f})"
+        )
+        metadata_database_index_entry = await async_cache.hget(
+            LAUNCHBOX_METADATA_DATABASE_ID_KEY, database_ids_by_name[best_match]
+        )
+        if not metadata_database_index_entry:
+            return None
+
+        return json.loads(metadata_database_index_entry)
+
     async def _get_game_images(self, database_id: str) -> list[dict] | None:
         metadata_image_index_entry = await async_cache.hget(
             LAUNCHBOX_METADATA_IMAGE_KEY, database_id
@@ -299,6 +374,7 @@ class LaunchboxHandler(MetadataHandler):
 
         return LaunchboxRom({k: v for k, v in rom.items() if v})  # type: ignore[misc]
 
+    @single_flight
     async def get_rom_by_id(self, database_id: int) -> LaunchboxRom:
         if not self.is_enabled():
             return LaunchboxRom(launchbox_id=None)
@@ -328,6 +404,7 @@ class LaunchboxHandler(MetadataHandler):
 
         return LaunchboxRom({k: v for k, v in rom.items() if v})  # type: ignore[misc]
 
+    @single_flight
     async def get_matched_rom_by_id(self, database_id: int) -> LaunchboxRom | None:
         if not self.is_enabled():
             return None
@@ -19,6 +19,9 @@ from .base_handler import (
     MetadataHandler,
 )
 from .base_handler import UniversalPlatformSlug as UPS
+from .base_handler import (
+    single_flight,
+)
 
 PS1_MOBY_ID: Final = 6
 PS2_MOBY_ID: Final = 7
@@ -102,6 +105,7 @@ class MobyGamesHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
+    @single_flight
     async def _search_rom(
         self, search_term: str, platform_moby_id: int, split_game_name: bool = False
     ) -> MobyGame | None:
@@ -261,6 +265,7 @@ class MobyGamesHandler(MetadataHandler):
 
         return MobyGamesRom({k: v for k, v in rom.items() if v})  # type: ignore[misc]
 
+    @single_flight
     async def get_rom_by_id(self, moby_id: int) -> MobyGamesRom:
         if not self.is_enabled():
             return MobyGamesRom(moby_id=None)
@@ -281,6 +286,7 @@ class MobyGamesHandler(MetadataHandler):
 
         return MobyGamesRom({k: v for k, v in rom.items() if v})  # type: ignore[misc]
 
+    @single_flight
     async def get_matched_rom_by_id(self, moby_id: int) -> MobyGamesRom | None:
         if not self.is_enabled():
             return None
@@ -11,6 +11,7 @@ from handler.metadata.base_handler import MetadataHandler
 from logger.logger import log
 from models.rom import RomFile
 from utils import get_version
+from utils.cache import cached_response
 from utils.context import ctx_httpx_client
 
 
@@ -66,6 +67,7 @@ class PlaymatchHandler(MetadataHandler):
 
         return bool(response)
 
+    @cached_response("playmatch")
     async def _request(self, url: str, query: dict) -> dict:
         """
         Sends a Request to Playmatch API.
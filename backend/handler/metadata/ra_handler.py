@@ -1,11 +1,12 @@
+import asyncio
 import json
-import os
 import re
 import time
 from datetime import datetime
-from typing import NotRequired, TypedDict
+from typing import Final, NotRequired, TypedDict
 
 import pydash
+from redis.exceptions import RedisError
 
 from adapters.services.retroachievements import RetroAchievementsService
 from adapters.services.retroachievements_types import (
@@ -17,6 +18,7 @@ from config import (
     RETROACHIEVEMENTS_API_KEY,
 )
 from handler.filesystem import fs_resource_handler
+from handler.redis_handler import async_cache
 from logger.logger import log
 from models.rom import Rom
 
@@ -26,6 +28,13 @@ from .base_handler import UniversalPlatformSlug as UPS
 # Regex to detect RetroAchievements ID tags in filenames like (ra-12345)
 RA_TAG_REGEX = re.compile(r"\(ra-(\d+)\)", re.IGNORECASE)
 
+# Games of each RetroAchievements platform, by lowercase ROM hash
+RA_HASHES_INDEX_KEY_PREFIX: Final[str] = "romm:ra_hashes"
+# Time at which the hashes index of each RetroAchievements platform was built
+RA_HASHES_UPDATED_AT_KEY: Final[str] = "romm:ra_hashes_updated_at"
+# Seconds to wait before fetching the games of a platform again after a failure
+RA_HASHES_INDEX_RETRY_SECONDS: Final[int] = 15 * 60
+
 
 class RAGamesPlatform(TypedDict):
     slug: str
@@ -126,7 +135,10 @@ def extract_metadata_from_rom_details(
 class RAHandler(MetadataHandler):
     def __init__(self) -> None:
         self.ra_service = RetroAchievementsService()
-        self.HASHES_FILE_NAME = "ra_hashes.json"
+        # Hashes indexes being built, by RetroAchievements platform ID
+        self._index_tasks: dict[int, asyncio.Task[None]] = {}
+        # Time at which fetching the games of each platform last failed
+        self._index_failed_at: dict[int, float] = {}
 
     @classmethod
     def is_enabled(cls) -> bool:
@@ -152,66 +164,105 @@ class RAHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
-    def _get_hashes_file_path(self, platform_id: int) -> str:
-        platform_resources_path = fs_resource_handler.get_platform_resources_path(
-            platform_id
+    @staticmethod
+    def _get_hashes_index_key(ra_platform_id: int) -> str:
+        return f"{RA_HASHES_INDEX_KEY_PREFIX}:{ra_platform_id}"
+
+    async def _build_hashes_index(self, ra_platform_id: int) -> None:
+        """Fetch the hashes of all the games of a platform, and index them by hash"""
+        roms = await self.ra_service.get_game_list(
+            system_id=ra_platform_id,
+            only_games_with_achievements=True,
+            include_hashes=True,
         )
-        return os.path.join(platform_resources_path, self.HASHES_FILE_NAME)
-
-    async def _exists_cache_file(self, platform_id: int) -> bool:
-        return await fs_resource_handler.file_exists(
-            self._get_hashes_file_path(platform_id)
+        games_by_hash: dict[str | bytes, str] = {
+            ra_hash.lower(): json.dumps(
+                {key: value for key, value in r.items() if key != "Hashes"}
+            )
+            for r in roms
+            for ra_hash in r.get("Hashes", ())
+        }
+
+        # Failed requests also return no games, so the current index is kept
+        # and the games are fetched again later
+        if not games_by_hash:
+            self._index_failed_at[ra_platform_id] = time.monotonic()
+            log.warning(
+                f"No RetroAchievements hashes fetched for platform {ra_platform_id}, keeping the current index"
+            )
+            return
+
+        # The index is built aside, so lookups never see a partial index
+        index_key = self._get_hashes_index_key(ra_platform_id)
+        new_index_key = f"{index_key}:new"
+        async with async_cache.pipeline(transaction=True) as pipe:
+            await pipe.delete(new_index_key)
+            await pipe.hset(new_index_key, mapping=games_by_hash)
+            await pipe.rename(new_index_key, index_key)
+            await pipe.hset(RA_HASHES_UPDATED_AT_KEY, str(ra_platform_id), time.time())
+            await pipe.execute()
+        self._index_failed_at.pop(ra_platform_id, None)
+
+        log.debug(
+            f"Indexed {len(games_by_hash)} RetroAchievements hashes for platform {ra_platform_id}"
         )
 
-    async def _days_since_last_cache_file_update(self, platform_id: int) -> int:
-        file_path = self._get_hashes_file_path(platform_id)
-        if not await fs_resource_handler.file_exists(file_path):
-            return REFRESH_RETROACHIEVEMENTS_CACHE_DAYS + 1
-
-        full_path = fs_resource_handler.validate_path(file_path)
-        return int((time.time() - os.path.getmtime(full_path)) / (24 * 3600))
+    def _refresh_hashes_index(self, ra_platform_id: int) -> asyncio.Task[None]:
+        """Start building the hashes index of a platform, unless it's already running"""
+        task = self._index_tasks.get(ra_platform_id)
+        if (
+            task is None
+            or task.done()
+            or task.get_loop() is not asyncio.get_running_loop()
+        ):
+            task = self._index_tasks[ra_platform_id] = asyncio.create_task(
+                self._build_hashes_index(ra_platform_id)
+            )
+        return task
 
     async def _search_rom(self, rom: Rom, ra_hash: str) -> RAGameListItem | None:
         if not rom.platform.ra_id:
             return None
 
-        # Fetch all hashes for specific platform
-        roms: list[RAGameListItem]
-        if (
-            REFRESH_RETROACHIEVEMENTS_CACHE_DAYS
-            <= await self._days_since_last_cache_file_update(rom.platform.id)
-            or not await self._exists_cache_file(rom.platform.id)
-        ):
-            # Write the roms result to a JSON file if older than REFRESH_RETROACHIEVEMENTS_CACHE_DAYS days
-            roms = await self.ra_service.get_game_list(
-                system_id=rom.platform.ra_id,
-                only_games_with_achievements=True,
-                include_hashes=True,
-            )
-
-            platform_resources_path = fs_resource_handler.get_platform_resources_path(
-                rom.platform.id
+        ra_platform_id = rom.platform.ra_id
+        # After a failure, the games aren't fetched again for every ROM
+        failed_at = self._index_failed_at.get(ra_platform_id)
+        can_refresh = (
+            failed_at is None
+            or time.monotonic() - failed_at >= RA_HASHES_INDEX_RETRY_SECONDS
+        )
+        try:
+            updated_at = await async_cache.hget(
+                RA_HASHES_UPDATED_AT_KEY, str(ra_platform_id)
             )
+            if updated_at is None:
+                # The first lookup of a platform has to wait for its index
+                if can_refresh:
+                    await asyncio.shield(self._refresh_hashes_index(ra_platform_id))
+            elif can_refresh and (
+                time.time() - float(updated_at)
+                >= REFRESH_RETROACHIEVEMENTS_CACHE_DAYS * 24 * 3600
+            ):
+                # Outdated indexes are refreshed in the background, and still used
+                self._refresh_hashes_index(ra_platform_id).add_done_callback(
+                    self._log_index_refresh_error
+                )
 
-            json_file = json.dumps(roms, indent=4)
-            await fs_resource_handler.write_file(
-                json_file.encode("utf-8"),
-                platform_resources_path,
-                self.HASHES_FILE_NAME,
+            game = await async_cache.hget(
+                self._get_hashes_index_key(ra_platform_id), ra_hash.lower()
             )
-        else:
-            # Read the roms result from the JSON file
-            json_file_bytes = await fs_resource_handler.read_file(
-                self._get_hashes_file_path(rom.platform.id)
-            )
-            roms = json.loads(json_file_bytes.decode("utf-8"))
+        except RedisError as e:
+            log.error(f"Error reading the RetroAchievements hashes index: {e}")
+            return None
 
-        ra_hash_lower = ra_hash.lower()
-        for r in roms:
-            if any(ra_hash_lower == h.lower() for h in r.get("Hashes", ())):
-                return r
+        return json.loads(game) if game else None
 
-        return None
+    @staticmethod
+    def _log_index_refresh_error(task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and task.exception():
+            log.error(
+                f"Error refreshing the RetroAchievements hashes index: {task.exception()}"
+            )
 
     def get_platform(self, slug: str) -> RAGamesPlatform:
         if slug not in RA_PLATFORM_LIST:
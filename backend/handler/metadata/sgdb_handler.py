@@ -6,7 +6,7 @@ from adapters.services.steamgriddb_types import SGDBDimension, SGDBGame, SGDBTyp
 from config import STEAMGRIDDB_API_KEY
 from logger.logger import log
 
-from .base_handler import MetadataHandler
+from .base_handler import MetadataHandler, single_flight
 
 
 class SGDBResource(TypedDict):
@@ -46,6 +46,7 @@ class SGDBBaseHandler(MetadataHandler):
 
         return bool(response)
 
+    @single_flight
     async def get_rom_by_id(self, sgdb_id: int) -> SGDBRom:
         """Get ROM details by SteamGridDB ID."""
         if not self.is_enabled():
@@ -95,6 +96,7 @@ class SGDBBaseHandler(MetadataHandler):
 
         return list(filter(None, results))
 
+    @single_flight
     async def get_details_by_names(self, game_names: list[str]) -> SGDBRom:
         if not self.is_enabled():
             return SGDBRom(sgdb_id=None)
@@ -1,6 +1,6 @@
 import asyncio
 import enum
-from typing import Any
+from typing import Any, cast
 
 import socketio  # type: ignore
 
@@ -10,6 +10,7 @@ from handler.database import db_platform_handler, db_rom_handler
 from handler.filesystem import fs_asset_handler, fs_firmware_handler
 from handler.filesystem.roms_handler import FSRom
 from handler.metadata import (
+    meta_dat_handler,
     meta_flashpoint_handler,
     meta_gamelist_handler,
     meta_hasheous_handler,
@@ -23,9 +24,14 @@ from handler.metadata import (
     meta_ss_handler,
     meta_tgdb_handler,
 )
+from handler.metadata.dat_handler import DATRom
 from handler.metadata.flashpoint_handler import FLASHPOINT_PLATFORM_LIST, FlashpointRom
 from handler.metadata.gamelist_handler import GamelistRom
-from handler.metadata.hasheous_handler import HASHEOUS_PLATFORM_LIST, HasheousRom
+from handler.metadata.hasheous_handler import (
+    HASHEOUS_PLATFORM_LIST,
+    HasheousMetadata,
+    HasheousRom,
+)
 from handler.metadata.hltb_handler import HLTB_PLATFORM_LIST, HLTBRom
 from handler.metadata.igdb_handler import IGDB_PLATFORM_LIST, IGDBRom
 from handler.metadata.launchbox_handler import LAUNCHBOX_PLATFORM_LIST, LaunchboxRom
@@ -394,6 +400,13 @@ async def scan_rom(
 
         return HasheousRom(hasheous_id=None, igdb_id=None, tgdb_id=None, ra_id=None)
 
+    async def fetch_dat_hash_match() -> DATRom | None:
+        # The DAT index is local, so it's checked regardless of the metadata sources
+        if fs_rom["files"]:
+            return await meta_dat_handler.lookup_rom(fs_rom["files"])
+
+        return None
+
     _added_rom = db_rom_handler.add_rom(Rom(**rom_attrs))
     _added_rom.is_identifying = True
 
@@ -411,9 +424,11 @@ async def scan_rom(
     (
         playmatch_hash_match,
         hasheous_hash_match,
+        dat_hash_match,
     ) = await asyncio.gather(
         fetch_playmatch_hash_match(),
         fetch_hasheous_hash_match(),
+        fetch_dat_hash_match(),
     )
 
     async def fetch_igdb_rom(
@@ -748,6 +763,19 @@ async def scan_rom(
             }
         )
 
+    # Dumps verified by the local DATs are flagged without any network request
+    if dat_hash_match:
+        log.debug(
+            f"{hl(fs_rom['fs_name'])} verified by DAT {hl(dat_hash_match['dat'])}",
+            extra=LOGGER_MODULE_NAME,
+        )
+        rom_attrs["hasheous_metadata"] = meta_dat_handler.merge_verification(
+            cast(HasheousMetadata | None, rom_attrs.get("hasheous_metadata")),
+            dat_hash_match,
+        )
+        rom_attrs["name"] = rom_attrs.get("name") or dat_hash_match["name"]
+        rom_attrs["regions"] = rom_attrs.get("regions") or dat_hash_match["regions"]
+
     # If not found in any metadata source, we return the rom with the default values
     if (
         not rom_attrs.get("igdb_id")
@@ -0,0 +1,171 @@
+import json
+import os
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import IO, Any, Final
+
+from defusedxml import ElementTree as ET
+
+from config import DATS_BASE_PATH
+from handler.metadata.dat_handler import (
+    DAT_HASH_TYPES,
+    DAT_OTHER_SOURCE,
+    DAT_SOURCES,
+    detect_dat_source,
+    get_dat_index_key,
+    iter_dat_games,
+)
+from handler.redis_handler import async_cache
+from logger.logger import log
+from tasks.scheduled import UpdateStats
+from tasks.tasks import Task, TaskType
+from utils.context import initialize_context
+
+DAT_FILE_EXTENSIONS: Final = (".dat", ".xml")
+# Index entries written to Redis at once
+DAT_INDEX_BATCH_SIZE: Final = 5000
+# Suffix of the keys the new index is built in, before replacing the current one
+DAT_INDEX_IMPORT_SUFFIX: Final = "importing"
+
+
+def _is_dat_file(file_name: str) -> bool:
+    return file_name.lower().endswith(DAT_FILE_EXTENSIONS)
+
+
+def _list_dat_files(base_path: str) -> list[tuple[str, str | None]]:
+    """List the DAT files in the folder, as (path, ZIP member) pairs"""
+    dat_files: list[tuple[str, str | None]] = []
+    for root, _, files in os.walk(base_path):
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            if _is_dat_file(file_name):
+                dat_files.append((path, None))
+            elif file_name.lower().endswith(".zip"):
+                try:
+                    with zipfile.ZipFile(path) as z:
+                        dat_files.extend(
+                            (path, member)
+                            for member in z.namelist()
+                            if _is_dat_file(member)
+                        )
+                except zipfile.BadZipFile as e:
+                    log.error(f"Failed to read DAT archive {path}: {e}")
+    return dat_files
+
+
+@contextmanager
+def _open_dat_file(path: str, member: str | None) -> Iterator[IO[bytes]]:
+    if member is None:
+        with open(path, "rb") as f:
+            yield f
+    else:
+        with zipfile.ZipFile(path) as z, z.open(member) as f:
+            yield f
+
+
+class ImportDATFilesTask(Task):
+    def __init__(self):
+        super().__init__(
+            title="Import DAT files",
+            description="Builds the local hash index from the DAT files in the DATs folder",
+            task_type=TaskType.UPDATE,
+            enabled=True,
+            manual_run=True,
+            cron_string=None,
+        )
+
+    @initialize_context()
+    async def run(self) -> dict[str, Any]:
+        update_stats = UpdateStats()
+
+        dat_files = (
+            _list_dat_files(DATS_BASE_PATH) if os.path.isdir(DATS_BASE_PATH) else []
+        )
+        if not dat_files:
+            log.warning(f"No DAT files found in {DATS_BASE_PATH}")
+
+        index_keys = [
+            get_dat_index_key(source, hash_type)
+            for source in [*DAT_SOURCES, DAT_OTHER_SOURCE]
+            for hash_type in DAT_HASH_TYPES
+        ]
+        import_keys = {key: f"{key}:{DAT_INDEX_IMPORT_SUFFIX}" for key in index_keys}
+        await async_cache.delete(*import_keys.values())
+
+        update_stats.update(processed=0, total=len(dat_files))
+        for processed, (path, member) in enumerate(dat_files, start=1):
+            dat_name = member or os.path.basename(path)
+            try:
+                games = await self._import_dat_file(path, member, import_keys)
+                log.info(f"Imported {games} games from DAT file {dat_name}")
+            except (ET.ParseError, OSError, zipfile.BadZipFile) as e:
+                log.error(f"Failed to import DAT file {dat_name}: {e}")
+            update_stats.update(processed=processed)
+
+        # Lookups keep using the previous index until the new one is complete
+        async with async_cache.pipeline(transaction=True) as pipe:
+            for key, import_key in import_keys.items():
+                if await async_cache.exists(import_key):
+                    await pipe.rename(import_key, key)
+                else:
+                    await pipe.delete(key)
+            await pipe.execute()
+
+        log.info("DAT index update completed!")
+        return update_stats.to_dict()
+
+    async def _import_dat_file(
+        self, path: str, member: str | None, import_keys: dict[str, str]
+    ) -> int:
+        from handler.filesystem import fs_rom_handler
+        from handler.filesystem.base_handler import TAG_REGEX
+
+        dat_name = os.path.splitext(os.path.basename(member or path))[0]
+        source = detect_dat_source({"name": dat_name})
+        games = 0
+
+        def on_header(header: dict[str, str]) -> None:
+            nonlocal dat_name, source
+            dat_name = header.get("name") or dat_name
+            source = detect_dat_source({**header, "name": dat_name})
+
+        pending: dict[str, dict[str | bytes, str]] = {}
+        pending_entries = 0
+
+        async def flush() -> None:
+            nonlocal pending, pending_entries
+            async with async_cache.pipeline(transaction=False) as pipe:
+                for key, mapping in pending.items():
+                    await pipe.hset(import_keys[key], mapping=mapping)
+                await pipe.execute()
+            pending, pending_entries = {}, 0
+
+        with _open_dat_file(path, member) as f:
+            for game in iter_dat_games(f, on_header):
+                games += 1
+                game_name = game["name"]
+                entry = {
+                    "name": TAG_REGEX.split(game_name)[0].strip() or game_name,
+                    "dat": dat_name,
+                    "regions": fs_rom_handler.parse_tags(game_name).regions,
+                }
+                for rom in game["roms"]:
+                    value = json.dumps(
+                        {**entry, "size": rom["size"]}, separators=(",", ":")
+                    )
+                    for hash_type in DAT_HASH_TYPES:
+                        if rom[hash_type]:
+                            key = get_dat_index_key(source, hash_type)
+                            pending.setdefault(key, {})[rom[hash_type]] = value
+                            pending_entries += 1
+
+                if pending_entries >= DAT_INDEX_BATCH_SIZE:
+                    await flush()
+
+        if pending:
+            await flush()
+        return games
+
+
+import_dat_files_task = ImportDATFilesTask()
@@ -1,3 +1,4 @@
+import resource
 from dataclasses import dataclass
 
 from tasks.tasks import update_job_meta
@@ -22,3 +23,9 @@ class UpdateStats:
             "processed": self.processed,
             "total": self.total,
         }
+
+
+def get_peak_memory_mb() -> float:
+    """Get the peak resident memory of the current process, in MiB"""
+    # Reported in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
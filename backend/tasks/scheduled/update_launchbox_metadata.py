@@ -1,12 +1,17 @@
+import asyncio
 import json
+import tempfile
+import time
 import zipfile
-from io import BytesIO
-from typing import Any
+from collections import defaultdict
+from collections.abc import Iterator
+from typing import IO, Any, Final
 
 from defusedxml import ElementTree as ET
 
 from config import (
     ENABLE_SCHEDULED_UPDATE_LAUNCHBOX_METADATA,
+    ROMM_TMP_PATH,
     SCHEDULED_UPDATE_LAUNCHBOX_METADATA_CRON,
 )
 from handler.metadata import meta_launchbox_handler
@@ -18,13 +23,205 @@ from handler.metadata.launchbox_handler import (
     LAUNCHBOX_METADATA_IMAGE_KEY,
     LAUNCHBOX_METADATA_NAME_KEY,
     LAUNCHBOX_PLATFORMS_KEY,
+    LAUNCHBOX_SEARCH_NAMES_KEY,
+    LAUNCHBOX_SEARCH_TOKENS_KEY,
+    get_launchbox_search_tokens,
 )
 from handler.redis_handler import async_cache
 from logger.logger import log
 from tasks.tasks import RemoteFilePullTask, TaskType
 from utils.context import initialize_context
 
-from . import UpdateStats
+from . import UpdateStats, get_peak_memory_mb
+
+LAUNCHBOX_KEYS: Final = (
+    LAUNCHBOX_PLATFORMS_KEY,
+    LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+    LAUNCHBOX_METADATA_NAME_KEY,
+    LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
+    LAUNCHBOX_METADATA_IMAGE_KEY,
+    LAUNCHBOX_MAME_KEY,
+    LAUNCHBOX_FILES_KEY,
+    LAUNCHBOX_SEARCH_TOKENS_KEY,
+    LAUNCHBOX_SEARCH_NAMES_KEY,
+)
+LAUNCHBOX_XML_FILES: Final = ("Platforms.xml", "Metadata.xml", "Mame.xml", "Files.xml")
+# Entries written to Redis at once
+LAUNCHBOX_IMPORT_BATCH_SIZE: Final = 5000
+# Suffix of the keys the new metadata is stored in, before replacing the current one
+LAUNCHBOX_IMPORT_SUFFIX: Final = "importing"
+
+
+def _element_to_dict(elem: Any) -> dict[str, str | None]:
+    return {child.tag: child.text for child in elem}
+
+
+class SearchIndexBuilder:
+    """Token postings of the game names of each platform, for fuzzy lookups"""
+
+    def __init__(self) -> None:
+        self.platforms: dict[str, str] = {}
+        self.names: dict[str, list[str]] = {}
+        self.postings: dict[str, list[str]] = defaultdict(list)
+
+    def add_game(self, database_id: str, platform: str, name: str) -> None:
+        self.platforms[database_id] = platform
+        self._add_name(database_id, platform, name)
+
+    def add_alternate_name(self, database_id: str, name: str) -> None:
+        # Alternate names are listed after the games they belong to
+        platform = self.platforms.get(database_id)
+        if platform:
+            self._add_name(database_id, platform, name)
+
+    def _add_name(self, database_id: str, platform: str, name: str) -> None:
+        names = self.names.setdefault(database_id, [])
+        if name in names:
+            return
+
+        names.append(name)
+        for token in get_launchbox_search_tokens(name):
+            self.postings[f"{platform}:{token}"].append(database_id)
+
+    def iter_entries(self) -> Iterator[tuple[str, str, str]]:
+        for field, database_ids in self.postings.items():
+            yield (
+                LAUNCHBOX_SEARCH_TOKENS_KEY,
+                field,
+                " ".join(dict.fromkeys(database_ids)),
+            )
+        for database_id, names in self.names.items():
+            yield LAUNCHBOX_SEARCH_NAMES_KEY, database_id, json.dumps(names)
+
+
+def _iter_entries(f: IO[bytes], file_name: str) -> Iterator[tuple[str, str, str]]:
+    """Parse a LaunchBox XML file into (key, field, value) entries"""
+    current_game_image_db_id = None
+    current_game_images: list[dict[str, Any]] = []
+    search_index = SearchIndexBuilder()
+
+    for _, elem in ET.iterparse(f, events=("end",)):
+        if file_name == "Platforms.xml" and elem.tag == "Platform":
+            name_elem = elem.find("Name")
+            if name_elem is not None and name_elem.text:
+                yield (
+                    LAUNCHBOX_PLATFORMS_KEY,
+                    name_elem.text,
+                    json.dumps(_element_to_dict(elem)),
+                )
+            elem.clear()
+
+        elif file_name == "Metadata.xml" and elem.tag == "Game":
+            id_elem = elem.find("DatabaseID")
+            if id_elem is not None and id_elem.text:
+                yield (
+                    LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+                    id_elem.text,
+                    json.dumps(_element_to_dict(elem)),
+                )
+
+            name_elem = elem.find("Name")
+            platform_elem = elem.find("Platform")
+            if (
+                name_elem is not None
+                and name_elem.text
+                and platform_elem is not None
+                and platform_elem.text
+            ):
+                # Use a unique combination of name and platform as the key
+                yield (
+                    LAUNCHBOX_METADATA_NAME_KEY,
+                    f"{name_elem.text.lower()}:{platform_elem.text}",
+                    json.dumps(_element_to_dict(elem)),
+                )
+                if id_elem is not None and id_elem.text:
+                    search_index.add_game(
+                        id_elem.text, platform_elem.text, name_elem.text
+                    )
+            elem.clear()
+
+        elif file_name == "Metadata.xml" and elem.tag == "GameAlternateName":
+            alternate_name_elem = elem.find("AlternateName")
+            if alternate_name_elem is not None and alternate_name_elem.text:
+                yield (
+                    LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
+                    alternate_name_elem.text.lower(),
+                    json.dumps(_element_to_dict(elem)),
+                )
+                id_elem = elem.find("DatabaseID")
+                if id_elem is not None and id_elem.text:
+                    search_index.add_alternate_name(
+                        id_elem.text, alternate_name_elem.text
+                    )
+            elem.clear()
+
+        elif file_name == "Metadata.xml" and elem.tag == "GameImage":
+            id_elem = elem.find("DatabaseID")
+            if id_elem is not None and id_elem.text:
+                image_id = str(id_elem.text)
+
+                if (
+                    current_game_image_db_id is not None
+                    and image_id != current_game_image_db_id
+                ):
+                    # Store the previous game's images
+                    yield (
+                        LAUNCHBOX_METADATA_IMAGE_KEY,
+                        current_game_image_db_id,
+                        json.dumps(current_game_images),
+                    )
+                    current_game_images = []
+
+                current_game_image_db_id = image_id
+                current_game_images.append(_element_to_dict(elem))
+            elem.clear()
+
+        elif file_name == "Mame.xml" and elem.tag == "MameFile":
+            filename_elem = elem.find("FileName")
+            if filename_elem is not None and filename_elem.text:
+                yield (
+                    LAUNCHBOX_MAME_KEY,
+                    filename_elem.text,
+                    json.dumps(_element_to_dict(elem)),
+                )
+            elem.clear()
+
+        elif file_name == "Files.xml" and elem.tag == "File":
+            filename_elem = elem.find("FileName")
+            if filename_elem is not None and filename_elem.text:
+                yield (
+                    LAUNCHBOX_FILES_KEY,
+                    filename_elem.text,
+                    json.dumps(_element_to_dict(elem)),
+                )
+            elem.clear()
+
+    # Store the last game's images
+    if current_game_image_db_id is not None:
+        yield (
+            LAUNCHBOX_METADATA_IMAGE_KEY,
+            current_game_image_db_id,
+            json.dumps(current_game_images),
+        )
+
+    yield from search_index.iter_entries()
+
+
+def _iter_batches(
+    z: zipfile.ZipFile, file_name: str
+) -> Iterator[dict[str, dict[str | bytes, str]]]:
+    """Parse a LaunchBox XML file into batches of entries, grouped by key"""
+    with z.open(file_name, "r") as f:
+        batch: dict[str, dict[str | bytes, str]] = {}
+        batch_entries = 0
+        for key, field, value in _iter_entries(f, file_name):
+            batch.setdefault(key, {})[field] = value
+            batch_entries += 1
+            if batch_entries >= LAUNCHBOX_IMPORT_BATCH_SIZE:
+                yield batch
+                batch, batch_entries = {}, 0
+        if batch:
+            yield batch
 
 
 class UpdateLaunchboxMetadataTask(RemoteFilePullTask):
@@ -48,222 +245,68 @@ class UpdateLaunchboxMetadataTask(RemoteFilePullTask):
             log.warning("Launchbox API is not enabled, skipping metadata update")
             return update_stats.to_dict()
 
-        content = await super().run(force)
-        if content is None:
-            log.warning("No content received from launchbox metadata update")
-            return update_stats.to_dict()
-
-        try:
-            zip_file_bytes = BytesIO(content)
-            with zipfile.ZipFile(zip_file_bytes) as z:
-                file_list = z.namelist()
-                total_files = len(file_list)
-                processed_files = 0
-
-                # Update initial progress
-                update_stats.update(processed=processed_files, total=total_files)
-
-                for file in file_list:
-                    if file == "Platforms.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                for _, elem in ctx:
-                                    if elem.tag == "Platform":
-                                        name_elem = elem.find("Name")
-                                        if name_elem is not None and name_elem.text:
-                                            await pipe.hset(
-                                                LAUNCHBOX_PLATFORMS_KEY,
-                                                mapping={
-                                                    name_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-                    elif file == "Metadata.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                current_game_image_db_id = None
-                                current_game_images: list[dict[str, Any]] = []
-
-                                for _, elem in ctx:
-                                    if elem.tag == "Game":
-                                        id_elem = elem.find("DatabaseID")
-                                        if id_elem is not None and id_elem.text:
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_DATABASE_ID_KEY,
-                                                mapping={
-                                                    id_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        name_elem = elem.find("Name")
-                                        platform_elem = elem.find("Platform")
-                                        if (
-                                            name_elem is not None
-                                            and name_elem.text
-                                            and platform_elem is not None
-                                            and platform_elem.text
-                                        ):
-                                            # Use a unique combination of name and platform as the key
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_NAME_KEY,
-                                                mapping={
-                                                    f"{name_elem.text.lower()}:{platform_elem.text}": json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-                                        elem.clear()
-
-                                    elif elem.tag == "GameAlternateName":
-                                        alternate_name_elem = elem.find("AlternateName")
-                                        if (
-                                            alternate_name_elem is not None
-                                            and alternate_name_elem.text
-                                        ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
-                                                mapping={
-                                                    alternate_name_elem.text.lower(): json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        elem.clear()
-
-                                    elif elem.tag == "GameImage":
-                                        id_elem = elem.find("DatabaseID")
-                                        if id_elem is not None and id_elem.text:
-                                            image_id = str(id_elem.text)
-
-                                            if (
-                                                current_game_image_db_id is not None
-                                                and image_id != current_game_image_db_id
-                                            ):
-                                                # Store the previous game's images
-                                                await pipe.hset(
-                                                    LAUNCHBOX_METADATA_IMAGE_KEY,
-                                                    mapping={
-                                                        current_game_image_db_id: json.dumps(
-                                                            current_game_images
-                                                        )
-                                                    },
-                                                )
-                                                current_game_images = []
-
-                                            current_game_image_db_id = image_id
-                                            current_game_images.append(
-                                                {
-                                                    child.tag: child.text
-                                                    for child in elem
-                                                }
-                                            )
-                                        elem.clear()
-
-                                # Store the last game's images
-                                if current_game_image_db_id is not None:
-                                    await pipe.hset(
-                                        LAUNCHBOX_METADATA_IMAGE_KEY,
-                                        mapping={
-                                            current_game_image_db_id: json.dumps(
-                                                current_game_images
-                                            )
-                                        },
-                                    )
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-                    elif file == "Mame.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                for _, elem in ctx:
-                                    if elem.tag == "MameFile":
-                                        filename_elem = elem.find("FileName")
-                                        if (
-                                            filename_elem is not None
-                                            and filename_elem.text
-                                        ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_MAME_KEY,
-                                                mapping={
-                                                    filename_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-                    elif file == "Files.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                for _, elem in ctx:
-                                    if elem.tag == "File":
-                                        filename_elem = elem.find("FileName")
-                                        if (
-                                            filename_elem is not None
-                                            and filename_elem.text
-                                        ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_FILES_KEY,
-                                                mapping={
-                                                    filename_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-        except zipfile.BadZipFile:
-            log.error("Bad zip file in launchbox metadata update")
-            return update_stats.to_dict()
+        start = time.monotonic()
+        import_keys = {
+            key: f"{key}:{LAUNCHBOX_IMPORT_SUFFIX}" for key in LAUNCHBOX_KEYS
+        }
+
+        # The archive is spooled to disk, to keep it out of memory
+        with tempfile.TemporaryFile(dir=ROMM_TMP_PATH) as zip_file:
+            if not await self.download(zip_file, force):
+                log.warning("No content received from launchbox metadata update")
+                return update_stats.to_dict()
+
+            await async_cache.delete(*import_keys.values())
+            try:
+                with zipfile.ZipFile(zip_file) as z:
+                    file_list = [
+                        file for file in z.namelist() if file in LAUNCHBOX_XML_FILES
+                    ]
+                    update_stats.update(processed=0, total=len(file_list))
+
+                    for processed, file in enumerate(file_list, start=1):
+                        entries = await self._import_file(z, file, import_keys)
+                        log.info(f"Imported {entries} LaunchBox entries from {file}")
+                        update_stats.update(processed=processed)
+            except zipfile.BadZipFile:
+                log.error("Bad zip file in launchbox metadata update")
+                await async_cache.delete(*import_keys.values())
+                return update_stats.to_dict()
+            except ET.ParseError as e:
+                log.error(f"Failed to parse launchbox metadata: {e}")
+                await async_cache.delete(*import_keys.values())
+                return update_stats.to_dict()
+
+        # Lookups keep using the previous metadata until the new one is complete
+        async with async_cache.pipeline(transaction=True) as pipe:
+            for key, import_key in import_keys.items():
+                if await async_cache.exists(import_key):
+                    await pipe.rename(import_key, key)
+                else:
+                    await pipe.delete(key)
+            await pipe.execute()
 
         log.info("Scheduled launchbox metadata update completed!")
 
-        return update_stats.to_dict()
+        return {
+            **update_stats.to_dict(),
+            "duration_seconds": round(time.monotonic() - start, 1),
+            "peak_memory_mb": get_peak_memory_mb(),
+        }
+
+    async def _import_file(
+        self, z: zipfile.ZipFile, file_name: str, import_keys: dict[str, str]
+    ) -> int:
+        entries = 0
+        batches = _iter_batches(z, file_name)
+        # Parsing runs in a thread, so the event loop is free while writing
+        while batch := await asyncio.to_thread(next, batches, None):
+            async with async_cache.pipeline(transaction=False) as pipe:
+                for key, mapping in batch.items():
+                    await pipe.hset(import_keys[key], mapping=mapping)
+                    entries += len(mapping)
+                await pipe.execute()
+        return entries
 
 
 update_launchbox_metadata_task = UpdateLaunchboxMetadataTask()
@@ -1,9 +1,15 @@
+import asyncio
+import io
 import json
-from itertools import batched
-from typing import Any, Final
+import re
+import tempfile
+import time
+from collections.abc import Iterator
+from typing import IO, Any, Final
 
 from config import (
     ENABLE_SCHEDULED_UPDATE_SWITCH_TITLEDB,
+    ROMM_TMP_PATH,
     SCHEDULED_UPDATE_SWITCH_TITLEDB_CRON,
 )
 from handler.redis_handler import async_cache
@@ -11,10 +17,105 @@ from logger.logger import log
 from tasks.tasks import RemoteFilePullTask, TaskType
 from utils.context import initialize_context
 
-from . import UpdateStats
+from . import UpdateStats, get_peak_memory_mb
 
 SWITCH_TITLEDB_INDEX_KEY: Final = "romm:switch_titledb"
 SWITCH_PRODUCT_ID_KEY: Final = "romm:switch_product_id"
+# Titles written to Redis at once
+SWITCH_TITLEDB_BATCH_SIZE: Final = 2000
+# Characters of the TitleDB file decoded at once
+SWITCH_TITLEDB_READ_SIZE: Final = 1024 * 1024
+# Suffix of the keys the new TitleDB is stored in, before replacing the current one
+SWITCH_TITLEDB_IMPORT_SUFFIX: Final = "importing"
+
+_JSON_WHITESPACE: Final = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_json_whitespace(buffer: str, pos: int) -> int:
+    match = _JSON_WHITESPACE.match(buffer, pos)
+    return match.end() if match else pos
+
+
+def _iter_json_object_items(f: IO[bytes]) -> Iterator[tuple[str, Any]]:
+    """Parse the members of a top-level JSON object one at a time
+
+    Only the members being decoded are kept in memory, instead of the whole
+    file and all the parsed objects.
+    """
+    decoder = json.JSONDecoder()
+    reader = io.TextIOWrapper(f, encoding="utf-8")
+    buffer, pos, eof = "", 0, False
+    state = "start"
+    key = ""
+
+    while True:
+        pos = _skip_json_whitespace(buffer, pos)
+        if pos == len(buffer) and not eof:
+            chunk = reader.read(SWITCH_TITLEDB_READ_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        if pos == len(buffer):
+            raise json.JSONDecodeError("Unexpected end of the JSON file", buffer, pos)
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "{":
+                raise json.JSONDecodeError("Expecting a JSON object", buffer, pos)
+            pos += 1
+            state = "first_key"
+        elif state == "colon":
+            if char != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", buffer, pos)
+            pos += 1
+            state = "value"
+        elif state == "next":
+            if char == "}":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            pos += 1
+            state = "key"
+        elif state == "first_key" and char == "}":
+            return
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
+            # A value cut by the end of the buffer, like a number, may still parse
+            delimiter = _skip_json_whitespace(buffer, end)
+            if not eof and (delimiter == len(buffer) or buffer[delimiter] not in ",:}"):
+                chunk = reader.read(SWITCH_TITLEDB_READ_SIZE)
+                buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+                continue
+
+            pos = end
+            if state == "value":
+                yield key, value
+                state = "next"
+            elif isinstance(value, str):
+                key = value
+                state = "colon"
+            else:
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes", buffer, pos
+                )
+
+
+def _iter_batches(f: IO[bytes]) -> Iterator[list[tuple[str, dict]]]:
+    """Parse the TitleDB file into batches of titles"""
+    batch: list[tuple[str, dict]] = []
+    for title_id, title in _iter_json_object_items(f):
+        if not title_id or not title:
+            continue
+        batch.append((title_id, title))
+        if len(batch) >= SWITCH_TITLEDB_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class UpdateSwitchTitleDBTask(RemoteFilePullTask):
@@ -34,40 +135,64 @@ class UpdateSwitchTitleDBTask(RemoteFilePullTask):
     async def run(self, force: bool = False) -> dict[str, Any]:
         update_stats = UpdateStats()
 
-        content = await super().run(force)
-        if content is None:
-            return update_stats.to_dict()
-
-        index_json = json.loads(content)
-        relevant_data = {k: v for k, v in index_json.items() if k and v}
-        total_items = len(relevant_data)
+        start = time.monotonic()
+        import_keys = {
+            key: f"{key}:{SWITCH_TITLEDB_IMPORT_SUFFIX}"
+            for key in (SWITCH_TITLEDB_INDEX_KEY, SWITCH_PRODUCT_ID_KEY)
+        }
         processed_items = 0
 
-        # Update initial progress
-        update_stats.update(processed=processed_items, total=total_items)
-
-        async with async_cache.pipeline() as pipe:
-            for data_batch in batched(relevant_data.items(), 2000, strict=False):
-                titledb_map = {k: json.dumps(v) for k, v in dict(data_batch).items()}
-                await pipe.hset(SWITCH_TITLEDB_INDEX_KEY, mapping=titledb_map)
-                processed_items += len(data_batch)
-                update_stats.update(processed=processed_items)
-
-            for data_batch in batched(relevant_data.items(), 2000, strict=False):
-                product_map = {
-                    v["id"]: json.dumps(v)
-                    for v in dict(data_batch).values()
-                    if v.get("id")
-                }
-                if product_map:
-                    await pipe.hset(SWITCH_PRODUCT_ID_KEY, mapping=product_map)
+        # The file is spooled to disk, to keep it out of memory
+        with tempfile.TemporaryFile(dir=ROMM_TMP_PATH) as json_file:
+            if not await self.download(json_file, force):
+                return update_stats.to_dict()
+
+            await async_cache.delete(*import_keys.values())
+            update_stats.update(processed=processed_items)
+
+            batches = _iter_batches(json_file)
+            try:
+                # Parsing runs in a thread, so the event loop is free while writing
+                while batch := await asyncio.to_thread(next, batches, None):
+                    async with async_cache.pipeline(transaction=False) as pipe:
+                        await pipe.hset(
+                            import_keys[SWITCH_TITLEDB_INDEX_KEY],
+                            mapping={k: json.dumps(v) for k, v in batch},
+                        )
+                        product_map = {
+                            v["id"]: json.dumps(v) for _, v in batch if v.get("id")
+                        }
+                        if product_map:
+                            await pipe.hset(
+                                import_keys[SWITCH_PRODUCT_ID_KEY],
+                                mapping=product_map,
+                            )
+                        await pipe.execute()
+
+                    processed_items += len(batch)
+                    update_stats.update(processed=processed_items)
+            except json.JSONDecodeError:
+                await async_cache.delete(*import_keys.values())
+                raise
+
+        # Lookups keep using the previous TitleDB until the new one is complete
+        async with async_cache.pipeline(transaction=True) as pipe:
+            for key, import_key in import_keys.items():
+                if await async_cache.exists(import_key):
+                    await pipe.rename(import_key, key)
+                else:
+                    await pipe.delete(key)
             await pipe.execute()
 
-        # Final progress update
-        update_stats.update(processed=processed_items)
+        # The number of titles is only known once the file is parsed
+        update_stats.update(processed=processed_items, total=processed_items)
         log.info("Scheduled switch titledb update completed!")
 
-        return update_stats.to_dict()
+        return {
+            **update_stats.to_dict(),
+            "duration_seconds": round(time.monotonic() - start, 1),
+            "peak_memory_mb": get_peak_memory_mb(),
+        }
 
 
 update_switch_titledb_task = UpdateSwitchTitleDBTask()
@@ -1,7 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
 from enum import Enum
 from itertools import chain
-from typing import Any
+from typing import IO, Any, Final
 
 import httpx
 from rq import get_current_job
@@ -16,6 +17,9 @@ from utils.context import ctx_httpx_client
 
 tasks_scheduler = Scheduler(queue=low_prio_queue, connection=low_prio_queue.connection)
 
+# Bytes written to disk at once when downloading remote files
+DOWNLOAD_CHUNK_SIZE: Final = 1024 * 1024
+
 
 def update_job_meta(metadata: dict[str, Any]) -> None:
     """Update the current RQ job's meta data with update stats information"""
@@ -148,13 +152,18 @@ class RemoteFilePullTask(PeriodicTask, ABC):
         super().__init__(*args, **kwargs)
         self.url = url
 
-    async def run(self, force: bool = False) -> Any:
+    def _start(self, force: bool) -> bool:
         if not self.enabled and not force:
             log.info(f"Scheduled {self.description} not enabled, unscheduling...")
             self.unschedule()
-            return None
+            return False
 
         log.info(f"Scheduled {self.description} started...")
+        return True
+
+    async def run(self, force: bool = False) -> Any:
+        if not self._start(force):
+            return None
 
         httpx_client = ctx_httpx_client.get()
         try:
@@ -165,3 +174,27 @@ class RemoteFilePullTask(PeriodicTask, ABC):
             log.error(f"Scheduled {self.description} failed", exc_info=True)
             log.error(e)
             return None
+
+    async def download(self, file: IO[bytes], force: bool = False) -> bool:
+        """Stream the remote file to disk, instead of reading it in memory
+
+        Returns:
+            Whether the file was downloaded
+        """
+        if not self._start(force):
+            return False
+
+        httpx_client = ctx_httpx_client.get()
+        try:
+            async with httpx_client.stream("GET", self.url, timeout=120) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    # Disk writes run in a thread, to keep the event loop free
+                    await asyncio.to_thread(file.write, chunk)
+        except httpx.HTTPError as e:
+            log.error(f"Scheduled {self.description} failed", exc_info=True)
+            log.error(e)
+            return False
+
+        file.seek(0)
+        return True
@@ -0,0 +1,135 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+
+from adapters.services.igdb import MULTIQUERY_MAX_QUERIES, IGDBService
+from utils.context import ctx_aiohttp_session
+
+
+@pytest.fixture
+def service():
+    return IGDBService(twitch_auth=MagicMock())
+
+
+@pytest.fixture(autouse=True)
+def aiohttp_session():
+    token = ctx_aiohttp_session.set(MagicMock())
+    yield
+    ctx_aiohttp_session.reset(token)
+
+
+class TestMultiqueryBatching:
+    @pytest.mark.asyncio
+    async def test_single_query_is_sent_to_its_endpoint(self, service):
+        """Test that a query without concurrent ones isn't wrapped in a multiquery."""
+        with patch.object(
+            service, "_post", AsyncMock(return_value=[{"id": 1}])
+        ) as mock_post:
+            result = await service.list_games(fields=["id"], where="id=1")
+
+        assert result == [{"id": 1}]
+        mock_post.assert_called_once_with(
+            "https://api.igdb.com/v4/games", "fields id; where id=1;", 120
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_are_batched(self, service):
+        """Test that concurrent queries are sent in a single multiquery request."""
+        response = [
+            {"name": "0", "result": [{"id": 1}]},
+            {"name": "1", "result": [{"id": 2}]},
+        ]
+        with patch.object(
+            service, "_post", AsyncMock(return_value=response)
+        ) as mock_post:
+            games, search = await asyncio.gather(
+                service.list_games(fields=["id"], where="id=1"),
+                service.search(search_term="Zelda", fields=["game.id"]),
+            )
+
+        assert games == [{"id": 1}]
+        assert search == [{"id": 2}]
+        mock_post.assert_called_once()
+        url, content, _ = mock_post.call_args.args
+        assert url == "https://api.igdb.com/v4/multiquery"
+        assert content == (
+            'query games "0" { fields id; where id=1; };\n'
+            'query search "1" { search "Zelda"; fields game.id; };'
+        )
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_right_away(self, service):
+        """Test that batches are split at the multiquery query limit."""
+
+        async def multiquery(url, content, request_timeout):
+            return [
+                {"name": str(index), "result": [{"id": index}]}
+                for index in range(content.count("query "))
+            ]
+
+        with patch.object(
+            service, "_post", AsyncMock(side_effect=multiquery)
+        ) as mock_post:
+            results = await asyncio.gather(
+                *(
+                    service.list_games(where=f"id={index}")
+                    for index in range(MULTIQUERY_MAX_QUERIES + 2)
+                )
+            )
+
+        assert mock_post.call_count == 2
+        assert results[MULTIQUERY_MAX_QUERIES - 1] == [
+            {"id": MULTIQUERY_MAX_QUERIES - 1}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batch_uses_the_context_session(self, service):
+        """Test that batches are sent with the session of the context that started them."""
+        caller_session = MagicMock()
+        batch_sessions = []
+
+        async def post(url, content, request_timeout):
+            batch_sessions.append(ctx_aiohttp_session.get())
+            return []
+
+        ctx_aiohttp_session.set(caller_session)
+        with patch.object(service, "_post", AsyncMock(side_effect=post)):
+            await service.list_games(where="id=1")
+
+        assert batch_sessions == [caller_session]
+
+    @pytest.mark.asyncio
+    async def test_missing_results_are_empty(self, service):
+        response = [{"name": "0", "result": [{"id": 1}]}]
+        with patch.object(service, "_post", AsyncMock(return_value=response)):
+            results = await asyncio.gather(
+                service.list_games(where="id=1"),
+                service.list_games(where="id=2"),
+            )
+
+        assert results == [[{"id": 1}], []]
+
+    @pytest.mark.asyncio
+    async def test_errors_are_raised_to_all_callers(self, service):
+        error = HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        with patch.object(service, "_post", AsyncMock(side_effect=error)):
+            results = await asyncio.gather(
+                service.list_games(where="id=1"),
+                service.list_games(where="id=2"),
+                return_exceptions=True,
+            )
+
+        assert results == [error, error]
+
+    @pytest.mark.asyncio
+    @patch("adapters.services.igdb.IGDB_MULTIQUERY_ENABLED", False)
+    async def test_batching_can_be_disabled(self, service):
+        with patch.object(service, "_post", AsyncMock(return_value=[])) as mock_post:
+            await asyncio.gather(
+                service.list_games(where="id=1"),
+                service.list_games(where="id=2"),
+            )
+
+        assert mock_post.call_count == 2
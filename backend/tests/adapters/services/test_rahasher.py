@@ -1,5 +1,5 @@
 import asyncio
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -8,6 +8,7 @@ from adapters.services.rahasher import (
     RAHasherError,
     RAHasherService,
 )
+from utils.pipeline import StageStats
 
 
 class TestRAHasherValidHashRegex:
@@ -230,6 +231,65 @@ class TestRAHasherService:
 
         assert result == ""
 
+    @pytest.mark.asyncio
+    async def test_calculate_hash_timeout_kills_process(self):
+        """Test that RAHasher is killed when it runs for too long."""
+        service = RAHasherService(timeout=0.01)
+        mock_proc = AsyncMock()
+        mock_proc.kill = MagicMock()
+
+        async def wait():
+            # Hangs until killed
+            if not mock_proc.kill.called:
+                await asyncio.sleep(1)
+            return -9
+
+        mock_proc.wait.side_effect = wait
+
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
+            with patch("handler.metadata.ra_handler.RA_ID_TO_SLUG", {7: "nes"}):
+                result = await service.calculate_hash(7, "/path/to/game.nes")
+
+        assert result == ""
+        mock_proc.kill.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_calculate_hash_limits_concurrent_processes(self, service):
+        """Test that only a limited number of RAHasher processes run at once."""
+        running = 0
+        max_running = 0
+
+        async def wait():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return 1
+
+        def create_process(*args, **kwargs):
+            mock_proc = AsyncMock()
+            mock_proc.wait.side_effect = wait
+            mock_proc.stdout.read.return_value = b"a1b2c3d4e5f6789012345678901234ab\n"
+            mock_proc.stderr = None
+            return mock_proc
+
+        stats = StageStats()
+        with patch("asyncio.create_subprocess_exec", side_effect=create_process):
+            with patch("handler.metadata.ra_handler.RA_ID_TO_SLUG", {7: "nes"}):
+                with patch("adapters.services.rahasher.SCAN_RAHASHER_WORKERS", 2):
+                    results = await asyncio.gather(
+                        *(
+                            service.calculate_hash(7, f"/path/to/game{i}.nes", stats)
+                            for i in range(6)
+                        )
+                    )
+
+        assert results == ["a1b2c3d4e5f6789012345678901234ab"] * 6
+        assert max_running == 2
+        assert stats.processed == 6
+        assert stats.busy_seconds > 0
+
 
 class TestRAHasherError:
     """Test the RAHasherError exception."""
@@ -1,9 +1,30 @@
-from unittest.mock import Mock
+import asyncio
+from unittest.mock import Mock, patch
 
 import pytest
 import socketio
-
-from endpoints.sockets.scan import ScanStats, _should_scan_rom
+from rq.job import JobStatus
+from rq.worker import WorkerStatus
+
+from endpoints.sockets.scan import (
+    CHANGED_ROMS_KEY,
+    CHANGED_ROMS_SCAN_KEY,
+    SCAN_SHARDS_KEY_PREFIX,
+    STOP_SCAN_FLAG,
+    ScanCheckpoint,
+    ScanStats,
+    ScanStopToken,
+    _clear_scan_shards,
+    _enqueue_scan_shards,
+    _pop_changed_roms,
+    _scan_roms,
+    _should_scan_rom,
+    _wait_for_scan_shards,
+    queue_changed_roms,
+    scan_changed_roms,
+)
+from exceptions.socket_exceptions import ScanStoppedException
+from handler.redis_handler import async_cache, sync_cache
 from handler.scan_handler import ScanType
 from models.rom import Rom
 
@@ -72,6 +93,320 @@ async def test_merging_scan_stats():
     assert stats.new_firmware == 25
 
 
+async def test_shared_scan_stats():
+    socket_manager = Mock(spec=socketio.AsyncRedisManager)
+    coordinator_stats = ScanStats(total_platforms=2, total_roms=10)
+    await coordinator_stats.share("romm:scan_shards:test:stats")
+    shard_stats = ScanStats(shared_key="romm:scan_shards:test:stats")
+
+    await coordinator_stats.increment(socket_manager, scanned_roms=3, new_roms=1)
+    await shard_stats.increment(socket_manager, scanned_roms=2)
+
+    assert shard_stats.total_roms == 10
+    assert shard_stats.scanned_roms == 5
+    assert shard_stats.new_roms == 1
+
+    await coordinator_stats.refresh(socket_manager)
+    assert coordinator_stats.scanned_roms == 5
+
+
+async def test_scan_stats_throttled_publishing():
+    socket_manager = Mock(spec=socketio.AsyncRedisManager)
+    stats = ScanStats()
+
+    # The first change is published right away, the next ones are held back
+    await stats.increment(socket_manager, scanned_roms=1)
+    await stats.increment(socket_manager, scanned_roms=1)
+    await stats.add_scanned_rom(socket_manager, {"id": 1, "name": "Identifying"})
+    await stats.add_scanned_rom(socket_manager, {"id": 1, "name": "Identified"})
+    assert socket_manager.emit.call_count == 1
+
+    await stats.flush(socket_manager)
+    socket_manager.emit.assert_any_call(
+        "scan:scanning_roms", [{"id": 1, "name": "Identified"}]
+    )
+    socket_manager.emit.assert_called_with("scan:update_stats", stats.to_dict())
+    assert stats.scanned_roms == 2
+
+    # Nothing left to publish
+    socket_manager.emit.reset_mock()
+    await stats.flush(socket_manager)
+    socket_manager.emit.assert_not_called()
+
+
+class FakeShardJob:
+    def __init__(self, job_id: str, status: JobStatus, result=None) -> None:
+        self.id = job_id
+        self.status = status
+        self.result = result
+        self.exc_info = "Traceback" if status == JobStatus.FAILED else None
+
+    def get_status(self) -> JobStatus:
+        return self.status
+
+    def cancel(self) -> None:
+        self.status = JobStatus.CANCELED
+
+    def return_value(self):
+        return self.result
+
+
+async def test_scan_shards_use_idle_workers():
+    """Test that only the idle workers of the scan queue get a shard"""
+    workers = [Mock(), Mock(), Mock()]
+    workers[0].get_state.return_value = WorkerStatus.BUSY
+    workers[1].get_state.return_value = WorkerStatus.IDLE
+    workers[2].get_state.return_value = WorkerStatus.IDLE
+
+    with (
+        patch("endpoints.sockets.scan.Worker.all", return_value=workers),
+        patch("endpoints.sockets.scan.high_prio_queue.enqueue") as enqueue,
+    ):
+        try:
+            shard_jobs = await _enqueue_scan_shards(
+                scan_id="test",
+                platform_list=["gba", "n64", "snes", "psx"],
+                fs_platforms=["gba", "n64", "snes", "psx"],
+                metadata_sources=[],
+                scan_type=ScanType.QUICK,
+                roms_ids=[],
+                scan_stats=ScanStats(),
+            )
+        finally:
+            _clear_scan_shards("test")
+
+    assert len(shard_jobs) == 2
+    assert enqueue.call_count == 2
+
+
+async def test_scan_shards_not_enqueued_without_idle_workers():
+    workers = [Mock()]
+    workers[0].get_state.return_value = WorkerStatus.BUSY
+
+    with patch("endpoints.sockets.scan.Worker.all", return_value=workers):
+        assert not await _enqueue_scan_shards(
+            scan_id="test",
+            platform_list=["gba", "n64"],
+            fs_platforms=["gba", "n64"],
+            metadata_sources=[],
+            scan_type=ScanType.QUICK,
+            roms_ids=[],
+            scan_stats=ScanStats(),
+        )
+
+
+async def test_wait_for_scan_shards():
+    """Test that unstarted shards are cancelled and failed ones retried"""
+    sync_cache.hset(f"{SCAN_SHARDS_KEY_PREFIX}:test:scanning", "failed", "n64")
+    shard_jobs = [
+        FakeShardJob(
+            "finished",
+            JobStatus.FINISHED,
+            {"stages": {"hash": [2, 1.5]}, "crc_only_platform_ids": [3]},
+        ),
+        FakeShardJob("failed", JobStatus.FAILED),
+        FakeShardJob("queued", JobStatus.QUEUED),
+    ]
+    scan_stats = ScanStats()
+    crc_only_platform_ids: set[int] = set()
+
+    try:
+        unfinished_platforms = await _wait_for_scan_shards(
+            "test",
+            shard_jobs,  # type: ignore[arg-type]
+            Mock(spec=socketio.AsyncRedisManager),
+            scan_stats,
+            crc_only_platform_ids,
+        )
+    finally:
+        _clear_scan_shards("test")
+
+    assert unfinished_platforms == ["n64"]
+    assert shard_jobs[2].status == JobStatus.CANCELED
+    assert scan_stats.get_stage_stats("hash").processed == 2
+    assert crc_only_platform_ids == {3}
+
+
+def test_changed_roms_are_merged():
+    sync_cache.delete(CHANGED_ROMS_KEY, CHANGED_ROMS_SCAN_KEY)
+
+    # Only the first change schedules a scan, the next ones are added to it
+    assert queue_changed_roms([("n64", "Paper Mario (USA).z64")])
+    assert not queue_changed_roms(
+        [("n64", "Super Mario 64 (USA).z64"), ("snes", "Zelda (USA).sfc")]
+    )
+    assert not queue_changed_roms([])
+
+    assert _pop_changed_roms() == {
+        "n64": {"Paper Mario (USA).z64", "Super Mario 64 (USA).z64"},
+        "snes": {"Zelda (USA).sfc"},
+    }
+    assert _pop_changed_roms() == {}
+
+    sync_cache.delete(CHANGED_ROMS_SCAN_KEY)
+
+
+async def test_failed_changed_roms_scan():
+    """Test that clients are told when scanning the changed roms fails"""
+    sync_cache.delete(CHANGED_ROMS_KEY, CHANGED_ROMS_SCAN_KEY)
+    queue_changed_roms([("n64", "Paper Mario (USA).z64")])
+    socket_manager = Mock(spec=socketio.AsyncRedisManager)
+
+    with (
+        patch(
+            "endpoints.sockets.scan._get_socket_manager", return_value=socket_manager
+        ),
+        patch(
+            "endpoints.sockets.scan._scan_changed_platform_roms",
+            side_effect=RuntimeError("Database unavailable"),
+        ),
+    ):
+        with pytest.raises(RuntimeError):
+            await scan_changed_roms(metadata_sources=[])
+
+    socket_manager.emit.assert_any_call("scan:done_ko", "Database unavailable")
+    assert all(call.args[0] != "scan:done" for call in socket_manager.emit.mock_calls)
+
+
+def test_scan_checkpoint():
+    options = {
+        "platform_ids": [1, 2],
+        "metadata_sources": ["igdb"],
+        "scan_type": "complete",
+        "roms_ids": [],
+    }
+    checkpoint = ScanCheckpoint("scan")
+    checkpoint.start(options, ScanStats(total_roms=10))
+    assert ScanCheckpoint.get_latest() == ("scan", options)
+
+    # Progress within the interval is only saved when forced
+    checkpoint.save_rom_progress("n64", "a.z64", [], ScanStats(scanned_roms=1))
+    checkpoint.save_rom_progress("n64", "b.z64", [], ScanStats(scanned_roms=2))
+    checkpoint.save_platform_done("gba", ScanStats(scanned_roms=3))
+    checkpoint.save_rom_progress(
+        "n64", "c.z64", {"b.z64"}, ScanStats(scanned_roms=4), force=True
+    )
+
+    resumed_checkpoint = ScanCheckpoint("scan")
+    resumed_checkpoint.load()
+    assert resumed_checkpoint.is_platform_done("gba")
+    assert not resumed_checkpoint.is_platform_done("n64")
+    assert resumed_checkpoint.get_last_rom("n64") == "c.z64"
+    assert resumed_checkpoint.get_last_rom("snes") is None
+    assert resumed_checkpoint.get_failed_roms("n64") == {"b.z64"}
+    assert resumed_checkpoint.get_failed_roms("snes") == set()
+
+    scan_stats = ScanStats()
+    resumed_checkpoint.restore_stats(scan_stats)
+    assert scan_stats.scanned_roms == 4
+
+    resumed_checkpoint.clear()
+    assert ScanCheckpoint.get_latest() is None
+
+
+async def test_scan_roms_checkpoint_keeps_failed_roms():
+    """Test that the checkpoint moves past failed ROMs, but keeps them to retry"""
+    platform = Mock(id=1, slug="n64", fs_slug="n64")
+    fs_roms = [{"fs_name": fs_name} for fs_name in ("a.z64", "b.z64", "c.z64")]
+    checkpoint = ScanCheckpoint("scan")
+    checkpoint.start({}, ScanStats())
+
+    async def hash_rom(rom_scan, **kwargs):
+        if rom_scan.fs_rom["fs_name"] == "b.z64":
+            raise OSError("Unreadable ROM")
+        return None
+
+    stop_token = ScanStopToken()
+    with (
+        patch(
+            "endpoints.sockets.scan.db_rom_handler.get_roms_by_fs_name",
+            return_value={},
+        ),
+        patch("endpoints.sockets.scan._hash_rom", side_effect=hash_rom),
+    ):
+        unscanned_fs_names = await _scan_roms(
+            platform=platform,
+            fs_roms=fs_roms,
+            scan_type=ScanType.COMPLETE,
+            roms_ids=[],
+            metadata_sources=[],
+            socket_manager=Mock(spec=socketio.AsyncRedisManager),
+            scan_stats=ScanStats(),
+            stop_token=stop_token,
+            checkpoint=checkpoint,
+        )
+
+    assert unscanned_fs_names == {"b.z64"}
+    checkpoint.load()
+    assert checkpoint.get_last_rom("n64") == "c.z64"
+    assert checkpoint.get_failed_roms("n64") == {"b.z64"}
+
+    # Once retried successfully, the ROM is no longer kept as failed
+    with (
+        patch(
+            "endpoints.sockets.scan.db_rom_handler.get_roms_by_fs_name",
+            return_value={},
+        ),
+        patch("endpoints.sockets.scan._hash_rom", return_value=None),
+    ):
+        await _scan_roms(
+            platform=platform,
+            fs_roms=[fs_roms[1]],
+            scan_type=ScanType.COMPLETE,
+            roms_ids=[],
+            metadata_sources=[],
+            socket_manager=Mock(spec=socketio.AsyncRedisManager),
+            scan_stats=ScanStats(),
+            stop_token=stop_token,
+            checkpoint=checkpoint,
+        )
+
+    checkpoint.load()
+    assert checkpoint.get_last_rom("n64") == "c.z64"
+    assert checkpoint.get_failed_roms("n64") == set()
+    checkpoint.clear()
+
+
+def test_scan_checkpoints_are_separate():
+    """Test that a new scan doesn't touch the progress of other scans"""
+    ScanCheckpoint("first").start({"platform_ids": [1]}, ScanStats())
+    ScanCheckpoint("first").save_platform_done("gba", ScanStats())
+    ScanCheckpoint("second").start({"platform_ids": [2]}, ScanStats())
+
+    first_checkpoint = ScanCheckpoint("first")
+    first_checkpoint.load()
+    second_checkpoint = ScanCheckpoint("second")
+    second_checkpoint.load()
+    assert first_checkpoint.is_platform_done("gba")
+    assert not second_checkpoint.is_platform_done("gba")
+    assert ScanCheckpoint.get_latest() == ("second", {"platform_ids": [2]})
+
+    first_checkpoint.clear()
+    second_checkpoint.clear()
+
+
+async def test_scan_stop_token():
+    stop_token = ScanStopToken(refresh_interval=0.01)
+    stop_token.start()
+    try:
+        assert await stop_token.run(asyncio.sleep(0, result="done")) == "done"
+        assert not stop_token.is_stopped()
+
+        await async_cache.set(STOP_SCAN_FLAG, 1)
+        work = asyncio.ensure_future(asyncio.sleep(10))
+        with pytest.raises(ScanStoppedException):
+            await asyncio.wait_for(stop_token.run(work), timeout=1)
+
+        # In-flight work is cancelled as soon as the scan is stopped
+        assert work.cancelled()
+        assert stop_token.is_stopped()
+        with pytest.raises(ScanStoppedException):
+            stop_token.raise_if_stopped()
+    finally:
+        await stop_token.close()
+        await async_cache.delete(STOP_SCAN_FLAG)
+
+
 class TestShouldScanRom:
     def test_new_platforms_scan_with_no_rom(self):
         """NEW_PLATFORMS should scan when rom is None"""
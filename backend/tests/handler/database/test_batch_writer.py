@@ -0,0 +1,85 @@
+"""Tests for the batched writes of ROM scan results."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from handler.database.batch_writer import RomsBatchWriter
+from models.rom import RomFile
+
+
+class TestRomsBatchWriter:
+    """Test accumulating and flushing ROM writes."""
+
+    def test_flushes_when_batch_is_full(self):
+        """Test that writes are held until enough ROMs are pending."""
+        handler = MagicMock()
+        writer = RomsBatchWriter(handler, batch_size=2, interval_ms=60_000)
+
+        writer.update_rom(1, {"fs_name": "a.zip"})
+        handler.bulk_update_roms.assert_not_called()
+
+        writer.update_rom(2, {"fs_name": "b.zip"})
+        handler.bulk_update_roms.assert_called_once_with(
+            [{"id": 1, "fs_name": "a.zip"}, {"id": 2, "fs_name": "b.zip"}]
+        )
+        assert writer.pending_roms == 0
+
+    def test_updates_are_coalesced(self):
+        """Test that pending updates and files of the same ROM are merged."""
+        handler = MagicMock()
+        writer = RomsBatchWriter(handler, batch_size=10, interval_ms=60_000)
+        old_files = [RomFile(rom_id=1, file_name="old.bin")]
+        new_files = [RomFile(rom_id=1, file_name="new.bin")]
+
+        writer.update_rom(1, {"fs_name": "a.zip", "missing_from_fs": False})
+        writer.update_rom(1, {"path_cover_s": "cover.png"})
+        writer.replace_rom_files(1, old_files)
+        writer.replace_rom_files(1, new_files)
+        assert writer.pending_roms == 1
+
+        writer.flush()
+
+        handler.replace_rom_files.assert_called_once_with({1: new_files})
+        handler.bulk_update_roms.assert_called_once_with(
+            [
+                {
+                    "id": 1,
+                    "fs_name": "a.zip",
+                    "missing_from_fs": False,
+                    "path_cover_s": "cover.png",
+                }
+            ]
+        )
+
+    def test_flushes_after_interval(self):
+        """Test that pending writes are flushed once the interval has elapsed."""
+        handler = MagicMock()
+        writer = RomsBatchWriter(handler, batch_size=10, interval_ms=0)
+
+        writer.update_rom(1, {"fs_name": "a.zip"})
+
+        handler.bulk_update_roms.assert_called_once()
+        assert writer.pending_roms == 0
+
+    async def test_flushes_periodically(self):
+        """Test that pending writes are flushed without waiting for another write."""
+        handler = MagicMock()
+        writer = RomsBatchWriter(handler, batch_size=10, interval_ms=10)
+
+        writer.update_rom(1, {"fs_name": "a.zip"})
+        handler.bulk_update_roms.assert_not_called()
+
+        flush_task = asyncio.create_task(writer.flush_periodically())
+        await asyncio.sleep(0.05)
+        flush_task.cancel()
+
+        handler.bulk_update_roms.assert_called_once()
+        assert writer.pending_roms == 0
+
+    def test_flush_without_pending_writes(self):
+        """Test that flushing with nothing pending doesn't touch the database."""
+        handler = MagicMock()
+        RomsBatchWriter(handler).flush()
+
+        handler.replace_rom_files.assert_not_called()
+        handler.bulk_update_roms.assert_not_called()
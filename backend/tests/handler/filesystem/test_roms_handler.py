@@ -7,13 +7,16 @@ import pytest
 
 from config.config_manager import LIBRARY_BASE_PATH, Config
 from handler.filesystem.roms_handler import (
-    CHDHashWrapper,
+    ROM_HASHES_KEY_PREFIX,
     FileHash,
     FSRomsHandler,
-    extract_chd_hash,
+    _file_fingerprint,
+    _get_rom_fingerprint,
 )
+from handler.redis_handler import async_cache
 from models.platform import Platform
 from models.rom import Rom, RomFile, RomFileCategory
+from utils.hashing import CHDHashWrapper, extract_chd_hash
 
 
 class TestFSRomsHandler:
@@ -338,6 +341,171 @@ class TestFSRomsHandler:
             # Check excluded files are not present
             assert "excluded_test.tmp" not in rom_names
 
+    @pytest.mark.asyncio
+    async def test_get_roms_listing_with_manifest(
+        self, handler: FSRomsHandler, platform, config
+    ):
+        """Test that an unchanged directory is read from the manifest of the last scan"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            await handler.clear_roms_manifest(platform.fs_slug)
+            try:
+                listing = await handler.get_roms_listing(platform, use_manifest=True)
+                assert listing.known_fs_names is None
+
+                await handler.save_roms_manifest(
+                    platform, listing, unscanned_fs_names=["Paper Mario (USA).z64"]
+                )
+
+                async def fail_listing(path: str) -> list[str]:
+                    raise AssertionError("Directory listed again")
+
+                m.setattr(handler, "list_files", fail_listing)
+                m.setattr(handler, "list_directories", fail_listing)
+
+                cached_listing = await handler.get_roms_listing(
+                    platform, use_manifest=True
+                )
+                assert cached_listing.roms == listing.roms
+                assert cached_listing.known_fs_names is not None
+                assert "Super Mario 64 (J) (Rev A)" in cached_listing.known_fs_names
+                # Failed roms are retried by the next scan
+                assert "Paper Mario (USA).z64" not in cached_listing.known_fs_names
+            finally:
+                await handler.clear_roms_manifest(platform.fs_slug)
+
+    @pytest.mark.asyncio
+    async def test_get_roms_listing_manifest_checks_roms(
+        self, handler: FSRomsHandler, platform, config
+    ):
+        """Test that changed roms and exclusion settings aren't known from the manifest"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            await handler.clear_roms_manifest(platform.fs_slug)
+            try:
+                listing = await handler.get_roms_listing(platform)
+                await handler.save_roms_manifest(platform, listing)
+
+                # Only quick scans use the manifest
+                assert (await handler.get_roms_listing(platform)).known_fs_names is None
+
+                fingerprints = dict(listing.fingerprints)
+                size, mtime_ns = fingerprints["Super Mario 64 (J) (Rev A)"]
+                fingerprints["Super Mario 64 (J) (Rev A)"] = (size + 1, mtime_ns)
+                m.setattr(
+                    "handler.filesystem.roms_handler._get_roms_fingerprints",
+                    lambda roms_path, roms: fingerprints,
+                )
+                known_fs_names = (
+                    await handler.get_roms_listing(platform, use_manifest=True)
+                ).known_fs_names
+                assert known_fs_names is not None
+                assert "Paper Mario (USA).z64" in known_fs_names
+                assert "Super Mario 64 (J) (Rev A)" not in known_fs_names
+
+                config.EXCLUDED_SINGLE_EXT = ["tmp", "n64"]
+                listing = await handler.get_roms_listing(platform, use_manifest=True)
+                assert listing.known_fs_names is None
+                assert "Zelda (USA) (Rev 1) [En,Fr] [Test].n64" not in [
+                    rom["fs_name"] for rom in listing.roms
+                ]
+            finally:
+                await handler.clear_roms_manifest(platform.fs_slug)
+
+    def test_rom_fingerprint_of_multi_part_rom(self, tmp_path: Path):
+        """Test that changes to the files of a multi-part rom change its fingerprint"""
+        rom_path = tmp_path / "rom"
+        (rom_path / "disc").mkdir(parents=True)
+        (rom_path / "disc" / "track1.bin").write_bytes(b"1234")
+        (rom_path / "game.cue").write_bytes(b"12")
+
+        size, mtime_ns = _get_rom_fingerprint(rom_path, nested=True)
+        assert size == 6
+
+        os.utime(rom_path / "disc" / "track1.bin", ns=(mtime_ns + 10**9,) * 2)
+        assert _get_rom_fingerprint(rom_path, nested=True) == (6, mtime_ns + 10**9)
+
+        (rom_path / "disc" / "track1.bin").write_bytes(b"123")
+        assert _get_rom_fingerprint(rom_path, nested=True)[0] == 5
+        assert _get_rom_fingerprint(tmp_path / "missing", nested=False) is None
+
+    @pytest.mark.asyncio
+    async def test_get_roms_by_fs_names(self, handler: FSRomsHandler, platform, config):
+        """Test looking up only the given roms, without listing the directory"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            result = await handler.get_roms_by_fs_names(
+                platform,
+                [
+                    "Paper Mario (USA).z64",
+                    "Super Mario 64 (J) (Rev A)",
+                    "excluded_test.tmp",
+                    "Deleted (USA).z64",
+                ],
+            )
+
+            assert [(rom["fs_name"], rom["nested"]) for rom in result] == [
+                ("Paper Mario (USA).z64", False),
+                ("Super Mario 64 (J) (Rev A)", True),
+            ]
+
+    def test_file_fingerprint_missing_file(self, handler: FSRomsHandler):
+        """Test that files removed since they were listed have no fingerprint"""
+        assert _file_fingerprint(handler.base_path / "n64/roms/missing.n64") is None
+
+    @pytest.mark.asyncio
+    async def test_find_renamed_roms(self, handler: FSRomsHandler, platform, config):
+        """Test matching a removed rom with the new file it was renamed to"""
+        test_file = handler.base_path / "n64/roms/renamed_test.n64"
+        test_file.write_text("Test ROM content")
+        cache_key = f"{ROM_HASHES_KEY_PREFIX}:n64/roms/original_test.n64"
+
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            try:
+                # Hashed before the rename, the inode is kept by the rename
+                await handler._set_cached_rom_hashes(
+                    cache_key,
+                    {
+                        "files": {
+                            "n64/roms/original_test.n64": {
+                                "crc_hash": "",
+                                "md5_hash": "",
+                                "sha1_hash": "",
+                                "fingerprint": _file_fingerprint(test_file),
+                            }
+                        },
+                        "combined_fingerprint": [],
+                        "combined_hash": FileHash(
+                            crc_hash="", md5_hash="", sha1_hash=""
+                        ),
+                        "ra_fingerprint": [],
+                        "ra_hash": "",
+                    },
+                )
+                removed_rom = Rom(id=10, fs_name="original_test.n64")
+                other_rom = Rom(id=11, fs_name="other_test.n64")
+                fs_roms = await handler.get_roms_by_fs_names(
+                    platform, ["renamed_test.n64"]
+                )
+
+                renamed_roms = await handler.find_renamed_roms(
+                    platform, [other_rom, removed_rom], fs_roms
+                )
+
+                assert renamed_roms == {"renamed_test.n64": removed_rom}
+            finally:
+                await async_cache.delete(cache_key)
+                test_file.unlink()
+
     @pytest.mark.asyncio
     async def test_get_rom_files_single_rom(
         self, handler: FSRomsHandler, rom_single, config
@@ -766,6 +934,96 @@ class TestFSRomsHandler:
         assert parsed_rom_files.rom_files[0].md5_hash == parsed_rom_files.md5_hash
         assert parsed_rom_files.rom_files[0].sha1_hash == parsed_rom_files.sha1_hash
 
+    @pytest.mark.asyncio
+    async def test_get_rom_files_reuses_hashes_of_unchanged_files(
+        self, platform, tmp_path, mocker
+    ):
+        """Test that unchanged files are not hashed again, and changed ones are."""
+        roms_path = tmp_path / platform.fs_slug / "roms"
+        roms_path.mkdir(parents=True)
+        rom_file = roms_path / "cached.z64"
+        rom_file.write_bytes(b"original content")
+
+        test_handler = FSRomsHandler()
+        test_handler.base_path = tmp_path
+        hash_files_spy = mocker.spy(test_handler.hashing_engine, "hash_files")
+
+        rom = Rom(
+            id=1,
+            fs_name="cached.z64",
+            fs_path=str(roms_path.relative_to(tmp_path)),
+            platform=platform,
+        )
+
+        try:
+            first_parsed_rom_files = await test_handler.get_rom_files(rom)
+            second_parsed_rom_files = await test_handler.get_rom_files(rom)
+            assert hash_files_spy.call_count == 1
+            assert second_parsed_rom_files.md5_hash == first_parsed_rom_files.md5_hash
+            assert (
+                second_parsed_rom_files.rom_files[0].sha1_hash
+                == first_parsed_rom_files.rom_files[0].sha1_hash
+            )
+
+            rom_file.write_bytes(b"modified content, with a different size")
+            third_parsed_rom_files = await test_handler.get_rom_files(rom)
+            assert hash_files_spy.call_count == 2
+            assert third_parsed_rom_files.md5_hash != first_parsed_rom_files.md5_hash
+        finally:
+            test_handler.hashing_engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_get_rom_files_reuses_hashes_from_database(
+        self, platform, tmp_path, mocker
+    ):
+        """Test that unchanged files stored in the database aren't hashed again."""
+        roms_path = tmp_path / platform.fs_slug / "roms"
+        roms_path.mkdir(parents=True)
+        rom_path = roms_path / "stored.z64"
+        rom_path.write_bytes(b"stored content")
+        fs_path = str(roms_path.relative_to(tmp_path))
+
+        test_handler = FSRomsHandler()
+        test_handler.base_path = tmp_path
+        hash_files_spy = mocker.spy(test_handler.hashing_engine, "hash_files")
+
+        rom = Rom(
+            id=2,
+            fs_name="stored.z64",
+            fs_path=fs_path,
+            platform=platform,
+            crc_hash="11111111",
+            md5_hash="22222222222222222222222222222222",
+            sha1_hash="3333333333333333333333333333333333333333",
+            files=[
+                RomFile(
+                    file_name="stored.z64",
+                    file_path=fs_path,
+                    file_size_bytes=rom_path.stat().st_size,
+                    last_modified=os.path.getmtime(rom_path),
+                    crc_hash="11111111",
+                    md5_hash="22222222222222222222222222222222",
+                    sha1_hash="3333333333333333333333333333333333333333",
+                )
+            ],
+        )
+
+        try:
+            parsed_rom_files = await test_handler.get_rom_files(rom)
+            assert hash_files_spy.call_count == 0
+            assert parsed_rom_files.md5_hash == rom.md5_hash
+            assert parsed_rom_files.rom_files[0].sha1_hash == rom.sha1_hash
+
+            # Files changed since they were stored are hashed again
+            await async_cache.delete(f"{ROM_HASHES_KEY_PREFIX}:{fs_path}/stored.z64")
+            rom_path.write_bytes(b"changed content, with a different size")
+            parsed_rom_files = await test_handler.get_rom_files(rom)
+            assert hash_files_spy.call_count == 1
+            assert parsed_rom_files.md5_hash != rom.md5_hash
+        finally:
+            await async_cache.delete(f"{ROM_HASHES_KEY_PREFIX}:{fs_path}/stored.z64")
+            test_handler.hashing_engine.shutdown()
+
 
 class TestExtractCHDHash:
     """Test suite for extract_chd_hash function"""
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import re
 from unittest.mock import AsyncMock, patch
@@ -21,6 +22,7 @@ from handler.metadata.base_handler import (
     MetadataHandler,
     UniversalPlatformSlug,
     _normalize_search_term,
+    single_flight,
 )
 from handler.redis_handler import async_cache
 
@@ -31,6 +33,120 @@ class ExampleMetadataHandler(MetadataHandler):
         return True
 
 
+class SingleFlightHandler(ExampleMetadataHandler):
+    def __init__(self):
+        self.calls = 0
+        self.finished = 0
+
+    @single_flight
+    async def get_rom_by_id(self, rom_id: int, delay: float = 0.01) -> dict:
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if rom_id < 0:
+            raise ValueError("Invalid ID")
+        self.finished += 1
+        return {"id": rom_id, "genres": ["Platform"]}
+
+    @single_flight
+    async def get_rom(self, rom: object) -> dict:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"rom": repr(rom)}
+
+
+class TestSingleFlight:
+    """Test sharing concurrent lookups with the same arguments."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_shared(self):
+        handler = SingleFlightHandler()
+
+        first, second, other = await asyncio.gather(
+            handler.get_rom_by_id(1),
+            handler.get_rom_by_id(1),
+            handler.get_rom_by_id(2),
+        )
+
+        assert first == second == {"id": 1, "genres": ["Platform"]}
+        assert other == {"id": 2, "genres": ["Platform"]}
+        assert handler.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_callers_get_their_own_result(self):
+        handler = SingleFlightHandler()
+
+        first, second = await asyncio.gather(
+            handler.get_rom_by_id(1), handler.get_rom_by_id(1)
+        )
+
+        assert first is not second
+        assert first["genres"] is not second["genres"]
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_are_not_shared(self):
+        handler = SingleFlightHandler()
+
+        await handler.get_rom_by_id(1)
+        await handler.get_rom_by_id(1)
+
+        assert handler.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_raised_to_all_callers(self):
+        handler = SingleFlightHandler()
+
+        results = await asyncio.gather(
+            handler.get_rom_by_id(-1),
+            handler.get_rom_by_id(-1),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert handler.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        handler = SingleFlightHandler()
+
+        first = asyncio.create_task(handler.get_rom_by_id(1))
+        second = asyncio.create_task(handler.get_rom_by_id(1))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == {"id": 1, "genres": ["Platform"]}
+        assert first.cancelled()
+        assert handler.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_lookup_cancelled_with_its_last_caller(self):
+        handler = SingleFlightHandler()
+
+        callers = [
+            asyncio.create_task(handler.get_rom_by_id(1, delay=0.05)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.1)
+
+        assert handler.calls == 1
+        assert handler.finished == 0
+
+        # A new call starts a new lookup instead of joining the cancelled one
+        assert await handler.get_rom_by_id(1) == {"id": 1, "genres": ["Platform"]}
+        assert handler.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_non_json_arguments_are_not_shared(self):
+        handler = SingleFlightHandler()
+        rom = object()
+
+        await asyncio.gather(handler.get_rom(rom), handler.get_rom(rom))
+
+        assert handler.calls == 2
+
+
 class TestNormalizeSearchTerm:
     """Test the _normalize_search_term function."""
 
@@ -138,6 +254,40 @@ class TestMetadataHandlerMethods:
             mock_func.assert_called_once_with("Test Game", True, False)
             assert result == "normalized"
 
+    def test_find_best_match(self, handler: MetadataHandler):
+        """Test that the closest normalized name is matched."""
+        best_match, score = handler.find_best_match(
+            "Legend of Zelda, The: Ocarina of Time",
+            ["Super Mario 64", "The Legend of Zelda: Ocarina of Time", "Zelda"],
+        )
+
+        assert best_match == "The Legend of Zelda: Ocarina of Time"
+        assert score == 1.0
+
+    def test_find_best_match_below_min_score(self, handler: MetadataHandler):
+        assert handler.find_best_match("Banjo-Kazooie", ["Super Mario 64"]) == (
+            None,
+            0.0,
+        )
+
+    def test_find_best_match_first_of_equal_scores(self, handler: MetadataHandler):
+        """Test that the first candidate wins between equal scores."""
+        best_match, _ = handler.find_best_match(
+            "Mario Kart", ["Mario Karts", "Mario-Kart!", "Mario Kart"]
+        )
+
+        assert best_match == "Mario-Kart!"
+
+    def test_find_best_match_split_game_name(self, handler: MetadataHandler):
+        best_match, score = handler.find_best_match(
+            "Ocarina of Time",
+            ["Zelda: Ocarina of Time", "Majora's Mask"],
+            split_game_name=True,
+        )
+
+        assert best_match == "Zelda: Ocarina of Time"
+        assert score == 1.0
+
     @pytest.mark.asyncio
     async def test_ps2_opl_format_found(self, handler: MetadataHandler):
         """Test PS2 OPL format when serial is found."""
@@ -246,11 +396,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_titledb_format_cache_exists(self, handler: MetadataHandler):
         """Test Switch TitleDB format when cache exists."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
 
             mock_exists.return_value = True
             mock_hget.return_value = json.dumps(
@@ -271,11 +420,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_titledb_format_not_found(self, handler: MetadataHandler):
         """Test Switch TitleDB format when title ID not found."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
 
             mock_exists.return_value = True
             mock_hget.return_value = None
@@ -289,11 +437,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_productid_format_found(self, handler: MetadataHandler):
         """Test Switch Product ID format when found."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
             mock_exists.return_value = True
             mock_hget.return_value = json.dumps({"name": "Product Game"})
 
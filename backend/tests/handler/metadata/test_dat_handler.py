@@ -0,0 +1,104 @@
+import io
+import json
+
+from handler.metadata.dat_handler import (
+    DAT_OTHER_SOURCE,
+    DATHandler,
+    DATRom,
+    detect_dat_source,
+    get_dat_index_key,
+    iter_dat_games,
+)
+from handler.redis_handler import async_cache
+from models.rom import RomFile
+
+SAMPLE_DAT = b"""<?xml version="1.0"?>
+<!DOCTYPE datafile PUBLIC "-//Logiqx//DTD ROM Management Datafile//EN" "http://www.logiqx.com/Dats/datafile.dtd">
+<datafile>
+    <header>
+        <name>Nintendo - Game Boy</name>
+        <description>Nintendo - Game Boy (20240101-000000)</description>
+        <homepage>No-Intro</homepage>
+    </header>
+    <game name="Tetris (World) (Rev 1)">
+        <description>Tetris (World) (Rev 1)</description>
+        <rom name="Tetris (World) (Rev 1).gb" size="32768" crc="46DF91AD" md5="084F1E457749CDEC86183189BD88CE69" sha1="74591CC9501AF93873F9A5D3EB12DA12C0723BBC"/>
+    </game>
+    <game name="Missing Game (Japan)">
+        <rom name="Missing Game (Japan).gb" size="32768" status="nodump"/>
+    </game>
+</datafile>
+"""
+
+
+class TestDetectDATSource:
+    def test_known_sources(self):
+        assert detect_dat_source({"homepage": "No-Intro"}) == "nointro_match"
+        assert detect_dat_source({"url": "http://redump.org/"}) == "redump_match"
+        assert (
+            detect_dat_source({"category": "TOSEC", "name": "Commodore Amiga"})
+            == "tosec_match"
+        )
+
+    def test_unknown_source(self):
+        assert detect_dat_source({"name": "My own DAT"}) == DAT_OTHER_SOURCE
+
+
+def test_iter_dat_games():
+    headers = []
+    games = list(iter_dat_games(io.BytesIO(SAMPLE_DAT), headers.append))
+
+    assert headers[0]["homepage"] == "No-Intro"
+    # Games without any dumped ROM are skipped
+    assert [game["name"] for game in games] == ["Tetris (World) (Rev 1)"]
+    assert games[0]["roms"] == [
+        {
+            "size": 32768,
+            "crc": "46df91ad",
+            "md5": "084f1e457749cdec86183189bd88ce69",
+            "sha1": "74591cc9501af93873f9a5d3eb12da12c0723bbc",
+        }
+    ]
+
+
+class TestDATHandler:
+    async def test_lookup_rom(self):
+        entry = {"name": "Tetris", "dat": "Nintendo - Game Boy", "regions": []}
+        await async_cache.hset(
+            get_dat_index_key("nointro_match", "crc"),
+            "46df91ad",
+            json.dumps({**entry, "size": 32768}),
+        )
+        try:
+            handler = DATHandler()
+
+            match = await handler.lookup_rom(
+                [
+                    RomFile(
+                        file_name="tetris.gb",
+                        file_size_bytes=32768,
+                        crc_hash="46df91ad",
+                    )
+                ]
+            )
+            assert match == DATRom(**entry, size=32768, source="nointro_match")
+
+            # The CRC32 alone isn't enough when the size doesn't match
+            assert not await handler.lookup_rom(
+                [
+                    RomFile(
+                        file_name="tetris.gb", file_size_bytes=1024, crc_hash="46df91ad"
+                    )
+                ]
+            )
+        finally:
+            await async_cache.delete(get_dat_index_key("nointro_match", "crc"))
+
+    def test_merge_verification(self):
+        dat_rom = DATRom(name="Tetris", dat="", regions=[], source="nointro_match")
+        assert DATHandler.merge_verification(
+            {"nointro_match": False, "redump_match": False}, dat_rom
+        ) == {"nointro_match": True, "redump_match": False}
+
+        other_rom = DATRom(name="Tetris", dat="", regions=[], source=DAT_OTHER_SOURCE)
+        assert DATHandler.merge_verification(None, other_rom) == {}
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+from handler.filesystem import fs_platform_handler
+from handler.metadata.gamelist_handler import (
+    GAMELIST_CACHE_KEY_PREFIX,
+    GamelistHandler,
+)
+from handler.redis_handler import async_cache
+from models.platform import Platform
+
+GAMELIST_XML = """<?xml version="1.0"?>
+<gameList>
+    <game>
+        <path>./Super Mario 64 (USA).z64</path>
+        <name>{name}</name>
+        <desc>Mario's first 3D adventure</desc>
+        <rating>0.9</rating>
+    </game>
+    <game>
+        <name>Missing path</name>
+    </game>
+</gameList>
+"""
+
+
+def write_gamelist(path, name: str, mtime: float) -> None:
+    path.write_text(GAMELIST_XML.format(name=name))
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def platform():
+    return Platform(id=1, name="Nintendo 64", slug="n64", fs_slug="n64")
+
+
+@pytest.fixture
+async def gamelist_path(tmp_path, mocker, platform):
+    mocker.patch.object(fs_platform_handler, "base_path", tmp_path)
+    mocker.patch.object(
+        fs_platform_handler, "get_platform_fs_structure", return_value="n64"
+    )
+    (tmp_path / "n64").mkdir()
+    path = tmp_path / "n64" / "gamelist.xml"
+    write_gamelist(path, "Super Mario 64", time.time() - 60)
+
+    yield path
+
+    await async_cache.delete(f"{GAMELIST_CACHE_KEY_PREFIX}:{platform.id}")
+
+
+class TestGamelistCache:
+    """Test reusing parsed gamelist.xml files between processes."""
+
+    async def test_games_are_parsed(self, gamelist_path, platform):
+        roms = await GamelistHandler()._get_gamelist_roms(gamelist_path, platform)
+
+        assert list(roms) == ["Super Mario 64 (USA).z64"]
+        assert roms["Super Mario 64 (USA).z64"]["name"] == "Super Mario 64"
+        assert roms["Super Mario 64 (USA).z64"]["summary"] == (
+            "Mario's first 3D adventure"
+        )
+
+    async def test_parsed_games_are_shared(self, gamelist_path, platform, mocker):
+        """Test that another process reuses the parsed games."""
+        roms = await GamelistHandler()._get_gamelist_roms(gamelist_path, platform)
+
+        handler = GamelistHandler()
+        parse = mocker.spy(handler, "_parse_gamelist_xml")
+        cached_roms = await handler._get_gamelist_roms(gamelist_path, platform)
+
+        parse.assert_not_called()
+        assert cached_roms == roms
+
+    async def test_changed_file_is_parsed_again(self, gamelist_path, platform):
+        handler = GamelistHandler()
+        await handler._get_gamelist_roms(gamelist_path, platform)
+
+        write_gamelist(gamelist_path, "Super Mario 64 DS", time.time() - 30)
+        roms = await handler._get_gamelist_roms(gamelist_path, platform)
+
+        assert roms["Super Mario 64 (USA).z64"]["name"] == "Super Mario 64 DS"
+
+    async def test_recent_file_is_not_shared(self, gamelist_path, platform):
+        """Test that files that could still change in the same mtime aren't shared."""
+        write_gamelist(gamelist_path, "Super Mario 64", time.time())
+
+        await GamelistHandler()._get_gamelist_roms(gamelist_path, platform)
+
+        assert not await async_cache.exists(
+            f"{GAMELIST_CACHE_KEY_PREFIX}:{platform.id}"
+        )
+
+    async def test_invalid_file_is_not_cached(self, gamelist_path, platform):
+        gamelist_path.write_text("<gameList><game>")
+        os.utime(gamelist_path, (time.time() - 60, time.time() - 60))
+
+        handler = GamelistHandler()
+        roms = await handler._get_gamelist_roms(gamelist_path, platform)
+
+        assert roms == {}
+        assert not handler._gamelist_cache
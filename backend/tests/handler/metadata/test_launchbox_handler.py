@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from handler.metadata.launchbox_handler import (
+    LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+    LAUNCHBOX_METADATA_NAME_KEY,
+    LAUNCHBOX_SEARCH_NAMES_KEY,
+    LAUNCHBOX_SEARCH_TOKENS_KEY,
+    LaunchboxHandler,
+    get_launchbox_search_tokens,
+)
+from handler.redis_handler import async_cache
+
+GAMES = {
+    "1": {"DatabaseID": "1", "Name": "Super Mario 64", "Platform": "Nintendo 64"},
+    "2": {
+        "DatabaseID": "2",
+        "Name": "The Legend of Zelda: Ocarina of Time",
+        "Platform": "Nintendo 64",
+    },
+    "3": {"DatabaseID": "3", "Name": "Mario Kart 64", "Platform": "Nintendo 64"},
+}
+
+
+@pytest.fixture
+async def handler(mocker):
+    mocker.patch.object(LaunchboxHandler, "is_enabled", return_value=True)
+
+    await async_cache.hset(
+        LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+        mapping={database_id: json.dumps(game) for database_id, game in GAMES.items()},
+    )
+    await async_cache.hset(
+        LAUNCHBOX_METADATA_NAME_KEY,
+        mapping={
+            f"{game['Name'].lower()}:{game['Platform']}": json.dumps(game)
+            for game in GAMES.values()
+        },
+    )
+    postings: dict[str, list[str]] = {}
+    for database_id, game in GAMES.items():
+        for token in get_launchbox_search_tokens(game["Name"]):
+            postings.setdefault(f"{game['Platform']}:{token}", []).append(database_id)
+    await async_cache.hset(
+        LAUNCHBOX_SEARCH_TOKENS_KEY,
+        mapping={field: " ".join(ids) for field, ids in postings.items()},
+    )
+    await async_cache.hset(
+        LAUNCHBOX_SEARCH_NAMES_KEY,
+        mapping={
+            database_id: json.dumps([game["Name"]])
+            for database_id, game in GAMES.items()
+        },
+    )
+
+    yield LaunchboxHandler()
+
+    await async_cache.delete(
+        LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+        LAUNCHBOX_METADATA_NAME_KEY,
+        LAUNCHBOX_SEARCH_TOKENS_KEY,
+        LAUNCHBOX_SEARCH_NAMES_KEY,
+    )
+
+
+class TestSearchIndex:
+    """Test matching LaunchBox games with the local search index."""
+
+    def test_search_tokens(self):
+        assert get_launchbox_search_tokens("The Legend of Zelda: Ocarina") == {
+            "legend",
+            "of",
+            "zelda",
+            "ocarina",
+        }
+
+    async def test_exact_name_is_matched(self, handler):
+        rom = await handler.get_rom("Super Mario 64 (USA).z64", "n64")
+
+        assert rom["launchbox_id"] == "1"
+
+    async def test_different_separator_is_matched(self, handler):
+        """Test that names missing the exact lookup are found in the index."""
+        rom = await handler.get_rom(
+            "Legend of Zelda, The - Ocarina of Time (Europe).z64", "n64"
+        )
+
+        assert rom["launchbox_id"] == "2"
+        assert rom["name"] == "The Legend of Zelda: Ocarina of Time"
+
+    async def test_unrelated_name_is_not_matched(self, handler):
+        rom = await handler.get_rom("Banjo-Kazooie (USA).z64", "n64")
+
+        assert rom["launchbox_id"] is None
+
+    async def test_other_platforms_are_not_matched(self, handler):
+        rom = await handler.get_rom("Mario Kart 64 [!].sfc", "snes")
+
+        assert rom["launchbox_id"] is None
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from handler.metadata.ra_handler import (
+    RA_HASHES_INDEX_KEY_PREFIX,
+    RA_HASHES_UPDATED_AT_KEY,
+    RAHandler,
+)
+from handler.redis_handler import async_cache
+
+GAME_LIST = [
+    {"ID": 1, "Title": "Sonic the Hedgehog", "Hashes": ["ABCDEF0123456789"]},
+    {"ID": 2, "Title": "Streets of Rage", "Hashes": ["0011", "2233"]},
+]
+
+
+@pytest.fixture
+async def handler():
+    handler = RAHandler()
+    handler.ra_service = MagicMock()
+    handler.ra_service.get_game_list = AsyncMock(return_value=GAME_LIST)
+    yield handler
+    await async_cache.delete(
+        f"{RA_HASHES_INDEX_KEY_PREFIX}:1", RA_HASHES_UPDATED_AT_KEY
+    )
+
+
+def _rom():
+    rom = MagicMock()
+    rom.platform.ra_id = 1
+    return rom
+
+
+class TestRAHashesIndex:
+    async def test_search_rom_builds_index_once(self, handler):
+        rom = _rom()
+
+        game = await handler._search_rom(rom, "abcdef0123456789")
+        assert game == {"ID": 1, "Title": "Sonic the Hedgehog"}
+        assert (await handler._search_rom(rom, "2233"))["ID"] == 2
+        assert await handler._search_rom(rom, "ffff") is None
+
+        handler.ra_service.get_game_list.assert_awaited_once()
+
+    async def test_outdated_index_is_refreshed_in_background(self, handler):
+        rom = _rom()
+        await handler._search_rom(rom, "0011")
+        await async_cache.hset(
+            RA_HASHES_UPDATED_AT_KEY, "1", time.time() - 365 * 24 * 3600
+        )
+        handler.ra_service.get_game_list.return_value = [
+            {"ID": 3, "Title": "Ecco the Dolphin", "Hashes": ["4455"]}
+        ]
+
+        # The outdated index is still used while the new one is built
+        assert (await handler._search_rom(rom, "0011"))["ID"] == 2
+        await asyncio.gather(*handler._index_tasks.values())
+
+        assert await handler._search_rom(rom, "0011") is None
+        assert (await handler._search_rom(rom, "4455"))["ID"] == 3
+
+    async def test_failed_fetch_keeps_the_current_index(self, handler):
+        rom = _rom()
+        await handler._search_rom(rom, "0011")
+        await async_cache.hset(
+            RA_HASHES_UPDATED_AT_KEY, "1", time.time() - 365 * 24 * 3600
+        )
+        # Failed requests return no games
+        handler.ra_service.get_game_list.return_value = []
+
+        await handler._search_rom(rom, "0011")
+        await asyncio.gather(*handler._index_tasks.values())
+
+        assert (await handler._search_rom(rom, "0011"))["ID"] == 2
+        updated_at = await async_cache.hget(RA_HASHES_UPDATED_AT_KEY, "1")
+        assert time.time() - float(updated_at) > 364 * 24 * 3600
+        # The games aren't fetched again right after the failure
+        assert handler.ra_service.get_game_list.await_count == 2
+
+    async def test_failed_first_fetch_is_not_marked_fresh(self, handler):
+        rom = _rom()
+        handler.ra_service.get_game_list.return_value = []
+
+        assert await handler._search_rom(rom, "0011") is None
+        assert await handler._search_rom(rom, "2233") is None
+
+        assert await async_cache.hget(RA_HASHES_UPDATED_AT_KEY, "1") is None
+        handler.ra_service.get_game_list.assert_awaited_once()
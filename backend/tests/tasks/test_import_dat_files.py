@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from handler.metadata.dat_handler import DATHandler, get_dat_index_key
+from handler.redis_handler import async_cache
+from models.rom import RomFile
+from tasks.manual.import_dat_files import import_dat_files_task
+
+REDUMP_DAT = b"""<?xml version="1.0"?>
+<datafile>
+    <header>
+        <name>Sony - PlayStation</name>
+        <url>http://redump.org/</url>
+    </header>
+    <game name="Crash Bandicoot (USA)">
+        <rom name="Crash Bandicoot (USA).cue" size="95" crc="abcdef01"/>
+        <rom name="Crash Bandicoot (USA).bin" size="500" sha1="da39a3ee5e6b4b0d3255bfef95601890afd80709"/>
+    </game>
+</datafile>
+"""
+
+OTHER_DAT = b"""<?xml version="1.0"?>
+<datafile>
+    <game name="Homebrew Game (Europe)">
+        <rom name="homebrew.gb" size="100" md5="d41d8cd98f00b204e9800998ecf8427e"/>
+    </game>
+</datafile>
+"""
+
+
+async def test_import_dat_files(tmp_path):
+    (tmp_path / "redump").mkdir()
+    (tmp_path / "redump" / "Sony - PlayStation.dat").write_bytes(REDUMP_DAT)
+    (tmp_path / "homebrew.xml").write_bytes(OTHER_DAT)
+    (tmp_path / "readme.txt").write_text("Not a DAT file")
+
+    # Stale entries of the previous import are dropped
+    await async_cache.hset(get_dat_index_key("tosec_match", "crc"), "12345678", "{}")
+
+    with patch("tasks.manual.import_dat_files.DATS_BASE_PATH", str(tmp_path)):
+        stats = await import_dat_files_task.run()
+
+    try:
+        assert stats == {"processed": 2, "total": 2}
+        assert not await async_cache.exists(get_dat_index_key("tosec_match", "crc"))
+
+        handler = DATHandler()
+        redump_match = await handler.lookup_rom(
+            [
+                RomFile(
+                    file_name="crash.bin",
+                    file_size_bytes=500,
+                    sha1_hash="da39a3ee5e6b4b0d3255bfef95601890afd80709",
+                )
+            ]
+        )
+        assert redump_match == {
+            "name": "Crash Bandicoot",
+            "dat": "Sony - PlayStation",
+            "regions": ["USA"],
+            "size": 500,
+            "source": "redump_match",
+        }
+
+        other_match = await handler.lookup_rom(
+            [
+                RomFile(
+                    file_name="homebrew.gb",
+                    file_size_bytes=100,
+                    md5_hash="d41d8cd98f00b204e9800998ecf8427e",
+                )
+            ]
+        )
+        assert other_match is not None
+        assert other_match["dat"] == "homebrew"
+        assert other_match["source"] == "other"
+    finally:
+        for source in ("redump_match", "other"):
+            for hash_type in ("crc", "md5", "sha1"):
+                await async_cache.delete(get_dat_index_key(source, hash_type))
@@ -232,6 +232,11 @@ class TestRemoteFilePullTask:
             url="https://example.com/data.json",
         )
 
+    @pytest.fixture
+    def download_file(self, tmp_path):
+        with open(tmp_path / "data.json", "w+b") as f:
+            yield f
+
     def test_init(self, task):
         """Test RemoteFilePullTask initialization"""
         assert task.func == "test.remote.function"
@@ -322,3 +327,44 @@ class TestRemoteFilePullTask:
         result = await disabled_task.run(force=True)
 
         assert result == b"forced content"
+
+    @patch("tasks.tasks.ctx_httpx_client")
+    async def test_download_success(self, mock_ctx_httpx_client, task, download_file):
+        """Test streaming a remote file to disk"""
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, content=b"streamed content")
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            mock_ctx_httpx_client.get.return_value = client
+
+            result = await task.download(download_file, force=True)
+
+        assert result is True
+        assert download_file.read() == b"streamed content"
+
+    @patch("tasks.tasks.ctx_httpx_client")
+    @patch("tasks.tasks.log")
+    async def test_download_response_error(
+        self, mock_log, mock_ctx_httpx_client, task, download_file
+    ):
+        """Test handling of response status errors while streaming"""
+        transport = httpx.MockTransport(lambda request: httpx.Response(404))
+        async with httpx.AsyncClient(transport=transport) as client:
+            mock_ctx_httpx_client.get.return_value = client
+
+            result = await task.download(download_file, force=True)
+
+        mock_log.error.assert_any_call(
+            "Scheduled remote test task failed", exc_info=True
+        )
+        assert result is False
+
+    @patch.object(RemoteFilePullTask, "unschedule")
+    async def test_download_disabled_not_forced(
+        self, mock_unschedule, disabled_task, download_file
+    ):
+        """Test download when task is disabled and not forced"""
+        result = await disabled_task.download(download_file, force=False)
+
+        mock_unschedule.assert_called_once()
+        assert result is False
@@ -1,3 +1,4 @@
+import json
 import os
 from unittest.mock import AsyncMock, patch
 
@@ -12,9 +13,14 @@ from handler.metadata.launchbox_handler import (
     LAUNCHBOX_METADATA_IMAGE_KEY,
     LAUNCHBOX_METADATA_NAME_KEY,
     LAUNCHBOX_PLATFORMS_KEY,
+    LAUNCHBOX_SEARCH_NAMES_KEY,
+    LAUNCHBOX_SEARCH_TOKENS_KEY,
     LaunchboxHandler,
 )
+from handler.redis_handler import async_cache
 from tasks.scheduled.update_launchbox_metadata import (
+    LAUNCHBOX_IMPORT_SUFFIX,
+    LAUNCHBOX_KEYS,
     UpdateLaunchboxMetadataTask,
     update_launchbox_metadata_task,
 )
@@ -42,6 +48,26 @@ def corrupt_zip_content() -> bytes:
     return b"not a valid zip file"
 
 
+def mock_download(content: bytes | None):
+    """Mock downloading the metadata archive to the given file"""
+
+    async def download(file, force=False):
+        if content is None:
+            return False
+        file.write(content)
+        file.seek(0)
+        return True
+
+    return AsyncMock(side_effect=download)
+
+
+@pytest.fixture(autouse=True)
+async def clear_launchbox_keys():
+    yield
+    for key in LAUNCHBOX_KEYS:
+        await async_cache.delete(key, f"{key}:{LAUNCHBOX_IMPORT_SUFFIX}")
+
+
 class TestUpdateLaunchboxMetadataTask:
     """Test suite for UpdateLaunchboxMetadataTask"""
 
@@ -54,16 +80,15 @@ class TestUpdateLaunchboxMetadataTask:
         assert task.description == "Updates the LaunchBox metadata store"
         assert task.url == "https://gamesdb.launchbox-app.com/Metadata.zip"
 
-    @patch.object(RemoteFilePullTask, "run")
-    async def test_run_when_launchbox_api_enabled(
-        self, mock_super_run, task, sample_zip_content
-    ):
+    async def test_run_when_launchbox_api_enabled(self, task, sample_zip_content):
         """Test run method when Launchbox API is enabled"""
-        mock_super_run.return_value = sample_zip_content
-
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ) as mock_super_download:
+            await task.run(force=True)
 
-        mock_super_run.assert_called_once_with(True)
+        mock_super_download.assert_called_once()
+        assert mock_super_download.call_args.args[1] is True
 
     async def test_run_when_launchbox_api_disabled(self, task, mocker):
         """Test run method when Launchbox API is disabled"""
@@ -76,120 +101,132 @@ class TestUpdateLaunchboxMetadataTask:
             "Launchbox API is not enabled, skipping metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
-    async def test_run_when_content_is_none(self, mock_log, mock_super_run, task):
-        """Test run method when super().run() returns None"""
-        mock_super_run.return_value = None
-
-        await task.run(force=True)
+    async def test_run_when_content_is_none(self, mock_log, task):
+        """Test run method when the download fails"""
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(None)
+        ) as mock_super_download:
+            await task.run(force=True)
 
-        mock_super_run.assert_called_once()
+        mock_super_download.assert_called_once()
 
         mock_log.warning.assert_called_once_with(
             "No content received from launchbox metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
-    async def test_run_with_corrupt_zip_file(
-        self, mock_log, mock_super_run, task, corrupt_zip_content
-    ):
+    async def test_run_with_corrupt_zip_file(self, mock_log, task, corrupt_zip_content):
         """Test run method with corrupt ZIP file"""
-        mock_super_run.return_value = corrupt_zip_content
-
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(corrupt_zip_content)
+        ):
+            await task.run(force=True)
 
         mock_log.error.assert_called_once_with(
             "Bad zip file in launchbox metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
-    async def test_run_successful_completion(
-        self, mock_log, mock_super_run, task, sample_zip_content
-    ):
+    async def test_run_successful_completion(self, mock_log, task, sample_zip_content):
         """Test successful completion of the task"""
-        mock_super_run.return_value = sample_zip_content
-
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ):
+            result = await task.run(force=True)
 
         mock_log.info.assert_called_with(
             "Scheduled launchbox metadata update completed!"
         )
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
-    async def test_xml_parsing(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-        sample_zip_content,
-    ):
-        """Test parsing of Platforms.xml file"""
-        mock_super_run.return_value = sample_zip_content
-
-        # Create a mock pipeline with async context manager support
-        mock_pipe = AsyncMock()
-        mock_async_cache_pipeline.return_value.__aenter__ = AsyncMock(
-            return_value=mock_pipe
+        assert result["processed"] == result["total"] == 4
+        assert result["duration_seconds"] >= 0
+        assert result["peak_memory_mb"] > 0
+
+    async def test_xml_parsing(self, task, sample_zip_content):
+        """Test parsing of the XML files into Redis"""
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ):
+            await task.run(force=True)
+
+        assert await async_cache.hlen(LAUNCHBOX_PLATFORMS_KEY) == 2
+        assert await async_cache.hlen(LAUNCHBOX_METADATA_DATABASE_ID_KEY) == 2
+        assert await async_cache.hlen(LAUNCHBOX_METADATA_NAME_KEY) == 2
+        assert await async_cache.hlen(LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY) == 1
+        assert await async_cache.hlen(LAUNCHBOX_METADATA_IMAGE_KEY) == 1
+        assert await async_cache.hlen(LAUNCHBOX_MAME_KEY) == 2
+        assert await async_cache.hlen(LAUNCHBOX_FILES_KEY) == 2
+
+        game = json.loads(
+            await async_cache.hget(
+                LAUNCHBOX_METADATA_NAME_KEY, "super mario 64:Nintendo 64"
+            )
+        )
+        assert game["DatabaseID"] == "12345"
+        images = json.loads(
+            await async_cache.hget(LAUNCHBOX_METADATA_IMAGE_KEY, "12345")
         )
-        mock_async_cache_pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        assert [image["Type"] for image in images] == ["Cover", "Screenshot"]
 
-        await task.run(force=True)
+    async def test_search_index_is_built(self, task, sample_zip_content):
+        """Test that the game names are indexed by platform and token"""
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ):
+            await task.run(force=True)
 
-        # Verify calls
-        assert mock_async_cache_pipeline.called
-        assert mock_async_cache_pipeline.call_count == 4
-        assert mock_pipe.hset.called
-        assert mock_pipe.execute.called
-
-        # Check hset call details
-        hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 12
-
-        platform_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_PLATFORMS_KEY
-        ]
-        assert len(platform_calls) == 2
-
-        metadata_id_calls = [
-            call
-            for call in hset_calls
-            if call[0][0] == LAUNCHBOX_METADATA_DATABASE_ID_KEY
-        ]
-        metadata_name_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_METADATA_NAME_KEY
-        ]
-        metadata_alt_calls = [
-            call
-            for call in hset_calls
-            if call[0][0] == LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY
-        ]
-        metadata_image_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_METADATA_IMAGE_KEY
-        ]
-
-        assert len(metadata_id_calls) == 2
-        assert len(metadata_name_calls) == 2
-        assert len(metadata_alt_calls) == 1
-        assert len(metadata_image_calls) == 1
-
-        mame_calls = [call for call in hset_calls if call[0][0] == LAUNCHBOX_MAME_KEY]
-        assert len(mame_calls) == 2
-
-        files_calls = [call for call in hset_calls if call[0][0] == LAUNCHBOX_FILES_KEY]
-        assert len(files_calls) == 2
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
-    async def test_empty_xml_elements_handling(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-    ):
+        assert (
+            await async_cache.hget(LAUNCHBOX_SEARCH_TOKENS_KEY, "Nintendo 64:mario")
+            == b"12345"
+        )
+        assert not await async_cache.hexists(
+            LAUNCHBOX_SEARCH_TOKENS_KEY, "PlayStation:mario"
+        )
+        names = json.loads(await async_cache.hget(LAUNCHBOX_SEARCH_NAMES_KEY, "12345"))
+        assert names == ["Super Mario 64", "Super Mario 64 (USA)"]
+
+    async def test_import_is_written_in_batches(self, task, sample_zip_content):
+        """Test that entries are written in bounded batches"""
+        with (
+            patch(
+                "tasks.scheduled.update_launchbox_metadata.LAUNCHBOX_IMPORT_BATCH_SIZE",
+                1,
+            ),
+            patch.object(
+                RemoteFilePullTask, "download", mock_download(sample_zip_content)
+            ),
+        ):
+            await task.run(force=True)
+
+        assert await async_cache.hlen(LAUNCHBOX_METADATA_DATABASE_ID_KEY) == 2
+        assert await async_cache.hlen(LAUNCHBOX_FILES_KEY) == 2
+
+    async def test_previous_metadata_is_replaced(self, task, sample_zip_content):
+        """Test that the new metadata replaces the previous one in one step"""
+        await async_cache.hset(LAUNCHBOX_FILES_KEY, mapping={"old.zip": "{}"})
+        await async_cache.hset(LAUNCHBOX_METADATA_IMAGE_KEY, mapping={"1": "[]"})
+
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ):
+            await task.run(force=True)
+
+        assert not await async_cache.hexists(LAUNCHBOX_FILES_KEY, "old.zip")
+        assert not await async_cache.hexists(LAUNCHBOX_METADATA_IMAGE_KEY, "1")
+        for key in LAUNCHBOX_KEYS:
+            assert not await async_cache.exists(f"{key}:{LAUNCHBOX_IMPORT_SUFFIX}")
+
+    async def test_corrupt_zip_keeps_previous_metadata(self, task, corrupt_zip_content):
+        await async_cache.hset(LAUNCHBOX_FILES_KEY, mapping={"old.zip": "{}"})
+
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(corrupt_zip_content)
+        ):
+            await task.run(force=True)
+
+        assert await async_cache.hexists(LAUNCHBOX_FILES_KEY, "old.zip")
+
+    async def test_empty_xml_elements_handling(self, task):
         """Test handling of XML elements with empty or missing text"""
         test_dir = os.path.dirname(__file__)
         sample_path = os.path.join(
@@ -197,38 +234,15 @@ class TestUpdateLaunchboxMetadataTask:
         )
 
         async with await anyio.open_file(sample_path, "rb") as f:
-            mock_super_run.return_value = await f.read()
+            content = await f.read()
 
-        # Create a mock pipeline with async context manager support
-        mock_pipe = AsyncMock()
-        mock_async_cache_pipeline.return_value.__aenter__ = AsyncMock(
-            return_value=mock_pipe
-        )
-        mock_async_cache_pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
-
-        await task.run(force=True)
+        with patch.object(RemoteFilePullTask, "download", mock_download(content)):
+            await task.run(force=True)
 
-        # Verify calls
-        assert mock_async_cache_pipeline.called
-
-        # Check hset call details
-        hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 1
-
-        platform_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_PLATFORMS_KEY
-        ]
         # Only one valid platform should be processed
-        assert len(platform_calls) == 1
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
-    async def test_missing_xml_files_handling(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-    ):
+        assert await async_cache.hkeys(LAUNCHBOX_PLATFORMS_KEY) == [b"Valid Platform"]
+
+    async def test_missing_xml_files_handling(self, task):
         """Test handling when some XML files are missing from the ZIP"""
         test_dir = os.path.dirname(__file__)
         sample_path = os.path.join(
@@ -236,23 +250,13 @@ class TestUpdateLaunchboxMetadataTask:
         )
 
         async with await anyio.open_file(sample_path, "rb") as f:
-            mock_super_run.return_value = await f.read()
+            content = await f.read()
 
-        # Create a mock pipeline with async context manager support
-        mock_pipe = AsyncMock()
-        mock_async_cache_pipeline.return_value.__aenter__ = AsyncMock(
-            return_value=mock_pipe
-        )
-        mock_async_cache_pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
+        with patch.object(RemoteFilePullTask, "download", mock_download(content)):
+            result = await task.run(force=True)
 
-        await task.run(force=True)
-
-        # Verify calls
-        assert mock_async_cache_pipeline.called
-
-        # Check hset call details
-        hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 1
+        assert result["total"] == 1
+        assert not await async_cache.exists(LAUNCHBOX_FILES_KEY)
 
     def test_redis_keys_are_defined(self):
         """Test that all Redis keys are properly defined"""
@@ -281,41 +285,14 @@ class TestUpdateLaunchboxMetadataTaskIntegration:
     def task(self):
         return UpdateLaunchboxMetadataTask()
 
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
-    async def test_full_workflow_integration(
-        self, mock_async_cache_pipeline, mock_super_run, task, sample_zip_content
-    ):
+    async def test_full_workflow_integration(self, task, sample_zip_content):
         """Test the complete workflow from ZIP download to Redis storage"""
-        mock_super_run.return_value = sample_zip_content
-
-        # Create a mock pipeline with async context manager support
-        mock_pipe = AsyncMock()
-        mock_async_cache_pipeline.return_value.__aenter__ = AsyncMock(
-            return_value=mock_pipe
-        )
-        mock_async_cache_pipeline.return_value.__aexit__ = AsyncMock(return_value=None)
-
-        await task.run(force=True)
-
-        # Check hset call details
-        hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 12
-
-        # Verify that all expected Redis keys were used
-        redis_keys_used = [call[0][0] for call in hset_calls]
-
-        expected_keys = [
-            LAUNCHBOX_PLATFORMS_KEY,
-            LAUNCHBOX_METADATA_DATABASE_ID_KEY,
-            LAUNCHBOX_METADATA_NAME_KEY,
-            LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
-            LAUNCHBOX_METADATA_IMAGE_KEY,
-            LAUNCHBOX_MAME_KEY,
-            LAUNCHBOX_FILES_KEY,
-        ]
-
-        for expected_key in expected_keys:
-            assert (
-                expected_key in redis_keys_used
-            ), f"Expected key {expected_key} not found in Redis operations"
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_zip_content)
+        ):
+            await task.run(force=True)
+
+        for expected_key in LAUNCHBOX_KEYS:
+            assert await async_cache.exists(
+                expected_key
+            ), f"Expected key {expected_key} not found in Redis"
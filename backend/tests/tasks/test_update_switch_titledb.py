@@ -3,8 +3,10 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from handler.redis_handler import async_cache
 from tasks.scheduled.update_switch_titledb import (
     SWITCH_PRODUCT_ID_KEY,
+    SWITCH_TITLEDB_IMPORT_SUFFIX,
     SWITCH_TITLEDB_INDEX_KEY,
     UpdateSwitchTitleDBTask,
     update_switch_titledb_task,
@@ -12,6 +14,26 @@ from tasks.scheduled.update_switch_titledb import (
 from tasks.tasks import RemoteFilePullTask
 
 
+def mock_download(content: bytes | None):
+    """Mock downloading the TitleDB file to the given file"""
+
+    async def download(file, force=False):
+        if content is None:
+            return False
+        file.write(content)
+        file.seek(0)
+        return True
+
+    return AsyncMock(side_effect=download)
+
+
+@pytest.fixture(autouse=True)
+async def clear_titledb_keys():
+    yield
+    for key in (SWITCH_TITLEDB_INDEX_KEY, SWITCH_PRODUCT_ID_KEY):
+        await async_cache.delete(key, f"{key}:{SWITCH_TITLEDB_IMPORT_SUFFIX}")
+
+
 class TestUpdateSwitchTitleDBTask:
     @pytest.fixture
     def task(self):
@@ -64,88 +86,44 @@ class TestUpdateSwitchTitleDBTask:
             == "https://raw.githubusercontent.com/blawar/titledb/master/US.en.json"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_run_success(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-        sample_json_content,
-    ):
+    async def test_run_success(self, task, sample_json_content):
         """Test successful run with valid data"""
-        mock_super_run.return_value = sample_json_content
-
-        # Create mock pipeline with async context manager support
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
-
-        await task.run(force=True)
-
-        # Verify super().run was called
-        mock_super_run.assert_called_once_with(True)
-
-        # Verify pipeline was used
-        assert mock_async_cache_pipeline.called
-        assert mock_pipe.hset.called
-        assert mock_pipe.execute.called
-
-        # Verify hset was called for both keys
-        hset_calls = mock_pipe.hset.call_args_list
-
-        # Should have calls for both SWITCH_TITLEDB_INDEX_KEY and SWITCH_PRODUCT_ID_KEY
-        titledb_calls = [
-            call for call in hset_calls if call[0][0] == SWITCH_TITLEDB_INDEX_KEY
-        ]
-        product_calls = [
-            call for call in hset_calls if call[0][0] == SWITCH_PRODUCT_ID_KEY
-        ]
-
-        assert len(titledb_calls) > 0
-        assert len(product_calls) > 0
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_run_filters_empty_data(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-        sample_json_content,
-    ):
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_json_content)
+        ) as mock_super_download:
+            result = await task.run(force=True)
+
+        # Verify the file was downloaded
+        mock_super_download.assert_called_once()
+        assert mock_super_download.call_args.args[1] is True
+
+        # Verify both keys were written
+        assert await async_cache.hlen(SWITCH_TITLEDB_INDEX_KEY) == 3
+        assert await async_cache.hlen(SWITCH_PRODUCT_ID_KEY) == 3
+        title = json.loads(
+            await async_cache.hget(SWITCH_TITLEDB_INDEX_KEY, "0100000000010000")
+        )
+        assert title["name"] == "Super Mario Odyssey"
+
+        assert result["processed"] == result["total"] == 3
+        assert result["peak_memory_mb"] > 0
+
+    async def test_run_filters_empty_data(self, task, sample_json_content):
         """Test that empty keys and None values are filtered out"""
-        mock_super_run.return_value = sample_json_content
-
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
-
-        await task.run(force=True)
-
-        # Get all the mapping data that was passed to hset
-        hset_calls = mock_pipe.hset.call_args_list
-
-        for call in hset_calls:
-            args, kwargs = call
-            if "mapping" in kwargs:
-                mapping = kwargs["mapping"]
-                # Verify no empty keys
-                assert "" not in mapping
-                # Verify no None values in the original data structure
-                for key in mapping.keys():
-                    assert key is not None and key != ""
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_run_batches_data(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-    ):
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_json_content)
+        ):
+            await task.run(force=True)
+
+        assert not await async_cache.hexists(SWITCH_TITLEDB_INDEX_KEY, "")
+        assert not await async_cache.hexists(
+            SWITCH_TITLEDB_INDEX_KEY, "0100000000040000"
+        )
+        assert not await async_cache.hexists(
+            SWITCH_PRODUCT_ID_KEY, "should_be_filtered"
+        )
+
+    async def test_run_batches_data(self, task):
         """Test that data is properly batched"""
         # Create a large dataset to test batching
         large_dataset = {}
@@ -157,120 +135,117 @@ class TestUpdateSwitchTitleDBTask:
             }
 
         large_json_content = json.dumps(large_dataset).encode("utf-8")
-        mock_super_run.return_value = large_json_content
-
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
 
-        await task.run(force=True)
+        with (
+            patch(
+                "tasks.scheduled.update_switch_titledb.SWITCH_TITLEDB_READ_SIZE", 1000
+            ),
+            patch.object(
+                RemoteFilePullTask, "download", mock_download(large_json_content)
+            ),
+            patch("tasks.scheduled.update_switch_titledb.UpdateStats.update") as update,
+        ):
+            await task.run(force=True)
 
-        # Should have multiple hset calls due to batching
-        hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) > 2  # At least one batch for each key type
+        assert await async_cache.hlen(SWITCH_TITLEDB_INDEX_KEY) == 5000
+        assert await async_cache.hlen(SWITCH_PRODUCT_ID_KEY) == 5000
+        # Progress is reported after each batch
+        processed = [call.kwargs["processed"] for call in update.call_args_list]
+        assert processed == [0, 2000, 4000, 5000, 5000]
 
-    @patch.object(RemoteFilePullTask, "run")
-    async def test_run_no_content(self, mock_super_run, task):
-        """Test run when super().run returns None"""
-        mock_super_run.return_value = None
+    async def test_run_no_content(self, task):
+        """Test run when the download fails"""
+        await async_cache.hset(SWITCH_TITLEDB_INDEX_KEY, mapping={"old": "{}"})
 
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(None)
+        ) as mock_super_download:
+            await task.run(force=True)
 
         # Should return early without doing anything
-        mock_super_run.assert_called_once_with(True)
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_run_invalid_json(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-    ):
+        mock_super_download.assert_called_once()
+        assert await async_cache.hexists(SWITCH_TITLEDB_INDEX_KEY, "old")
+
+    async def test_run_invalid_json(self, task):
         """Test run with invalid JSON content"""
-        mock_super_run.return_value = b"invalid json content"
+        await async_cache.hset(SWITCH_TITLEDB_INDEX_KEY, mapping={"old": "{}"})
+
+        with (
+            patch.object(
+                RemoteFilePullTask, "download", mock_download(b"invalid json content")
+            ),
+            pytest.raises(json.JSONDecodeError),
+        ):
+            await task.run(force=True)
+
+        # The previous TitleDB is kept
+        assert await async_cache.hexists(SWITCH_TITLEDB_INDEX_KEY, "old")
+        assert not await async_cache.exists(
+            f"{SWITCH_TITLEDB_INDEX_KEY}:{SWITCH_TITLEDB_IMPORT_SUFFIX}"
+        )
 
-        with pytest.raises(json.JSONDecodeError):
+    async def test_run_truncated_json(self, task, sample_json_content):
+        """Test run with a file cut short during the download"""
+        with (
+            patch.object(
+                RemoteFilePullTask, "download", mock_download(sample_json_content[:-20])
+            ),
+            pytest.raises(json.JSONDecodeError),
+        ):
             await task.run(force=True)
 
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_run_empty_json(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-    ):
+        assert not await async_cache.exists(SWITCH_TITLEDB_INDEX_KEY)
+
+    async def test_run_empty_json(self, task):
         """Test run with empty JSON object"""
-        mock_super_run.return_value = json.dumps({}).encode("utf-8")
-
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
-
-        await task.run(force=True)
-
-        # Should still call execute even with empty data
-        assert mock_pipe.execute.called
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
-    async def test_product_id_mapping(
-        self,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-        sample_json_content,
-    ):
-        """Test that product ID mapping works correctly"""
-        mock_super_run.return_value = sample_json_content
+        await async_cache.hset(SWITCH_TITLEDB_INDEX_KEY, mapping={"old": "{}"})
+
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(json.dumps({}).encode())
+        ):
+            result = await task.run(force=True)
+
+        # The new, empty, TitleDB replaces the previous one
+        assert not await async_cache.exists(SWITCH_TITLEDB_INDEX_KEY)
+        assert result["total"] == 0
 
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
+    async def test_previous_titledb_is_replaced(self, task, sample_json_content):
+        """Test that the new TitleDB replaces the previous one in one step"""
+        await async_cache.hset(SWITCH_TITLEDB_INDEX_KEY, mapping={"old": "{}"})
+        await async_cache.hset(SWITCH_PRODUCT_ID_KEY, mapping={"old": "{}"})
 
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_json_content)
+        ):
+            await task.run(force=True)
 
-        # Find product ID calls
-        hset_calls = mock_pipe.hset.call_args_list
-        product_calls = [
-            call for call in hset_calls if call[0][0] == SWITCH_PRODUCT_ID_KEY
-        ]
+        assert not await async_cache.hexists(SWITCH_TITLEDB_INDEX_KEY, "old")
+        assert not await async_cache.hexists(SWITCH_PRODUCT_ID_KEY, "old")
+        assert not await async_cache.exists(
+            f"{SWITCH_TITLEDB_INDEX_KEY}:{SWITCH_TITLEDB_IMPORT_SUFFIX}"
+        )
 
-        assert len(product_calls) > 0
+    async def test_product_id_mapping(self, task, sample_json_content):
+        """Test that product ID mapping works correctly"""
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_json_content)
+        ):
+            await task.run(force=True)
 
         # Verify product mapping structure
-        for call in product_calls:
-            args, kwargs = call
-            if "mapping" in kwargs:
-                mapping = kwargs["mapping"]
-                for product_id, data_json in mapping.items():
-                    data = json.loads(data_json)
-                    assert data.get("id") == product_id
-
-    @patch.object(RemoteFilePullTask, "run")
-    @patch("tasks.scheduled.update_switch_titledb.async_cache.pipeline")
+        mapping = await async_cache.hgetall(SWITCH_PRODUCT_ID_KEY)
+        assert len(mapping) > 0
+        for product_id, data_json in mapping.items():
+            data = json.loads(data_json)
+            assert data.get("id") == product_id.decode()
+
     @patch("tasks.scheduled.update_switch_titledb.log")
-    async def test_completion_log(
-        self,
-        mock_log,
-        mock_async_cache_pipeline,
-        mock_super_run,
-        task,
-        sample_json_content,
-    ):
+    async def test_completion_log(self, mock_log, task, sample_json_content):
         """Test that completion is logged"""
-        mock_super_run.return_value = sample_json_content
-
-        mock_pipe = AsyncMock()
-        mock_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
-        mock_pipe.__aexit__ = AsyncMock(return_value=None)
-        mock_async_cache_pipeline.return_value = mock_pipe
-
-        await task.run(force=True)
+        with patch.object(
+            RemoteFilePullTask, "download", mock_download(sample_json_content)
+        ):
+            await task.run(force=True)
 
         mock_log.info.assert_called_with("Scheduled switch titledb update completed!")
 
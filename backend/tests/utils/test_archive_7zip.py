@@ -0,0 +1,103 @@
+"""Tests for 7zip archive processing."""
+
+import hashlib
+import subprocess
+
+import pytest
+
+from utils import archive_7zip
+from utils.archive_7zip import SevenZipStreamError, process_file_7z, stream_file_7z
+
+MEMBER_CONTENT = b"largest member of the archive" * 1000
+
+# Stand-in for the 7zip binary, listing a single member and streaming its content
+FAKE_7ZIP_SCRIPT = """#!/bin/sh
+if [ "$1" = "l" ]; then
+    printf 'Path = game.iso\\nSize = {size}\\nAttributes = A\\n'
+else
+    {stall}cat "{member_path}"
+    exit {exit_code}
+fi
+"""
+
+
+@pytest.fixture
+def fake_7zip(tmp_path, monkeypatch):
+    def install(exit_code: int = 0, stall: bool = False, content=MEMBER_CONTENT):
+        member_path = tmp_path / "member.bin"
+        member_path.write_bytes(content)
+        script = tmp_path / "7zz"
+        script.write_text(
+            FAKE_7ZIP_SCRIPT.format(
+                size=len(MEMBER_CONTENT),
+                member_path=member_path,
+                exit_code=exit_code,
+                stall="exec sleep 30\n    " if stall else "",
+            )
+        )
+        script.chmod(0o755)
+        monkeypatch.setattr(archive_7zip, "SEVEN_ZIP_PATH", str(script))
+        monkeypatch.setattr(archive_7zip, "FILE_READ_CHUNK_SIZE", 1024)
+
+    return install
+
+
+class TestProcessFile7z:
+    """Test streaming of the largest 7zip member into the hashes."""
+
+    def test_streams_largest_member(self, fake_7zip, tmp_path):
+        """Test that the member is hashed from stdout, in bounded chunks."""
+        fake_7zip()
+        md5_h = hashlib.md5(usedforsecurity=False)
+        chunk_sizes = []
+
+        def update(chunk):
+            chunk_sizes.append(len(chunk))
+            md5_h.update(chunk)
+
+        assert process_file_7z(tmp_path / "game.7z", update)
+        assert md5_h.hexdigest() == hashlib.md5(MEMBER_CONTENT).hexdigest()
+        assert max(chunk_sizes) <= 1024
+
+    def test_failure_after_streaming_raises(self, fake_7zip, tmp_path):
+        """Test that partially streamed data is never reported as a success."""
+        fake_7zip(exit_code=2)
+
+        with pytest.raises(SevenZipStreamError):
+            process_file_7z(tmp_path / "game.7z", lambda chunk: None)
+
+    def test_failure_before_streaming(self, fake_7zip, tmp_path):
+        """Test that the caller falls back to the raw file if nothing was read."""
+        fake_7zip(exit_code=2, content=b"")
+
+        assert not process_file_7z(tmp_path / "game.7z", lambda chunk: None)
+
+    def test_empty_member(self, fake_7zip, tmp_path):
+        """Test that an empty member is hashed, instead of the raw archive."""
+        fake_7zip(content=b"")
+
+        assert process_file_7z(tmp_path / "game.7z", lambda chunk: None)
+
+    def test_missing_binary(self, tmp_path, monkeypatch):
+        """Test that the caller falls back to the raw file without the binary."""
+        monkeypatch.setattr(archive_7zip, "SEVEN_ZIP_PATH", str(tmp_path / "7zz"))
+
+        assert not process_file_7z(tmp_path / "game.7z", lambda chunk: None)
+
+    def test_callback_error_stops_process(self, fake_7zip, tmp_path):
+        """Test that stopping the hashing kills the 7zip process."""
+        fake_7zip()
+
+        def update(chunk):
+            raise InterruptedError()
+
+        with pytest.raises(InterruptedError):
+            stream_file_7z(tmp_path / "game.7z", "game.iso", update)
+
+    def test_timeout(self, fake_7zip, tmp_path, monkeypatch):
+        """Test that a stalled 7zip process is killed once the timeout expires."""
+        fake_7zip(stall=True)
+        monkeypatch.setattr(archive_7zip, "SEVEN_ZIP_TIMEOUT", 0.1)
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            stream_file_7z(tmp_path / "game.7z", "game.iso", lambda chunk: None)
@@ -0,0 +1,88 @@
+import os
+import random
+
+from strsimpy.jaro_winkler import JaroWinkler
+
+from utils.fuzzy_match import (
+    SCORE_BOUND_TOLERANCE,
+    extract_best_match,
+    jaro_winkler_similarity,
+    max_jaro_winkler_similarity,
+)
+
+jarowinkler = JaroWinkler()
+
+
+def random_name(rng: random.Random, max_length: int = 12) -> str:
+    return "".join(rng.choice("abcde fg") for _ in range(rng.randint(0, max_length)))
+
+
+def legacy_best_match(
+    query: str, choices: list[str], score_cutoff: float
+) -> tuple[int | None, float]:
+    best_index, best_score = None, 0.0
+    for index, choice in enumerate(choices):
+        score = jarowinkler.similarity(query, choice)
+        if score > best_score:
+            best_index, best_score = index, score
+    if best_score >= score_cutoff:
+        return best_index, best_score
+    return None, 0.0
+
+
+class TestJaroWinklerSimilarity:
+    def test_identical(self):
+        assert jaro_winkler_similarity("super mario", "super mario") == 1.0
+
+    def test_nothing_in_common(self):
+        assert jaro_winkler_similarity("abc", "xyz") == 0.0
+        assert jaro_winkler_similarity("", "xyz") == 0.0
+
+    def test_same_scores_as_strsimpy(self):
+        """Test that scores match the ones the thresholds were tuned with."""
+        rng = random.Random(0)
+        for _ in range(5000):
+            s0, s1 = random_name(rng), random_name(rng)
+            assert jaro_winkler_similarity(s0, s1) == jarowinkler.similarity(s0, s1)
+
+    def test_max_similarity_is_an_upper_bound(self):
+        rng = random.Random(1)
+        for _ in range(5000):
+            s0, s1 = random_name(rng), random_name(rng)
+            common = sum(min(s0.count(c), s1.count(c)) for c in set(s0))
+            prefix = len(os.path.commonprefix((s0, s1)))
+            score = jaro_winkler_similarity(s0, s1) - SCORE_BOUND_TOLERANCE
+            assert score <= max_jaro_winkler_similarity(len(s0), len(s1))
+            assert score <= max_jaro_winkler_similarity(
+                len(s0), len(s1), common, prefix
+            )
+
+
+class TestExtractBestMatch:
+    def test_no_choices(self):
+        assert extract_best_match("mario", []) == (None, 0.0)
+
+    def test_exact_match(self):
+        assert extract_best_match("mario", ["marios", "mario", "mario"]) == (1, 1.0)
+
+    def test_below_score_cutoff(self):
+        assert extract_best_match("mario", ["zelda"], score_cutoff=0.75) == (
+            None,
+            0.0,
+        )
+
+    def test_first_of_equal_scores(self):
+        index, _ = extract_best_match("mario kart", ["mario karts", "mario karty"])
+
+        assert index == 0
+
+    def test_same_results_as_scoring_every_choice(self):
+        """Test that pruning choices never changes the best match."""
+        rng = random.Random(2)
+        for _ in range(2000):
+            query = random_name(rng, max_length=8)
+            choices = [random_name(rng) for _ in range(rng.randint(1, 15))]
+            score_cutoff = rng.choice([0.0, 0.5, 0.75, 0.9])
+            assert extract_best_match(
+                query, choices, score_cutoff
+            ) == legacy_best_match(query, choices, score_cutoff)
@@ -0,0 +1,195 @@
+"""Tests for hashing utilities."""
+
+import asyncio
+import binascii
+import hashlib
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from utils import hashing
+from utils.archive_7zip import SevenZipStreamError
+from utils.hashing import (
+    HashingCancelledError,
+    HashingEngine,
+    crc32_combine,
+    crc32_to_hex,
+    hash_files,
+)
+
+ZIP_FIXTURE_PATH = (
+    Path(__file__).parent.parent / "tasks" / "fixtures" / "sample_metadata.zip"
+)
+
+
+@pytest.fixture
+def rom_parts(tmp_path):
+    part_1 = tmp_path / "part1.bin"
+    part_1.write_bytes(b"first part of the rom")
+    part_2 = tmp_path / "part2.bin"
+    part_2.write_bytes(b"second part of the rom")
+    return [part_1, part_2]
+
+
+class TestHashFiles:
+    """Test hashing of files in the current process."""
+
+    def test_hashes_each_file_and_combined(self, rom_parts):
+        """Test that each file is hashed on its own, and all of them combined."""
+        result = hash_files(rom_parts)
+
+        contents = [path.read_bytes() for path in rom_parts]
+        for file_hash, content in zip(result.file_hashes, contents, strict=True):
+            assert file_hash["crc_hash"] == crc32_to_hex(binascii.crc32(content))
+            assert file_hash["md5_hash"] == hashlib.md5(content).hexdigest()
+            assert file_hash["sha1_hash"] == hashlib.sha1(content).hexdigest()
+
+        combined = b"".join(contents)
+        assert result.combined_hash["crc_hash"] == crc32_to_hex(
+            binascii.crc32(combined)
+        )
+        assert result.combined_hash["md5_hash"] == hashlib.md5(combined).hexdigest()
+        assert result.combined_hash["sha1_hash"] == hashlib.sha1(combined).hexdigest()
+
+    def test_missing_file_has_empty_hashes(self, tmp_path):
+        """Test that missing files don't break hashing."""
+        result = hash_files([tmp_path / "missing.bin"])
+
+        assert result.file_hashes == [{"crc_hash": "", "md5_hash": "", "sha1_hash": ""}]
+        assert result.combined_hash == {"crc_hash": "", "md5_hash": "", "sha1_hash": ""}
+
+    def test_failed_7z_stream_hashes_raw_file(self, rom_parts, monkeypatch):
+        """Test that a partially streamed 7z member is dropped from the hashes."""
+        archive = rom_parts[1].with_suffix(".7z")
+        rom_parts[1].rename(archive)
+
+        def process_file_7z(file_path, fn_hash_update):
+            fn_hash_update(b"partial member")
+            raise SevenZipStreamError()
+
+        monkeypatch.setattr(hashing, "process_file_7z", process_file_7z)
+
+        result = hash_files([rom_parts[0], archive])
+
+        content = archive.read_bytes()
+        assert result.file_hashes[1]["md5_hash"] == hashlib.md5(content).hexdigest()
+        combined = rom_parts[0].read_bytes() + content
+        assert result.combined_hash["md5_hash"] == hashlib.md5(combined).hexdigest()
+
+    def test_cancelled_worker_stops_hashing(self, rom_parts, monkeypatch):
+        """Test that hashing stops once its job is cancelled."""
+        cancelled_jobs = [0] * hashing.CANCELLED_JOBS_SLOTS
+        cancelled_jobs[5] = 5
+        monkeypatch.setattr(hashing, "_cancelled_jobs", cancelled_jobs)
+
+        with pytest.raises(HashingCancelledError):
+            hashing._hash_files_job(5, rom_parts, crc_only=False)
+
+    def test_other_jobs_keep_hashing(self, rom_parts, monkeypatch):
+        """Test that cancelling a job doesn't affect the others."""
+        cancelled_jobs = [0] * hashing.CANCELLED_JOBS_SLOTS
+        cancelled_jobs[5] = 5
+        monkeypatch.setattr(hashing, "_cancelled_jobs", cancelled_jobs)
+
+        assert hashing._hash_files_job(6, rom_parts, crc_only=False) == hash_files(
+            rom_parts
+        )
+        assert hashing._hash_files_job(
+            5 + hashing.CANCELLED_JOBS_SLOTS, rom_parts, crc_only=False
+        ) == hash_files(rom_parts)
+
+
+class TestCrcOnly:
+    """Test reading the CRC of ZIP files from their central directory."""
+
+    def test_crc32_combine(self):
+        """Test that combined CRCs match the CRC of the concatenated data."""
+        first, second = b"first block" * 100, b"second block" * 333
+
+        assert crc32_combine(
+            binascii.crc32(first), binascii.crc32(second), len(second)
+        ) == binascii.crc32(first + second)
+        assert crc32_combine(binascii.crc32(first), 0, 0) == binascii.crc32(first)
+
+    def test_zip_crc_read_from_header(self, rom_parts):
+        """Test that ZIP files only get a CRC, without being decompressed."""
+        archive = ZIP_FIXTURE_PATH
+        with zipfile.ZipFile(archive) as z:
+            largest_file = max(z.infolist(), key=lambda x: x.file_size)
+            content = z.read(largest_file)
+
+        result = hash_files([archive, rom_parts[0]], crc_only=True)
+
+        assert result.crc_only
+        assert result.file_hashes[0] == {
+            "crc_hash": crc32_to_hex(binascii.crc32(content)),
+            "md5_hash": "",
+            "sha1_hash": "",
+        }
+        assert result.file_hashes[1] == hash_files([rom_parts[0]]).file_hashes[0]
+        assert result.combined_hash == {
+            "crc_hash": crc32_to_hex(
+                binascii.crc32(content + rom_parts[0].read_bytes())
+            ),
+            "md5_hash": "",
+            "sha1_hash": "",
+        }
+
+    def test_other_files_fully_hashed(self, rom_parts):
+        """Test that files other than ZIP archives are hashed as usual."""
+        result = hash_files(rom_parts, crc_only=True)
+
+        assert not result.crc_only
+        assert result == hash_files(rom_parts)
+
+
+class TestHashingEngine:
+    """Test hashing of files in the worker processes."""
+
+    async def test_hash_files_in_worker_process(self, rom_parts):
+        """Test that the worker processes return the same hashes."""
+        engine = HashingEngine(max_workers=1)
+        try:
+            result = await engine.hash_files(rom_parts)
+        finally:
+            engine.shutdown()
+
+        assert result == hash_files(rom_parts)
+
+    async def test_cancelled_caller_leaves_other_jobs(self, rom_parts):
+        """Test that a cancelled caller only cancels its own job."""
+        engine = HashingEngine(max_workers=1)
+        try:
+            cancelled = asyncio.create_task(engine.hash_files(rom_parts))
+            other = asyncio.create_task(engine.hash_files(rom_parts))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+
+            result = await other
+        finally:
+            engine.shutdown()
+
+        assert cancelled.cancelled()
+        assert result == hash_files(rom_parts)
+
+    async def test_shutdown_without_pool(self):
+        """Test that shutting down an unused engine is a no-op."""
+        engine = HashingEngine(max_workers=1)
+        engine.shutdown()
+
+
+class TestReadBasicFile:
+    """Test chunked reading of uncompressed files."""
+
+    def test_reads_whole_file(self, tmp_path, monkeypatch):
+        """Test that chunked reads return every byte."""
+        monkeypatch.setattr(hashing, "FILE_READ_CHUNK_SIZE", 1000)
+        content = bytes(range(256)) * 20
+        rom = tmp_path / "rom.bin"
+        rom.write_bytes(content)
+
+        chunks = [bytes(chunk) for chunk in hashing.read_basic_file(rom)]
+
+        assert [len(chunk) for chunk in chunks] == [1000] * 5 + [120]
+        assert b"".join(chunks) == content
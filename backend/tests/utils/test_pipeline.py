@@ -0,0 +1,124 @@
+"""Tests for the staged pipeline utility."""
+
+import asyncio
+
+import pytest
+
+from utils.pipeline import PipelineStage, run_pipeline
+
+
+async def _items(count: int):
+    for item in range(count):
+        yield item
+
+
+class TestRunPipeline:
+    """Test running items through pipeline stages."""
+
+    async def test_items_go_through_all_stages(self):
+        """Test that every item goes through each stage in order, unless dropped."""
+        results = []
+
+        async def double(item: int) -> int:
+            return item * 2
+
+        async def drop_multiples_of_four(item: int) -> int | None:
+            return None if item % 4 == 0 else item
+
+        async def collect(item: int) -> None:
+            results.append(item)
+
+        stages = [
+            PipelineStage(name="double", fn=double, workers=3),
+            PipelineStage(name="drop", fn=drop_multiples_of_four, workers=2),
+            PipelineStage(name="collect", fn=collect),
+        ]
+        await run_pipeline(_items(10), stages, on_error=lambda item, e: None)
+
+        assert sorted(results) == [2, 6, 10, 14, 18]
+        assert [stage.stats.processed for stage in stages] == [10, 10, 5]
+
+    async def test_stages_overlap(self):
+        """Test that an item can enter a stage while the next one is still busy."""
+        first_stage_done = asyncio.Event()
+        events = []
+
+        async def first(item: int) -> int:
+            events.append(f"first {item}")
+            if item == 1:
+                first_stage_done.set()
+            return item
+
+        async def second(item: int) -> None:
+            # Blocks until the first stage picked up the next item
+            await asyncio.wait_for(first_stage_done.wait(), timeout=1)
+            events.append(f"second {item}")
+
+        await run_pipeline(
+            _items(2),
+            [PipelineStage(name="first", fn=first), PipelineStage("second", second)],
+            on_error=lambda item, e: None,
+        )
+
+        assert events.index("first 1") < events.index("second 0")
+
+    async def test_failed_items_are_reported(self):
+        """Test that an item failing a stage is reported and dropped."""
+        errors = []
+        results = []
+
+        async def fail_on_odd(item: int) -> int:
+            if item % 2:
+                raise ValueError(item)
+            return item
+
+        async def collect(item: int) -> None:
+            results.append(item)
+
+        await run_pipeline(
+            _items(4),
+            [PipelineStage("fail", fail_on_odd), PipelineStage("collect", collect)],
+            on_error=lambda item, e: errors.append((item, type(e))),
+        )
+
+        assert sorted(results) == [0, 2]
+        assert errors == [(1, ValueError), (3, ValueError)]
+
+    async def test_done_items_are_reported(self):
+        """Test that every item is reported once it leaves the pipeline."""
+        done = []
+
+        async def drop_even(item: int) -> int | None:
+            return None if item % 2 == 0 else item
+
+        async def fail_on_three(item: int) -> None:
+            if item == 3:
+                raise ValueError(item)
+
+        await run_pipeline(
+            _items(6),
+            [PipelineStage("drop", drop_even), PipelineStage("fail", fail_on_three)],
+            on_error=lambda item, e: None,
+            on_done=done.append,
+        )
+
+        assert sorted(done) == [0, 1, 2, 3, 4, 5]
+
+    async def test_fatal_exception_stops_pipeline(self):
+        """Test that fatal exceptions stop the pipeline and are re-raised."""
+        processed = []
+
+        async def stop_on_second(item: int) -> None:
+            if item == 1:
+                raise InterruptedError()
+            processed.append(item)
+
+        with pytest.raises(InterruptedError):
+            await run_pipeline(
+                _items(100),
+                [PipelineStage("stop", stop_on_second)],
+                on_error=lambda item, e: None,
+                fatal_exceptions=(InterruptedError,),
+            )
+
+        assert processed == [0]
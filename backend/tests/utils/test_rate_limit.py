@@ -0,0 +1,90 @@
+import pytest
+
+from handler.redis_handler import async_cache
+from utils import rate_limit
+from utils.rate_limit import RateLimiter, get_retry_after
+
+
+async def clear_rate_limits():
+    async for key in async_cache.scan_iter(f"{rate_limit.RATE_LIMIT_KEY_PREFIX}:*"):
+        await async_cache.delete(key)
+
+
+@pytest.fixture(autouse=True)
+async def enable_rate_limit(mocker):
+    mocker.patch.object(rate_limit, "METADATA_RATE_LIMIT_ENABLED", True)
+    mocker.patch("utils.rate_limit.asyncio.sleep")
+    await clear_rate_limits()
+    yield
+    await clear_rate_limits()
+
+
+class TestGetRetryAfter:
+    def test_seconds(self):
+        assert get_retry_after({"Retry-After": "5"}) == 5.0
+
+    def test_missing_or_invalid(self):
+        assert get_retry_after(None) == rate_limit.DEFAULT_RETRY_AFTER
+        assert get_retry_after({"Retry-After": "soon"}, default=3) == 3
+
+    def test_past_http_date(self):
+        assert get_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+
+
+class TestRateLimiter:
+    """Test limiting the requests sent to a metadata provider."""
+
+    async def test_first_request_does_not_wait(self):
+        limiter = RateLimiter("test", requests_per_second=4)
+
+        assert await limiter.acquire() == 0
+
+    async def test_requests_are_spaced_by_the_rate(self):
+        """Test that back to back requests wait for their slot."""
+        limiter = RateLimiter("test", requests_per_second=4)
+
+        await limiter.acquire()
+        wait = await limiter.acquire()
+
+        assert 0 < wait <= 0.25
+
+    async def test_burst_is_allowed(self):
+        limiter = RateLimiter("test", requests_per_second=4, burst=2)
+
+        assert await limiter.acquire() == 0
+        assert await limiter.acquire() == 0
+        assert await limiter.acquire() > 0
+
+    async def test_penalize_holds_back_requests(self):
+        """Test that a rate limit response delays the next requests."""
+        limiter = RateLimiter("test", requests_per_second=4)
+
+        await limiter.penalize(10)
+
+        assert await limiter.acquire() > 9
+
+    async def test_disabled_limiter_does_not_wait(self, mocker):
+        mocker.patch.object(rate_limit, "METADATA_RATE_LIMIT_ENABLED", False)
+        limiter = RateLimiter("test", requests_per_second=4)
+
+        assert await limiter.acquire() == 0
+        assert await limiter.acquire() == 0
+
+    async def test_no_limit(self):
+        limiter = RateLimiter("test", requests_per_second=0)
+
+        assert await limiter.acquire() == 0
+        assert await limiter.acquire() == 0
+
+    async def test_stats(self):
+        limiter = RateLimiter("test", requests_per_second=4)
+
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.penalize(1)
+
+        stats = await limiter.get_stats()
+        assert stats["requests"] == 2
+        assert stats["throttled_requests"] == 1
+        assert stats["rate_limited_responses"] == 1
+        assert stats["wait_seconds"] > 0
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from config.config_manager import config_manager as cm
+from handler.redis_handler import async_cache
+from utils import cache
+from utils.cache import (
+    METADATA_CACHE_TTLS,
+    cached_response,
+    get_response_cache_key,
+    purge_response_cache,
+    skip_response_cache,
+)
+from utils.context import ctx_aiohttp_session
+
+
+class FakeProvider:
+    def __init__(self, responses: list):
+        self.responses = responses
+        self.calls = 0
+        self.sessions: list = []
+
+    @cached_response("igdb")
+    async def _request(self, url: str, request_timeout: int = 120) -> dict:
+        self.sessions.append(ctx_aiohttp_session.get(None))
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return response
+
+
+@pytest.fixture(autouse=True)
+async def enable_response_cache(mocker):
+    mocker.patch.object(cache, "METADATA_CACHE_ENABLED", True)
+    await purge_response_cache()
+    yield
+    await purge_response_cache()
+
+
+class TestCachedResponse:
+    """Test caching the responses of metadata providers."""
+
+    async def test_same_request_is_sent_once(self):
+        """Test that a cached response is returned for the same request."""
+        provider = FakeProvider([{"id": 1}, {"id": 2}])
+
+        assert await provider._request("games") == {"id": 1}
+        assert await provider._request("games", request_timeout=5) == {"id": 1}
+        assert provider.calls == 1
+
+        assert await provider._request("platforms") == {"id": 2}
+        assert provider.calls == 2
+
+    async def test_empty_responses_are_not_cached(self):
+        """Test that failed requests, which return empty responses, are retried."""
+        provider = FakeProvider([{}, {"id": 1}])
+
+        assert await provider._request("games") == {}
+        assert await provider._request("games") == {"id": 1}
+        assert provider.calls == 2
+
+    async def test_stale_response_is_refreshed(self):
+        """Test that an outdated response is returned while being refreshed."""
+        provider = FakeProvider([{"id": 2}])
+        config = cm.get_config()
+        key = get_response_cache_key(
+            "igdb",
+            [
+                FakeProvider._request.__qualname__,
+                ["games"],
+                {},
+                config.SCAN_REGION_PRIORITY,
+                config.SCAN_LANGUAGE_PRIORITY,
+            ],
+        )
+        await async_cache.set(
+            key,
+            json.dumps(
+                {
+                    "fetched_at": time.time() - METADATA_CACHE_TTLS["igdb"] - 1,
+                    "response": {"id": 1},
+                }
+            ),
+        )
+
+        assert await provider._request("games") == {"id": 1}
+        await asyncio.gather(*cache._refresh_tasks)
+
+        assert provider.calls == 1
+        assert await provider._request("games") == {"id": 2}
+        assert provider.calls == 1
+
+        # The refresh doesn't use the sessions of the caller, which could be closed
+        refresh_session = provider.sessions[0]
+        assert refresh_session is not None
+        assert refresh_session.closed
+
+    async def test_responses_are_cached_per_locale(self, mocker):
+        """Test that changing the region or language priorities skips the cache."""
+        provider = FakeProvider([{"id": 1}, {"id": 2}])
+        config = cm.get_config()
+        await provider._request("games")
+
+        mocker.patch.object(
+            config, "SCAN_LANGUAGE_PRIORITY", ["ja", *config.SCAN_LANGUAGE_PRIORITY]
+        )
+        mocker.patch.object(cm, "get_config", return_value=config)
+        assert await provider._request("games") == {"id": 2}
+        assert provider.calls == 2
+
+    async def test_skip_response_cache(self):
+        """Test that requests are always sent when skipping the cache."""
+        provider = FakeProvider([{"id": 1}, {"id": 2}])
+        await provider._request("games")
+
+        with skip_response_cache():
+            assert await provider._request("games") == {"id": 2}
+        assert provider.calls == 2
+
+
+class TestPurgeResponseCache:
+    """Test purging the cached responses of metadata providers."""
+
+    async def test_purge_provider(self):
+        """Test that only the responses of the given provider are purged."""
+        await async_cache.set(get_response_cache_key("igdb", ["a"]), "{}")
+        await async_cache.set(get_response_cache_key("igdb", ["b"]), "{}")
+        await async_cache.set(get_response_cache_key("moby", ["a"]), "{}")
+
+        assert await purge_response_cache("igdb") == 2
+        assert await async_cache.exists(get_response_cache_key("moby", ["a"]))
+        assert await purge_response_cache() == 1
@@ -0,0 +1,83 @@
+"""Measure the throughput of fuzzy game name matching.
+
+Compares the previous matcher (scoring every candidate with strsimpy's
+JaroWinkler) with the current one (deduplicated candidates, skipping those
+whose length rules them out), matching random queries against a synthetic
+list of normalized game names. Both must pick the same matches.
+
+Usage: python -m tools.fuzzy_match_benchmark [--candidates N] [--queries N]
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from strsimpy.jaro_winkler import JaroWinkler
+
+from utils.fuzzy_match import extract_best_match
+
+WORDS = (
+    "adventure advance alpha battle blade castle chronicles dark dragon dream "
+    "fantasy fighter final force galaxy hero island kart king knight legend "
+    "mario master mega metal mystery night ninja of quest racing saga shadow "
+    "sonic soul space star street super tales the time tower war world zelda"
+).split()
+MIN_SIMILARITY_SCORE = 0.75
+
+Matcher = Callable[[str, list[str], float], tuple[int | None, float]]
+
+
+def legacy_best_match(
+    query: str, choices: list[str], score_cutoff: float
+) -> tuple[int | None, float]:
+    jarowinkler = JaroWinkler()
+    best_index, best_score = None, 0.0
+    for index, choice in enumerate(choices):
+        score = jarowinkler.similarity(query, choice)
+        if score > best_score:
+            best_index, best_score = index, score
+            if score == 1.0:
+                break
+    if best_score >= score_cutoff:
+        return best_index, best_score
+    return None, 0.0
+
+
+def random_game_name(rng: random.Random) -> str:
+    name = " ".join(rng.choices(WORDS, k=rng.randint(1, 5)))
+    return f"{name} {rng.randint(2, 9)}" if rng.random() < 0.2 else name
+
+
+def benchmark(
+    name: str, matcher: Matcher, queries: list[str], candidates: list[str]
+) -> list[tuple[int | None, float]]:
+    start = time.perf_counter()
+    results = [matcher(query, candidates, MIN_SIMILARITY_SCORE) for query in queries]
+    elapsed = time.perf_counter() - start
+
+    per_query = elapsed / len(queries) * 1000
+    print(f"{name:<10} {elapsed:8.3f}s {per_query:10.2f} ms/query")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    candidates = [random_game_name(rng) for _ in range(args.candidates)]
+    queries = [random_game_name(rng) for _ in range(args.queries)]
+    print(f"Matching {len(queries)} queries against {len(candidates)} candidates")
+
+    before = benchmark("before", legacy_best_match, queries, candidates)
+    after = benchmark("after", extract_best_match, queries, candidates)
+    if before != after:
+        print("Results differ between matchers!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure the throughput of ROM file hashing.
+
+Compares the previous reader (fresh 8 KiB chunks from `read()`) with the
+current one (reused `readinto()` buffers), hashing every file under the
+given directory with CRC32, MD5 and SHA1.
+
+Usage: python -m tools.hashing_benchmark [library_path] [--rounds N]
+"""
+
+import argparse
+import binascii
+import hashlib
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from utils.hashing import read_basic_file
+
+LEGACY_CHUNK_SIZE = 1024 * 8
+DEFAULT_LIBRARY_PATH = Path(__file__).parent.parent / "romm_test" / "library"
+
+
+def read_legacy_file(file_path: os.PathLike[str]) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        while chunk := f.read(LEGACY_CHUNK_SIZE):
+            yield chunk
+
+
+def hash_chunks(chunks: Iterable[bytes | memoryview]) -> None:
+    crc_c = 0
+    md5_h = hashlib.md5(usedforsecurity=False)
+    sha1_h = hashlib.sha1(usedforsecurity=False)
+    for chunk in chunks:
+        md5_h.update(chunk)
+        sha1_h.update(chunk)
+        crc_c = binascii.crc32(chunk, crc_c)
+
+
+def benchmark(
+    name: str,
+    reader: Callable[[Path], Iterable[bytes | memoryview]],
+    files: list[Path],
+    rounds: int,
+) -> None:
+    total_bytes = sum(path.stat().st_size for path in files) * rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for path in files:
+            hash_chunks(reader(path))
+    elapsed = time.perf_counter() - start
+
+    throughput = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    print(f"{name:<10} {elapsed:8.3f}s {throughput:10.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("library_path", nargs="?", default=DEFAULT_LIBRARY_PATH)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    files = sorted(
+        path for path in Path(args.library_path).rglob("*") if path.is_file()
+    )
+    if not files:
+        print(f"No files found in {args.library_path}")
+        return
+
+    total_size = sum(path.stat().st_size for path in files)
+    print(f"Hashing {len(files)} files ({total_size / (1024 * 1024):.1f} MB)")
+
+    benchmark("before", read_legacy_file, files, args.rounds)
+    benchmark("after", read_basic_file, files, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,74 @@
 # trunk-ignore-all(bandit/B404)
 
 import subprocess
-import tempfile
+import threading
 from collections.abc import Callable
 from pathlib import Path
 
-from config import ROMM_TMP_PATH, SEVEN_ZIP_TIMEOUT
+from config import SCAN_HASH_CHUNK_SIZE, SEVEN_ZIP_TIMEOUT
 from logger.logger import log
 
 SEVEN_ZIP_PATH = "/usr/bin/7zz"
-FILE_READ_CHUNK_SIZE = 1024 * 8
+FILE_READ_CHUNK_SIZE = SCAN_HASH_CHUNK_SIZE
+
+
+class SevenZipStreamError(Exception):
+    """The 7zip binary failed after part of the member was already streamed."""
+
+
+def stream_file_7z(
+    file_path: Path,
+    member: str,
+    fn_hash_update: Callable[[memoryview], None],
+) -> None:
+    """
+    Stream a member of a 7zip file from the 7zip binary's stdout into the hashing callback.
+
+    Chunks are read into a single reused buffer, so memory usage stays bounded and
+    nothing is written to disk. The process is killed if it runs for longer than
+    SEVEN_ZIP_TIMEOUT, or if the callback raises (e.g. when the scan is stopped).
+
+    Args:
+        file_path: Path to the 7z file
+        member: Path of the member to extract, as listed by the 7zip binary
+        fn_hash_update: Callback to update hashes with data chunks
+    """
+    process = subprocess.Popen(
+        [SEVEN_ZIP_PATH, "e", "-so", "-y", str(file_path), member],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        shell=False,  # trunk-ignore(bandit/B603): 7z path is hardcoded, args are validated
+    )
+    timed_out = threading.Event()
+
+    def kill_on_timeout() -> None:
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(SEVEN_ZIP_TIMEOUT, kill_on_timeout)
+    timer.start()
+    try:
+        buffer = bytearray(FILE_READ_CHUNK_SIZE)
+        with memoryview(buffer) as view:
+            while size := process.stdout.readinto(view):  # type: ignore[union-attr]
+                with view[:size] as chunk:
+                    fn_hash_update(chunk)
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()  # type: ignore[union-attr]
+        returncode = process.wait()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(process.args, SEVEN_ZIP_TIMEOUT)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, process.args)
 
 
 def process_file_7z(
     file_path: Path,
-    fn_hash_update: Callable[[bytes | bytearray], None],
+    fn_hash_update: Callable[[memoryview], None],
 ) -> bool:
     """
     Process a 7zip file using the system's 7zip binary and use the provided callables to update the calculated hashes.
@@ -22,7 +76,19 @@ def process_file_7z(
     Args:
         file_path: Path to the 7z file
         fn_hash_update: Callback to update hashes with data chunks
+
+    Returns:
+        Whether the largest member was streamed, or False to hash the raw file instead
+
+    Raises:
+        SevenZipStreamError: If streaming failed after some chunks were hashed
     """
+    streamed = False
+
+    def hash_update(chunk: memoryview) -> None:
+        nonlocal streamed
+        streamed = True
+        fn_hash_update(chunk)
 
     try:
         result = subprocess.run(
@@ -61,34 +127,9 @@ def process_file_7z(
         if not largest_file:
             return False
 
-        with tempfile.TemporaryDirectory(dir=ROMM_TMP_PATH) as temp_dir:
-            log.debug(f"Extracting {largest_file} from {file_path}...")
-
-            temp_path = Path(temp_dir)
-            subprocess.run(
-                [
-                    SEVEN_ZIP_PATH,
-                    "e",
-                    str(file_path),
-                    largest_file,
-                    f"-o{temp_path}",
-                    "-y",
-                ],
-                capture_output=True,
-                check=True,
-                timeout=SEVEN_ZIP_TIMEOUT,
-                shell=False,  # trunk-ignore(bandit/B603): 7z path is hardcoded, args are validated
-            )
-
-            # Get the first file in temp_path
-            extracted_file = next(temp_path.iterdir(), None)
-            if extracted_file and extracted_file.exists():
-                with open(extracted_file, "rb") as f:
-                    while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                        fn_hash_update(chunk)
-
-                return True
-            return False
+        log.debug(f"Streaming {largest_file} from {file_path}...")
+        stream_file_7z(file_path, largest_file, hash_update)
+        return True
 
     except (
         subprocess.TimeoutExpired,
@@ -96,4 +137,8 @@ def process_file_7z(
         FileNotFoundError,
     ) as e:
         log.error(f"Error processing 7z file: {e}")
+        # Chunks already streamed can't be taken back from the hashes, so the
+        # caller must discard them before falling back to the raw file
+        if streamed:
+            raise SevenZipStreamError(str(e)) from e
         return False
@@ -1,12 +1,29 @@
+import asyncio
+import functools
 import hashlib
 import json
+import time
+from collections.abc import Awaitable, Callable, Collection, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from itertools import batched
 from pathlib import Path
+from typing import Any, Final, ParamSpec, TypeVar
 
 from anyio import open_file
 from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
 
+from config import METADATA_CACHE_ENABLED
+from config.config_manager import config_manager as cm
+from handler.redis_handler import async_cache
 from logger.logger import log
+from utils.context import initialize_context
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+METADATA_CACHE_KEY_PREFIX: Final = "romm:metadata_cache"
 
 
 async def conditionally_set_cache(cache: AsyncRedis, key: str, file_path: Path) -> None:
@@ -49,3 +66,166 @@ async def conditionally_set_cache(cache: AsyncRedis, key: str, file_path: Path)
     except Exception as e:
         # Log the error but don't fail - this allows migrations to run even if Redis is not available
         log.warning(f"Failed to initialize cache for {key}: {e}")
+
+
+# Seconds in a day, for the response cache TTLs
+_DAY: Final = 24 * 60 * 60
+
+# How long the responses of each metadata provider are fresh, in seconds
+METADATA_CACHE_TTLS: Final[dict[str, int]] = {
+    "igdb": 7 * _DAY,
+    "moby": 30 * _DAY,
+    # Responses count towards the daily ScreenScraper quota
+    "ss": 30 * _DAY,
+    "sgdb": 7 * _DAY,
+    "flashpoint": 7 * _DAY,
+    "hltb": 7 * _DAY,
+    "hasheous": 7 * _DAY,
+    "playmatch": 7 * _DAY,
+}
+
+_skip_response_cache: ContextVar[bool] = ContextVar(
+    "skip_response_cache", default=False
+)
+# Response cache keys being refreshed in the background
+_refreshing_keys: set[str] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+@contextmanager
+def skip_response_cache() -> Iterator[None]:
+    """Always send the requests of metadata providers, e.g. for health checks"""
+    token = _skip_response_cache.set(True)
+    try:
+        yield
+    finally:
+        _skip_response_cache.reset(token)
+
+
+def get_response_cache_key(provider: str, request: Any) -> str:
+    """Get the cache key of a normalized metadata provider request
+
+    Args:
+        provider: Metadata provider the request is sent to
+        request: Endpoint and parameters of the request, serializable to JSON
+    """
+    normalized_request = json.dumps(request, sort_keys=True, default=str)
+    digest = hashlib.sha1(
+        normalized_request.encode("utf-8"), usedforsecurity=False
+    ).hexdigest()
+    return f"{METADATA_CACHE_KEY_PREFIX}:{provider}:{digest}"
+
+
+async def _store_response(key: str, response: Any, ttl: int) -> None:
+    try:
+        # Stale responses are kept as long again, to be served while refreshed
+        await async_cache.set(
+            key,
+            json.dumps({"fetched_at": time.time(), "response": response}),
+            ex=ttl * 2,
+        )
+    except RedisError as e:
+        log.warning(f"Failed to cache metadata response in {key}: {e}")
+
+
+def _refresh_response(key: str, fetch: Callable[[], Awaitable[Any]], ttl: int) -> None:
+    if key in _refreshing_keys:
+        return
+
+    async def refresh() -> None:
+        try:
+            # The HTTP sessions of the caller are closed when its job ends,
+            # which can happen before the refresh is done
+            async with initialize_context():
+                response = await fetch()
+            if response:
+                await _store_response(key, response, ttl)
+        except Exception as e:
+            log.debug(f"Failed to refresh cached metadata response {key}: {e}")
+        finally:
+            _refreshing_keys.discard(key)
+
+    _refreshing_keys.add(key)
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def cached_response(
+    provider: str, ignored_params: Collection[str] = ("request_timeout",)
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache the responses of the request method of a metadata provider in Redis
+
+    Responses are keyed by the method, its arguments and the configured
+    region and language priorities, so the same request to the same endpoint
+    is only sent once per TTL. Once outdated, a response
+    is still returned while it's refreshed in the background. Empty responses,
+    which are also returned on errors, aren't cached.
+
+    Args:
+        provider: Metadata provider, to get the TTL and to purge its responses
+        ignored_params: Keyword arguments that don't change the response
+    """
+    ttl = METADATA_CACHE_TTLS[provider]
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not METADATA_CACHE_ENABLED or _skip_response_cache.get():
+                return await func(*args, **kwargs)
+
+            # The first argument is the provider service or handler
+            config = cm.get_config()
+            key = get_response_cache_key(
+                provider,
+                [
+                    func.__qualname__,
+                    args[1:],
+                    {k: v for k, v in kwargs.items() if k not in ignored_params},
+                    # Localized names and media depend on the priorities
+                    config.SCAN_REGION_PRIORITY,
+                    config.SCAN_LANGUAGE_PRIORITY,
+                ],
+            )
+            try:
+                cached_entry = await async_cache.get(key)
+            except RedisError as e:
+                log.warning(f"Failed to read cached metadata response {key}: {e}")
+                cached_entry = None
+
+            if cached_entry:
+                entry = json.loads(cached_entry)
+                if time.time() - entry["fetched_at"] > ttl:
+                    _refresh_response(key, lambda: func(*args, **kwargs), ttl)
+                return entry["response"]
+
+            response = await func(*args, **kwargs)
+            if response:
+                await _store_response(key, response, ttl)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def purge_response_cache(provider: str | None = None) -> int:
+    """Delete the cached responses of a metadata provider, or of all of them
+
+    Args:
+        provider: Metadata provider to purge the responses of, or None for all
+
+    Returns:
+        Number of deleted responses
+    """
+    pattern = f"{METADATA_CACHE_KEY_PREFIX}:{provider or '*'}:*"
+    deleted = 0
+    keys: list[Any] = []
+    async for key in async_cache.scan_iter(match=pattern, count=1000):
+        keys.append(key)
+        if len(keys) >= 1000:
+            deleted += await async_cache.delete(*keys)
+            keys = []
+    if keys:
+        deleted += await async_cache.delete(*keys)
+    return deleted
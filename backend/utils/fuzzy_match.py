@@ -0,0 +1,140 @@
+import os
+from collections import Counter
+from collections.abc import Sequence
+from typing import Final
+
+# Similarity above which the common prefix of the strings is rewarded
+JARO_WINKLER_THRESHOLD: Final = 0.7
+JARO_WINKLER_PREFIX_SCALE: Final = 0.1
+# Slack given to the score bounds, so float rounding never prunes a match
+SCORE_BOUND_TOLERANCE: Final = 1e-9
+
+
+def jaro_winkler_similarity(s0: str, s1: str) -> float:
+    """Jaro-Winkler similarity of two strings, between 0.0 and 1.0
+
+    Scores are identical to `strsimpy.jaro_winkler.JaroWinkler().similarity`,
+    which the metadata matching thresholds were tuned with.
+    """
+    if s0 == s1:
+        return 1.0
+
+    if len(s0) > len(s1):
+        max_str, min_str = s0, s1
+    else:
+        max_str, min_str = s1, s0
+
+    max_len = len(max_str)
+    match_range = int(max(max_len / 2 - 1, 0))
+    match_flags = bytearray(max_len)
+    min_matched: list[str] = []
+    for mi, c in enumerate(min_str):
+        start = max(mi - match_range, 0)
+        end = min(mi + match_range + 1, max_len)
+        xi = max_str.find(c, start, end)
+        while xi != -1 and match_flags[xi]:
+            xi = max_str.find(c, xi + 1, end)
+        if xi != -1:
+            match_flags[xi] = 1
+            min_matched.append(c)
+
+    matches = len(min_matched)
+    if matches == 0:
+        return 0.0
+
+    max_matched = (c for c, flag in zip(max_str, match_flags, strict=True) if flag)
+    transpositions = (
+        sum(a != b for a, b in zip(min_matched, max_matched, strict=True)) // 2
+    )
+    prefix = len(os.path.commonprefix((s0, s1)))
+
+    # Same operation order as strsimpy, so the floats are identical
+    j = (
+        matches / len(s0) + matches / len(s1) + (matches - transpositions) / matches
+    ) / 3
+    if j > JARO_WINKLER_THRESHOLD:
+        return j + min(JARO_WINKLER_PREFIX_SCALE, 1.0 / max_len) * prefix * (1 - j)
+    return j
+
+
+def max_jaro_winkler_similarity(
+    len0: int, len1: int, matches: int | None = None, prefix: int | None = None
+) -> float:
+    """Upper bound of the Jaro-Winkler similarity of strings with these lengths
+
+    `matches` and `prefix` narrow it down, given at most that many characters
+    in common and that long a common prefix.
+    """
+    if len0 == len1 and (matches is None or matches >= len0):
+        return 1.0
+
+    # Best case: all the common characters are matched, in order
+    min_len = min(len0, len1)
+    matches = min_len if matches is None else min(matches, min_len)
+    if matches == 0:
+        return 0.0
+
+    prefix = min_len if prefix is None else prefix
+    j = (matches / len0 + matches / len1 + 1) / 3
+    # The prefix bonus is always added, so rounding around the threshold is safe
+    return j + min(JARO_WINKLER_PREFIX_SCALE, 1.0 / max(len0, len1)) * prefix * (1 - j)
+
+
+def extract_best_match(
+    query: str, choices: Sequence[str], score_cutoff: float = 0.0
+) -> tuple[int | None, float]:
+    """Score a query against all choices, returning the best one
+
+    Returns the index of the first choice with the highest Jaro-Winkler
+    similarity and its score, or (None, 0.0) if it's below `score_cutoff`.
+    Choices that can't beat the best score so far, going by their length and
+    the characters they have in common with the query, are never scored.
+    """
+    if not choices:
+        return None, 0.0
+
+    if query in choices:
+        return (choices.index(query), 1.0) if score_cutoff <= 1.0 else (None, 0.0)
+
+    # Duplicates can't beat their first occurrence, so they're scored once
+    first_indexes: dict[str, int] = {}
+    for index, choice in enumerate(choices):
+        first_indexes.setdefault(choice, index)
+
+    query_len = len(query)
+    query_counts = Counter(query).items()
+    candidates = sorted(
+        (
+            (max_jaro_winkler_similarity(query_len, len(choice)), index, choice)
+            for choice, index in first_indexes.items()
+        ),
+        key=lambda candidate: candidate[0],
+        reverse=True,
+    )
+
+    best_index: int | None = None
+    best_score = 0.0
+    for bound, index, choice in candidates:
+        min_score = max(best_score, score_cutoff) - SCORE_BOUND_TOLERANCE
+        if bound < min_score:
+            # Candidates are sorted by bound, none of the rest can do better
+            break
+
+        common = sum(min(count, choice.count(c)) for c, count in query_counts)
+        prefix = len(os.path.commonprefix((query, choice)))
+        if (
+            max_jaro_winkler_similarity(query_len, len(choice), common, prefix)
+            < min_score
+        ):
+            continue
+
+        score = jaro_winkler_similarity(query, choice)
+        if score > best_score or (
+            score == best_score and best_index is not None and index < best_index
+        ):
+            best_index, best_score = index, score
+
+    if best_index is not None and best_score >= score_cutoff:
+        return best_index, best_score
+
+    return None, 0.0
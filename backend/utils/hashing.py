@@ -1,2 +1,590 @@
+import asyncio
+import binascii
+import bz2
+import hashlib
+import multiprocessing
+import os
+import tarfile
+import zipfile
+import zlib
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import count
+from pathlib import Path
+from typing import IO, Any, Final, Literal, TypedDict, cast
+
+import magic
+import zipfile_inflate64  # trunk-ignore(ruff/F401): Patches zipfile to support Enhanced Deflate
+
+from config import SCAN_HASH_CHUNK_SIZE, SCAN_HASH_WORKERS
+from logger.logger import log
+from utils.archive_7zip import SevenZipStreamError, process_file_7z
+
+FILE_READ_CHUNK_SIZE = SCAN_HASH_CHUNK_SIZE
+
+# How often (in seconds) a pending hashing job checks if the scan was stopped
+STOP_CHECK_INTERVAL: Final = 1.0
+# Cancelled hashing jobs are recorded in a ring of this many slots, by job ID
+CANCELLED_JOBS_SLOTS: Final = 4096
+
+# CHD (Compressed Hunks of Data) v5 format constants
+# See: https://github.com/mamedev/mame/blob/master/src/lib/util/chd.h
+CHD_SIGNATURE: Final = b"MComprHD"
+CHD_SIGNATURE_LENGTH: Final = 8
+CHD_MIN_HEADER_LENGTH: Final = 16  # Minimum to read signature and version
+CHD_V5_HEADER_LENGTH: Final = 124  # Total v5 header size
+CHD_VERSION_OFFSET: Final = 12  # Bytes offset for version field
+CHD_VERSION_LENGTH: Final = 4  # Version is a uint32
+CHD_V5_SHA1_OFFSET: Final = 84  # Combined raw+meta SHA1 offset in v5
+CHD_V5_SHA1_LENGTH: Final = 20  # SHA1 is 20 bytes
+CHD_V5_VERSION: Final = 5  # CHD v5 identifier
+
+DEFAULT_CRC_C = 0
+DEFAULT_MD5_H_DIGEST = hashlib.md5(usedforsecurity=False).digest()
+DEFAULT_SHA1_H_DIGEST = hashlib.sha1(usedforsecurity=False).digest()
+
+
+class FileHash(TypedDict):
+    crc_hash: str
+    md5_hash: str
+    sha1_hash: str
+
+
+EMPTY_FILE_HASH: Final = FileHash(crc_hash="", md5_hash="", sha1_hash="")
+
+
+class HashingCancelledError(Exception): ...
+
+
 def crc32_to_hex(value: int) -> str:
     return (value & 0xFFFFFFFF).to_bytes(4, byteorder="big").hex()
+
+
+# Reversed CRC-32 polynomial, as used by zlib
+CRC32_POLYNOMIAL: Final = 0xEDB88320
+
+
+def _gf2_matrix_times(matrix: list[int], vector: int) -> int:
+    result = 0
+    index = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[index]
+        vector >>= 1
+        index += 1
+    return result
+
+
+def _gf2_matrix_square(matrix: list[int]) -> list[int]:
+    return [_gf2_matrix_times(matrix, row) for row in matrix]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """Combine the CRC32 of two consecutive blocks of data, without the data.
+
+    Port of zlib's `crc32_combine`, which Python doesn't expose.
+
+    Args:
+        crc1: CRC32 of the first block
+        crc2: CRC32 of the second block
+        len2: Length in bytes of the second block
+    """
+    if len2 <= 0:
+        return crc1
+
+    # Operator for a single zero bit, then for two and four zero bits
+    odd = [CRC32_POLYNOMIAL] + [1 << n for n in range(31)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+
+    # Apply len2 zero bytes to crc1, squaring the operator for each bit of len2
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+    return crc1 ^ crc2
+
+
+def build_file_hash(crc_c: int, md5_h: Any, sha1_h: Any) -> FileHash:
+    """Build the hex representation of the hashes, leaving untouched hashes empty."""
+    return FileHash(
+        crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
+        md5_hash=(
+            md5_h.hexdigest()
+            if md5_h and md5_h.digest() != DEFAULT_MD5_H_DIGEST
+            else ""
+        ),
+        sha1_hash=(
+            sha1_h.hexdigest()
+            if sha1_h and sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
+            else ""
+        ),
+    )
+
+
+# Set in each worker process of the hashing pool, to allow cancelling running jobs
+_cancelled_jobs: Sequence[int] | None = None
+# ID of the job running in this worker process, if any
+_job_id: int | None = None
+
+
+def _init_hashing_worker(cancelled_jobs: Sequence[int]) -> None:
+    global _cancelled_jobs
+    _cancelled_jobs = cancelled_jobs
+
+
+def _raise_if_cancelled() -> None:
+    if (
+        _cancelled_jobs is not None
+        and _job_id is not None
+        and _cancelled_jobs[_job_id % CANCELLED_JOBS_SLOTS] == _job_id
+    ):
+        raise HashingCancelledError()
+
+
+def read_into_buffer(f: IO[bytes], size: int | None = None) -> Iterator[memoryview]:
+    """Read a file object in chunks, reusing the same buffer for every chunk.
+
+    Each chunk is only valid until the next one is requested, so consumers
+    must not keep a reference to it.
+
+    Args:
+        f: Binary file object to read
+        size: Expected size of the content, to avoid oversized buffers for small files
+    """
+    buffer_size = FILE_READ_CHUNK_SIZE if size is None else size
+    buffer = bytearray(max(1, min(buffer_size, FILE_READ_CHUNK_SIZE)))
+    with memoryview(buffer) as view:
+        while size := f.readinto(view):  # type: ignore[attr-defined]
+            with view[:size] as chunk:
+                yield chunk
+
+
+def read_basic_file(file_path: os.PathLike[str]) -> Iterator[memoryview]:
+    # Files aren't memory-mapped, as a file truncated while being hashed would
+    # kill the worker process (SIGBUS) instead of failing the ROM
+    with open(file_path, "rb") as f:
+        yield from read_into_buffer(f, os.path.getsize(file_path))
+
+
+def read_zip_file(
+    file: str | os.PathLike[str] | IO[bytes],
+) -> Iterator[memoryview]:
+    try:
+        with zipfile.ZipFile(file, "r") as z:
+            # Find the biggest file in the archive
+            largest_file = max(z.infolist(), key=lambda x: x.file_size)
+            with z.open(largest_file, "r") as f:
+                yield from read_into_buffer(f, largest_file.file_size)
+    except zipfile.BadZipFile:
+        if isinstance(file, Path):
+            yield from read_basic_file(file)
+
+
+def _is_zip_file(file_path: Path) -> bool:
+    if Path(file_path).suffix.lower() == ".zip":
+        return True
+    try:
+        return magic.Magic(mime=True).from_file(file_path) == "application/zip"
+    except (FileNotFoundError, PermissionError):
+        return False
+
+
+def read_zip_crc(file_path: Path) -> tuple[int, int] | None:
+    """Read the CRC32 and size of the biggest file in a ZIP archive.
+
+    Both are stored in the central directory, so nothing is decompressed.
+
+    Returns:
+        The CRC32 and uncompressed size, or None if the file isn't a valid ZIP archive
+    """
+    try:
+        with zipfile.ZipFile(file_path, "r") as z:
+            largest_file = max(z.infolist(), key=lambda x: x.file_size)
+            return largest_file.CRC, largest_file.file_size
+    except (zipfile.BadZipFile, ValueError, FileNotFoundError, PermissionError):
+        # ValueError is raised for archives without any files
+        return None
+
+
+def read_tar_file(
+    file_path: Path, mode: Literal["r", "r:*", "r:", "r:gz", "r:bz2", "r:xz"] = "r"
+) -> Iterator[memoryview]:
+    try:
+        with tarfile.open(file_path, mode) as f:
+            regular_files = [member for member in f.getmembers() if member.isfile()]
+
+            # Find the largest file among regular files only
+            largest_file = max(regular_files, key=lambda x: x.size)
+            with f.extractfile(largest_file) as ef:  # type: ignore
+                yield from read_into_buffer(ef, largest_file.size)
+    except tarfile.ReadError:
+        yield from read_basic_file(file_path)
+
+
+def read_gz_file(file_path: Path) -> Iterator[memoryview]:
+    return read_tar_file(file_path, "r:gz")
+
+
+def process_7z_file(
+    file_path: Path,
+    fn_hash_update: Callable[[bytes | bytearray | memoryview], None],
+) -> None:
+    processed = process_file_7z(
+        file_path=file_path,
+        fn_hash_update=fn_hash_update,
+    )
+    if not processed:
+        for chunk in read_basic_file(file_path):
+            fn_hash_update(chunk)
+
+
+def read_bz2_file(file_path: Path) -> Iterator[memoryview]:
+    try:
+        with bz2.BZ2File(file_path, "rb") as f:
+            yield from read_into_buffer(f)
+    except EOFError:
+        yield from read_basic_file(file_path)
+
+
+def extract_chd_hash(file_path: Path) -> str | None:
+    """
+    Extract the embedded SHA1 hash from a CHD (Compressed Hunks of Data) v5 file header.
+
+    Only CHD v5 files are supported, matching MAMERedump's database.
+
+    CHD v5 files store the combined raw+meta SHA1 hash in the header.
+    This hash is what ROM databases use for CHD identification, since it includes
+    metadata like CD track layouts which are essential for proper disc image
+    identification.
+
+    For reference, check out "chd.h" in the MAME source tree.
+
+    ---------------------------------- Why? ----------------------------------
+    CHDMAN does not produce nor guarantee stable, byte-for-byte identical
+    outputs for a given disc image. (Including HD images.)
+
+    For this reason, the CHD format embeds the original source data hash in
+    its header, allowing different CHD files to be verified as equivalent
+    even when their compressed representations differ.
+    --------------------------------------------------------------------------
+
+    Args:
+        file_path: Path to the CHD file
+
+    Returns:
+        SHA1 hash as hex string, or None if file is not a valid CHD v5 file or parsing fails
+    """
+    try:
+        with open(file_path, "rb") as f:
+            # Read the v5 header and extract the embedded SHA1
+            header = f.read(CHD_V5_HEADER_LENGTH)
+
+            # Check for "MComprHD" signature
+            if (
+                len(header) < CHD_MIN_HEADER_LENGTH
+                or header[:CHD_SIGNATURE_LENGTH] != CHD_SIGNATURE
+            ):
+                return None
+
+            # Extract and verify version (big-endian uint32)
+            version_end = CHD_VERSION_OFFSET + CHD_VERSION_LENGTH
+            version = int.from_bytes(header[CHD_VERSION_OFFSET:version_end], "big")
+
+            # Only support v5 CHD files
+            if version != CHD_V5_VERSION:
+                return None
+
+            # Extract combined raw+meta SHA1 from v5 header
+            sha1_end = CHD_V5_SHA1_OFFSET + CHD_V5_SHA1_LENGTH
+            if len(header) < sha1_end:
+                return None
+            sha1_bytes = header[CHD_V5_SHA1_OFFSET:sha1_end]
+            return sha1_bytes.hex()
+    except OSError:
+        return None
+
+
+class CHDHashWrapper:
+    """
+    Wrapper class that mimics hashlib hash objects but returns a pre-computed hash.
+
+    This class provides a hashlib-compatible interface for pre-computed hashes
+    extracted from CHD v5 file headers. It implements the same methods and attributes
+    as hashlib hash objects (digest(), hexdigest(), update(), and name).
+    """
+
+    def __init__(self, hash_hex: str, name: str):
+        self.hash_hex = hash_hex
+        self.name = name
+        # Store the digest as bytes
+        self._digest = bytes.fromhex(hash_hex)
+
+    def hexdigest(self) -> str:
+        """Return the hash as a hexadecimal string."""
+        return self.hash_hex
+
+    def digest(self) -> bytes:
+        """Return the hash as bytes."""
+        return self._digest
+
+    def update(self, data: bytes | bytearray | memoryview) -> None:
+        """No-op update method for compatibility with hashlib interface."""
+        pass
+
+    def copy(self) -> "CHDHashWrapper":
+        """Return the wrapper itself, as the pre-computed hash never changes."""
+        return self
+
+
+def calculate_rom_hashes(
+    file_path: Path,
+    rom_crc_c: int,
+    rom_md5_h: Any,
+    rom_sha1_h: Any,
+) -> tuple[int, int, Any, Any, Any, Any]:
+    extension = Path(file_path).suffix.lower()
+    mime = magic.Magic(mime=True)
+    try:
+        file_type = mime.from_file(file_path)
+
+        crc_c = 0
+        md5_h = hashlib.md5(usedforsecurity=False)
+        sha1_h = hashlib.sha1(usedforsecurity=False)
+
+        def update_hashes(chunk: bytes | bytearray | memoryview):
+            _raise_if_cancelled()
+
+            md5_h.update(chunk)
+            rom_md5_h.update(chunk)
+
+            sha1_h.update(chunk)
+            rom_sha1_h.update(chunk)
+
+            nonlocal crc_c
+            crc_c = binascii.crc32(chunk, crc_c)
+            nonlocal rom_crc_c
+            rom_crc_c = binascii.crc32(chunk, rom_crc_c)
+
+        if extension == ".zip" or file_type == "application/zip":
+            for chunk in read_zip_file(file_path):
+                update_hashes(chunk)
+
+        elif extension == ".tar" or file_type == "application/x-tar":
+            for chunk in read_tar_file(file_path):
+                update_hashes(chunk)
+
+        elif extension == ".gz" or file_type == "application/x-gzip":
+            for chunk in read_gz_file(file_path):
+                update_hashes(chunk)
+
+        elif extension == ".7z" or file_type == "application/x-7z-compressed":
+            rom_hashes = (rom_crc_c, rom_md5_h.copy(), rom_sha1_h.copy())
+            try:
+                process_7z_file(
+                    file_path=file_path,
+                    fn_hash_update=update_hashes,
+                )
+            except SevenZipStreamError:
+                # Drop the partially streamed member and hash the raw file instead
+                crc_c = 0
+                md5_h = hashlib.md5(usedforsecurity=False)
+                sha1_h = hashlib.sha1(usedforsecurity=False)
+                rom_crc_c, rom_md5_h, rom_sha1_h = rom_hashes
+                for chunk in read_basic_file(file_path):
+                    update_hashes(chunk)
+
+        elif extension == ".bz2" or file_type == "application/x-bzip2":
+            for chunk in read_bz2_file(file_path):
+                update_hashes(chunk)
+
+        elif extension == ".chd" or file_type == "application/x-mame-chd":
+            chd_hash = extract_chd_hash(file_path)
+            if chd_hash:
+                sha1_h = cast(Any, CHDHashWrapper(chd_hash, name="sha1"))
+                rom_sha1_h = cast(Any, CHDHashWrapper(chd_hash, name="sha1"))
+            else:
+                # Not a valid v5 CHD, treat as basic file
+                # This ensures CRC32 and MD5 are still calculated for non-v5 CHDs
+                for chunk in read_basic_file(file_path):
+                    update_hashes(chunk)
+
+        else:
+            for chunk in read_basic_file(file_path):
+                update_hashes(chunk)
+
+        return crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h
+    except (FileNotFoundError, PermissionError):
+        return (
+            0,
+            rom_crc_c,
+            hashlib.md5(usedforsecurity=False),
+            rom_md5_h,
+            hashlib.sha1(usedforsecurity=False),
+            rom_sha1_h,
+        )
+
+
+@dataclass(frozen=True)
+class HashedFiles:
+    file_hashes: list[FileHash]
+    combined_hash: FileHash
+    # Whether only the CRC of some of the files was read from their ZIP header
+    crc_only: bool = False
+
+
+def hash_files(file_paths: Sequence[Path], crc_only: bool = False) -> HashedFiles:
+    """Hash each file individually, and all of them combined in the given order.
+
+    This function runs inside the hashing pool worker processes, so both its
+    arguments and its result must be picklable.
+
+    Args:
+        file_paths: Files to hash, in the order they are combined
+        crc_only: Whether to only read the CRC of ZIP files from their central
+            directory, leaving their MD5 and SHA1 (and the combined ones) empty
+    """
+    rom_crc_c = 0
+    rom_md5_h = hashlib.md5(usedforsecurity=False)
+    rom_sha1_h = hashlib.sha1(usedforsecurity=False)
+    read_crc_only = False
+
+    file_hashes: list[FileHash] = []
+    for file_path in file_paths:
+        zip_crc = (
+            read_zip_crc(file_path) if crc_only and _is_zip_file(file_path) else None
+        )
+        if zip_crc:
+            crc_c, file_size = zip_crc
+            rom_crc_c = crc32_combine(rom_crc_c, crc_c, file_size)
+            read_crc_only = True
+            file_hashes.append(build_file_hash(crc_c, None, None))
+            continue
+
+        try:
+            crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
+                calculate_rom_hashes(file_path, rom_crc_c, rom_md5_h, rom_sha1_h)
+            )
+        except zlib.error:
+            crc_c = 0
+            md5_h = hashlib.md5(usedforsecurity=False)
+            sha1_h = hashlib.sha1(usedforsecurity=False)
+
+        file_hashes.append(build_file_hash(crc_c, md5_h, sha1_h))
+
+    return HashedFiles(
+        file_hashes=file_hashes,
+        combined_hash=(
+            build_file_hash(rom_crc_c, None, None)
+            if read_crc_only
+            else build_file_hash(rom_crc_c, rom_md5_h, rom_sha1_h)
+        ),
+        crc_only=read_crc_only,
+    )
+
+
+def _hash_files_job(
+    job_id: int, file_paths: Sequence[Path], crc_only: bool
+) -> HashedFiles:
+    """Run `hash_files` in a worker process, cancelled along with its job ID."""
+    global _job_id
+    _job_id = job_id
+    try:
+        return hash_files(file_paths, crc_only)
+    finally:
+        _job_id = None
+
+
+class HashingEngine:
+    """Run CPU-bound file hashing in a bounded pool of worker processes.
+
+    The pool is created lazily on first use, and sized to the number of CPU cores
+    by default (see `SCAN_HASH_WORKERS`), so hashing never blocks the event loop.
+    Each job can be cancelled on its own, without affecting the other callers.
+    """
+
+    def __init__(self, max_workers: int = SCAN_HASH_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        # IDs of the cancelled jobs, in shared memory read by the worker processes
+        self._cancelled_jobs: Any = None
+        # IDs start at 1, as 0 marks the empty slots of `_cancelled_jobs`
+        self._job_ids = count(1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers only import this module, and don't inherit the
+            # locks and threads of the parent process
+            mp_context = multiprocessing.get_context("spawn")
+            self._cancelled_jobs = mp_context.RawArray("Q", CANCELLED_JOBS_SLOTS)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp_context,
+                initializer=_init_hashing_worker,
+                initargs=(self._cancelled_jobs,),
+            )
+        return self._executor
+
+    async def hash_files(
+        self,
+        file_paths: Sequence[Path],
+        should_stop: Callable[[], bool] | None = None,
+        crc_only: bool = False,
+    ) -> HashedFiles:
+        """Hash the files in a worker process, and wait for the result.
+
+        Args:
+            file_paths: Files to hash, in the order they are combined
+            should_stop: Callback periodically checked while waiting, to cancel hashing
+            crc_only: Whether to only read the CRC of ZIP files from their header
+
+        Raises:
+            HashingCancelledError: If hashing was cancelled before completion
+        """
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        future = loop.run_in_executor(
+            self._get_executor(), _hash_files_job, job_id, list(file_paths), crc_only
+        )
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=STOP_CHECK_INTERVAL)
+                if done:
+                    return future.result()
+                if should_stop and should_stop():
+                    self._cancel_job(job_id)
+        except asyncio.CancelledError:
+            # Don't leave a worker process hashing for nothing
+            future.cancel()
+            self._cancel_job(job_id)
+            raise
+        except BrokenProcessPool:
+            log.error("Hashing worker process died unexpectedly, restarting pool")
+            self.shutdown()
+            raise
+
+    def _cancel_job(self, job_id: int) -> None:
+        """Cancel a hashing job, whether it's pending or running."""
+        if self._cancelled_jobs is not None:
+            self._cancelled_jobs[job_id % CANCELLED_JOBS_SLOTS] = job_id
+
+    def shutdown(self) -> None:
+        """Stop the worker processes, which are recreated on the next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._cancelled_jobs = None
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Final, Generic, TypeVar
+
+T = TypeVar("T")
+
+# Marks the end of the items in a stage queue
+_STAGE_DONE: Final = object()
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    busy_seconds: float = 0.0
+    started_at: float | None = None
+
+    @property
+    def items_per_second(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict[str, int | float]:
+        return {
+            "processed": self.processed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items_per_second, 2),
+        }
+
+
+@dataclass
+class PipelineStage(Generic[T]):
+    """A step of a pipeline, run concurrently by a fixed number of workers
+
+    The stage function returns the item to pass on to the next stage, or None
+    to drop it from the pipeline.
+    """
+
+    name: str
+    fn: Callable[[T], Awaitable[T | None]]
+    workers: int = 1
+    stats: StageStats = field(default_factory=StageStats)
+
+
+async def run_pipeline(
+    items: AsyncIterable[T],
+    stages: Sequence[PipelineStage[T]],
+    on_error: Callable[[T, Exception], None],
+    fatal_exceptions: tuple[type[Exception], ...] = (),
+    on_done: Callable[[T], None] | None = None,
+) -> None:
+    """Run the items through the stages, with bounded queues between stages
+
+    Each stage starts on an item as soon as the previous stage is done with it,
+    so different items are in different stages at the same time. Queues hold at
+    most twice as many items as the workers of the stage that consumes them.
+
+    Args:
+        items: Items to feed to the first stage
+        stages: Stages to run the items through, in order
+        on_error: Called with the item when a stage fails on it, which drops the item
+        fatal_exceptions: Exceptions that stop the whole pipeline, and are re-raised
+        on_done: Called with the item when it leaves the pipeline, because it went
+            through all the stages, was dropped or failed
+    """
+    queues: list[asyncio.Queue] = [
+        asyncio.Queue(maxsize=stage.workers * 2) for stage in stages
+    ]
+
+    async def feed() -> None:
+        async for item in items:
+            await queues[0].put(item)
+        await queues[0].put(_STAGE_DONE)
+
+    async def work(index: int) -> None:
+        stage = stages[index]
+        in_queue = queues[index]
+        out_queue = queues[index + 1] if index + 1 < len(queues) else None
+
+        while (item := await in_queue.get()) is not _STAGE_DONE:
+            if stage.stats.started_at is None:
+                stage.stats.started_at = time.monotonic()
+
+            start = time.monotonic()
+            try:
+                result = await stage.fn(item)
+            except fatal_exceptions:
+                raise
+            except Exception as e:
+                on_error(item, e)
+                result = None
+            finally:
+                stage.stats.processed += 1
+                stage.stats.busy_seconds += time.monotonic() - start
+
+            if result is not None and out_queue is not None:
+                await out_queue.put(result)
+            elif on_done:
+                on_done(item)
+
+        # Let the other workers of the stage know there are no more items
+        await in_queue.put(_STAGE_DONE)
+
+    async def run_stage(index: int) -> None:
+        async with asyncio.TaskGroup() as stage_group:
+            for _ in range(stages[index].workers):
+                stage_group.create_task(work(index))
+
+        if index + 1 < len(queues):
+            await queues[index + 1].put(_STAGE_DONE)
+
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(feed())
+            for index in range(len(stages)):
+                task_group.create_task(run_stage(index))
+    except BaseExceptionGroup as group:
+        # Raise the error that stopped the pipeline, instead of the task groups
+        error: BaseException = group
+        while isinstance(error, BaseExceptionGroup):
+            error = error.exceptions[0]
+        raise error from None
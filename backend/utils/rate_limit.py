@@ -0,0 +1,196 @@
+import asyncio
+import math
+import os
+from collections.abc import Callable, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Final, TypedDict
+
+from redis.exceptions import RedisError, WatchError
+
+from config import (
+    IGDB_REQUESTS_PER_SECOND,
+    METADATA_RATE_LIMIT_ENABLED,
+    MOBYGAMES_REQUESTS_PER_SECOND,
+    RETROACHIEVEMENTS_REQUESTS_PER_SECOND,
+    SCREENSCRAPER_REQUESTS_PER_SECOND,
+)
+from handler.redis_handler import async_cache
+from logger.logger import log
+
+RATE_LIMIT_KEY_PREFIX: Final = "romm:rate_limit"
+# Seconds to wait after a rate limit response without a Retry-After header
+DEFAULT_RETRY_AFTER: Final = 2.0
+
+
+class RateLimitStats(TypedDict):
+    requests: int
+    throttled_requests: int
+    rate_limited_responses: int
+    wait_seconds: float
+    average_wait_seconds: float
+
+
+def get_retry_after(
+    headers: Mapping[str, str] | None, default: float = DEFAULT_RETRY_AFTER
+) -> float:
+    """Get the seconds to wait from the Retry-After header of a response
+
+    Args:
+        headers: Headers of the rate limit response
+        default: Seconds to wait if the header is missing or invalid
+    """
+    retry_after = (headers or {}).get("Retry-After")
+    if not retry_after:
+        return default
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    # The header can also be the HTTP date to retry at
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """Token bucket limiting the requests sent to a provider by all processes
+
+    The bucket is stored in Redis in its GCRA form, as the time the next
+    request is theoretically allowed at, so a single key is updated per
+    request. Requests reserve their slot before waiting for it, which keeps
+    concurrent workers in order instead of retrying against each other.
+    """
+
+    def __init__(self, provider: str, requests_per_second: float, burst: int = 1):
+        """
+        Args:
+            provider: Provider the requests are sent to
+            requests_per_second: Sustained request rate, or 0 for no limit
+            burst: Requests that can be sent at once after being idle
+        """
+        self.provider = provider
+        self.interval = 1 / requests_per_second if requests_per_second > 0 else 0.0
+        # How far ahead of the sustained rate a burst can go
+        self.burst_window = self.interval * (max(1, burst) - 1)
+        self.key = f"{RATE_LIMIT_KEY_PREFIX}:{provider}"
+        self.stats_key = f"{self.key}:stats"
+
+    @property
+    def enabled(self) -> bool:
+        return METADATA_RATE_LIMIT_ENABLED and self.interval > 0
+
+    async def acquire(self) -> float:
+        """Wait until a request can be sent to the provider
+
+        Returns:
+            Seconds waited
+        """
+        if not self.enabled:
+            return 0.0
+
+        def reserve(now: float, allowed_at: float) -> tuple[float, float]:
+            slot = max(allowed_at, now)
+            return slot + self.interval, max(0.0, slot - self.burst_window - now)
+
+        try:
+            wait = await self._update(reserve)
+            await self._record_request(wait)
+        except RedisError as e:
+            log.warning(f"Failed to rate limit {self.provider} requests: {e}")
+            return 0.0
+
+        if wait > 0:
+            log.debug(f"Waiting {wait:.2f}s for the {self.provider} rate limit")
+            await asyncio.sleep(wait)
+        return wait
+
+    async def penalize(self, retry_after: float) -> None:
+        """Hold back all requests after a rate limit response from the provider
+
+        Args:
+            retry_after: Seconds the provider asked to wait before retrying
+        """
+        if not self.enabled:
+            # Without a shared bucket, only this request waits before retrying
+            await asyncio.sleep(retry_after)
+            return
+
+        def hold_back(now: float, allowed_at: float) -> tuple[float, float]:
+            return max(allowed_at, now + retry_after + self.burst_window), 0.0
+
+        try:
+            await self._update(hold_back)
+            await async_cache.hincrby(self.stats_key, "rate_limited_responses", 1)
+        except RedisError as e:
+            log.warning(f"Failed to rate limit {self.provider} requests: {e}")
+            await asyncio.sleep(retry_after)
+
+    async def get_stats(self) -> RateLimitStats:
+        """Get the requests sent to the provider and how long they waited"""
+        stats = {
+            os.fsdecode(key): os.fsdecode(value)
+            for key, value in (await async_cache.hgetall(self.stats_key)).items()
+        }
+        requests = int(stats.get("requests", 0))
+        wait_seconds = float(stats.get("wait_seconds", 0))
+        return RateLimitStats(
+            requests=requests,
+            throttled_requests=int(stats.get("throttled_requests", 0)),
+            rate_limited_responses=int(stats.get("rate_limited_responses", 0)),
+            wait_seconds=round(wait_seconds, 3),
+            average_wait_seconds=(
+                round(wait_seconds / requests, 3) if requests else 0.0
+            ),
+        )
+
+    async def _update(
+        self, update: Callable[[float, float], tuple[float, float]]
+    ) -> float:
+        """Atomically update the time the next request is allowed at
+
+        Args:
+            update: Called with the current time and the time the next request
+                is allowed at, returns the new allowed time and a value to return
+        """
+        async with async_cache.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self.key)
+                    # The Redis clock is shared by all processes
+                    seconds, microseconds = await pipe.time()
+                    now = seconds + microseconds / 1_000_000
+                    allowed_at = float(await pipe.get(self.key) or 0)
+
+                    next_allowed_at, result = update(now, allowed_at)
+                    expires_in = max(1, math.ceil((next_allowed_at - now) * 1000))
+
+                    pipe.multi()
+                    pipe.set(self.key, next_allowed_at, px=expires_in)
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    # Another process took a slot in the meantime
+                    continue
+
+    async def _record_request(self, wait: float) -> None:
+        async with async_cache.pipeline(transaction=False) as pipe:
+            pipe.hincrby(self.stats_key, "requests", 1)
+            if wait > 0:
+                pipe.hincrby(self.stats_key, "throttled_requests", 1)
+                pipe.hincrbyfloat(self.stats_key, "wait_seconds", wait)
+            await pipe.execute()
+
+
+RATE_LIMITERS: Final[dict[str, RateLimiter]] = {
+    "igdb": RateLimiter("igdb", IGDB_REQUESTS_PER_SECOND),
+    "moby": RateLimiter("moby", MOBYGAMES_REQUESTS_PER_SECOND),
+    "ss": RateLimiter("ss", SCREENSCRAPER_REQUESTS_PER_SECOND),
+    "ra": RateLimiter("ra", RETROACHIEVEMENTS_REQUESTS_PER_SECOND),
+}
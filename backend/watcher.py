@@ -19,7 +19,11 @@ from config import (
     TASK_RESULT_TTL,
 )
 from config.config_manager import config_manager as cm
-from endpoints.sockets.scan import scan_platforms
+from endpoints.sockets.scan import (
+    queue_changed_roms,
+    scan_changed_roms,
+    scan_platforms,
+)
 from handler.database import db_platform_handler
 from handler.metadata import (
     meta_flashpoint_handler,
@@ -69,6 +73,27 @@ VALID_EVENTS = frozenset(
 Change = tuple[EventType, str]
 
 
+def get_rom_change(event_src_parts: list[str]) -> tuple[str, str] | None:
+    """Get the platform fs_slug and fs_name of the ROM changed by an event, if any
+
+    Args:
+        event_src_parts (list[str]): Parts of the event path, relative to the library
+
+    Returns:
+        tuple[str, str] | None: Platform fs_slug and ROM fs_name, or None if the
+            event isn't inside a ROM (e.g. firmware)
+    """
+    # Paths are /roms/{fs_slug}/{fs_name} or /{fs_slug}/roms/{fs_name}
+    roms_folder_index = 1 if structure_level == 2 else 2
+    if (
+        len(event_src_parts) < 4
+        or event_src_parts[roms_folder_index] != cm.get_config().ROMS_FOLDER_NAME
+    ):
+        return None
+
+    return event_src_parts[structure_level], event_src_parts[3]
+
+
 def get_pending_scan_jobs() -> list[Job]:
     """Get all pending scan jobs (scheduled, queued, or running) for scan_platforms function.
 
@@ -123,8 +148,9 @@ def process_changes(changes: Sequence[Change]) -> None:
         return
 
     with tracer.start_as_current_span("process_changes"):
-        # Find affected platform slugs
+        # Find affected platform slugs, and the exact ROMs when possible
         fs_slugs: set[str] = set()
+        changed_roms: set[tuple[str, str]] = set()
         changes_platform_directory = False
         for change in changes:
             event_type, change_path = change
@@ -141,9 +167,13 @@ def process_changes(changes: Sequence[Change]) -> None:
                 changes_platform_directory = True
 
             log.info(f"Filesystem event: {event_type} {event_src}")
-            fs_slugs.add(event_src_parts[structure_level])
+            rom_change = get_rom_change(event_src_parts)
+            if rom_change:
+                changed_roms.add(rom_change)
+            else:
+                fs_slugs.add(event_src_parts[structure_level])
 
-        if not fs_slugs:
+        if not fs_slugs and not changed_roms:
             log.info("No valid filesystem slugs found in changes, exiting...")
             return
 
@@ -197,6 +227,27 @@ def process_changes(changes: Sequence[Change]) -> None:
             )
             return
 
+        # Changed ROMs are merged in Redis, so a burst of changes is scanned by one job
+        if queue_changed_roms(changed_roms):
+            log.info(
+                f"Changes detected in {hl(str(len(changed_roms)))} roms, {rescan_in_msg}"
+            )
+            tasks_scheduler.enqueue_in(
+                time_delta,
+                scan_changed_roms,
+                metadata_sources=metadata_sources,
+                timeout=SCAN_TIMEOUT,
+                job_result_ttl=TASK_RESULT_TTL,
+                meta={
+                    "task_name": "Changed Roms Scan",
+                    "task_type": TaskType.SCAN,
+                },
+            )
+        elif changed_roms:
+            log.info(
+                f"Changes detected in {hl(str(len(changed_roms)))} roms, added to the scheduled scan"
+            )
+
         # Otherwise, process each platform slug
         for fs_slug in fs_slugs:
             # TODO: Query platforms from the database in bulk
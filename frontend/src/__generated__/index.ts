@@ -75,6 +75,7 @@ export type { RomUserSchema } from './models/RomUserSchema';
 export type { RomUserStatus } from './models/RomUserStatus';
 export type { RoomsResponse } from './models/RoomsResponse';
 export type { SaveSchema } from './models/SaveSchema';
+export type { ScanStageStats } from './models/ScanStageStats';
 export type { ScanStats } from './models/ScanStats';
 export type { ScanTaskMeta } from './models/ScanTaskMeta';
 export type { ScanTaskStatusResponse } from './models/ScanTaskStatusResponse';
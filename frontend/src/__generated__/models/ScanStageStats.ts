@@ -0,0 +1,10 @@
+/* generated using openapi-typescript-codegen -- do not edit */
+/* istanbul ignore file */
+/* tslint:disable */
+/* eslint-disable */
+export type ScanStageStats = {
+    processed: number;
+    busy_seconds: number;
+    items_per_second: number;
+};
+
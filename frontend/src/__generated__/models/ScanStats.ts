@@ -2,6 +2,7 @@
 /* istanbul ignore file */
 /* tslint:disable */
 /* eslint-disable */
+import type { ScanStageStats } from './ScanStageStats';
 export type ScanStats = {
     total_platforms: number;
     total_roms: number;
@@ -13,5 +14,6 @@ export type ScanStats = {
     identified_roms: number;
     scanned_firmware: number;
     new_firmware: number;
+    stages: Record<string, ScanStageStats>;
 };
 
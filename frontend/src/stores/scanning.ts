@@ -35,6 +35,7 @@ export default defineStore("scanning", {
         identified_roms: 0,
         scanned_firmware: 0,
         new_firmware: 0,
+        stages: {},
       };
     },
   },